@@ -1,20 +1,44 @@
 import os
+import json
+import asyncio
 import logging
 import requests
 from fastapi import APIRouter, HTTPException, Depends, Request, FastAPI
-from fastapi.responses import JSONResponse
-from typing import Dict, Any, Tuple, List
-from hashlib import sha256
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from typing import Dict, Any, Tuple, List, AsyncIterator
+import time
+import numpy as np
 import matplotlib.pyplot as plt
 import osmnx as ox
 from datetime import datetime
-from time import sleep
 
-from core.routing.graph_builder import  load_graph_from_file, extract_subgraph, visualize_dijkstra_points, visualize_astar_points
-from core.routing.a_star import AmbulanceRouter
-from core.routing.dijkstra import DijkstraRouter
-from utils.geo_helpers import snap_to_nearest_node
-from api.schemas import RouteRequest,  RouteComparisonResponse
+from core.routing.base_tiles import render_search_images
+from core.graph_manager import FREE_FLOW, get_graph_manager
+from core.config import get_settings
+from core.worker_pool import SingleFlight, get_routing_pool
+from core.route_cache import get_route_cache, edge_snap_key
+from core.render_jobs import get_render_jobs
+from core.router import (
+    get_ambulance_router, get_dijkstra_router, get_ch_router, get_crp_router, get_matrix_router, get_hospital_router,
+    get_trip_router
+)
+from core.routing.edge_index import EdgeRouteEndpoints
+from core.routing.graph_builder import random_traffic_weights
+from core.routing.traffic_profiles import CITY_TIMEZONE, week_seconds
+from utils.polyline import encode_polyline, simplify_for_zooms
+from api.schemas import (
+    RouteRequest,  StreamRouteRequest, RouteComparisonResponse, SnapRequest, SnapResponse, TrafficUpdateRequest, TrafficUpdateResponse,
+    MatrixRequest, MatrixResponse, IsochroneRequest, IsochroneResponse, NearestHospitalsRequest,
+    NearestHospitalsResponse, TripRequest, TripPositionRequest, TripResponse, RoadClosureRequest, RoadClosureResponse,
+    RenderJobResponse
+)
+
+# orjson renders large route bodies several times faster than json, if installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -29,13 +53,74 @@ logging.basicConfig(
     ]
 )
 
-# In-memory cache for routes
-route_cache: Dict[str, Any] = {}
+# Route computations in flight, keyed on their cache keys
+route_flights = SingleFlight()
+
+# Algorithms that search on the live traffic snapshot (/routes/traffic); the
+# others use the free-flow weights, or the weekly profiles for td_astar
+TRAFFIC_ALGORITHMS = ("crp",)
+
+# Algorithms whose searches can report their settled nodes while running
+FRONTIER_ALGORITHMS = ("astar", "dijkstra", "bidirectional_astar", "bidirectional_dijkstra", "alt", "td_astar")
+
+def filter_result(res: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of a router result returned to (and cached for) clients."""
+    return {
+        "algorithm": res.get("algorithm"),
+        "time": res.get("time"),
+        "nodes": res.get("nodes"),
+        "distance": res.get("distance"),
+        "route": res.get("route"),
+        "eta_mins": res.get("eta_mins"),
+    }
+
+def route_fields(route: List[List[float]], route_format: str, zooms: List[int] = None) -> Dict[str, Any]:
+    """The route of one result in the requested format, plus its simplified variants per zoom level."""
+    route = route or []
+    if route_format == "coordinates":
+        fields = {"route": route}
+        encode = lambda points: points.tolist()
+    else:
+        precision = int(route_format[-1])
+        fields = {"route": None, "polyline": encode_polyline(route, precision)}
+        encode = lambda points: encode_polyline(points, precision)
+    if zooms:
+        fields["simplified"] = {str(zoom): encode(points) for zoom, points in simplify_for_zooms(route, zooms).items()}
+    return fields
+
+def format_route_response(response: Dict[str, Any], route_format: str, zooms: List[int] = None) -> Dict[str, Any]:
+    """
+    The /routes body in the requested route format. Results are copied, not
+    changed: the same dicts are held by the route cache and handed to every
+    coalesced request.
+    """
+    alternatives = response.get("alternatives")
+    return {
+        "results": [dict(result, **route_fields(result["route"], route_format, zooms))
+                    for result in response["results"]],
+        "alternatives": ([dict(alternative, **route_fields(alternative["route"], route_format, zooms))
+                          for alternative in alternatives] if alternatives is not None else None),
+        "render_job_id": response.get("render_job_id"),
+    }
+
+def compact_json(content: Any) -> bytes:
+    """JSON without whitespace, via orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+class CompactJSONResponse(JSONResponse):
+    """
+    JSON rendered straight from the result dicts, without whitespace. Routes
+    return it to skip FastAPI's response model validation of every route point.
+    """
 
-def generate_cache_key(source: Tuple[float, float], destination: Tuple[float, float]) -> str:
-    """Generate a unique cache key based on source and destination coordinates."""
-    key = f"{source[0]}-{source[1]}-{destination[0]}-{destination[1]}"
-    return sha256(key.encode()).hexdigest()
+    def render(self, content: Any) -> bytes:
+        return compact_json(content)
+
+def sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    """One server-sent event with a JSON payload."""
+    return b"event: " + event.encode("ascii") + b"\ndata: " + compact_json(data) + b"\n\n"
 
 @router.get("/router-test")
 def router_test():
@@ -49,85 +134,324 @@ async def get_routes():
 
 @router.post("/routes", response_model=RouteComparisonResponse)
 async def calculate_route(request: Request, route_request: RouteRequest):
-    # Ensure the bangalore_map.graphml file exists
     data_folder = os.path.join(os.getcwd(), "data")
     os.makedirs(data_folder, exist_ok=True)
-    graph_file_path = os.path.join(data_folder, "simplified_bengaluru.graphml")
 
-    # Remove the download logic here, assume the file is managed at server startup
-    if not os.path.exists(graph_file_path):
-        logger.error("simplified_bengaluru.graphml is missing. Please ensure it is downloaded at server startup.")
+    # The graph is loaded once at server startup by the graph manager
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        logger.error(f"{graph_manager.graph_file} is missing. Please ensure it is downloaded at server startup.")
         raise HTTPException(status_code=500, detail="Required map file is missing.")
 
     logger.info(f"Received route calculation request: {route_request}")
     source = (route_request.source_lat, route_request.source_lng)
     destination = (route_request.dest_lat, route_request.dest_lng)
+    departure = route_request.departure_time or datetime.now(CITY_TIMEZONE)
+    queue = route_request.priority_queue or get_settings().PRIORITY_QUEUE
 
-    cache_key = generate_cache_key(source, destination)
-
-    # Check if the route is already cached
-    if cache_key in route_cache:
-        logger.info(f"Checking for cached route with key: {cache_key}")
-        sleep(1)  # Simulate a delay for cache hit
-        logger.info(f"Cache hit for route: {source} -> {destination}")
-        return route_cache[cache_key]  # Always returns {"results": [...]}
-
+    pool = get_routing_pool()
     try:
-        graph_file = "./data/simplified_bengaluru.graphml"
-        G = load_graph_from_file(graph_file)
+        with pool.admit():
+            # Snapping, router setup, the searches and the image rendering all run
+            # on the routing pool; the algorithms being compared run concurrently.
+            # The default algorithms depend on the contraction hierarchy, which
+            # the first request loads (or builds)
+            algorithms = await pool.run(requested_algorithms, graph_manager, route_request)
+            routers, endpoints, start_node, end_node = await pool.run(
+                prepare_route_request, graph_manager, route_request, algorithms, source, destination, departure, queue)
+            cache = await pool.run(get_route_cache)
+        keys, alternatives_key = route_cache_keys(graph_manager, cache, route_request, algorithms, endpoints,
+                                                  start_node, end_node, departure, queue)
 
-        subgraph = extract_subgraph(G, source, destination)
+        async def compute() -> Dict[str, Any]:
+            with pool.admit():
+                lookups = await pool.run(cache.get_many, [keys[name] for name in algorithms] +
+                                         ([alternatives_key] if route_request.alternatives else []))
+                cached = dict(zip(algorithms, lookups))
+                missing = [name for name in algorithms if cached[name] is None]
+                alternatives = lookups[-1] if route_request.alternatives else None
+                need_alternatives = route_request.alternatives and alternatives is None
+                if not missing and not need_alternatives:
+                    logger.info(f"Cache hit for route: {source} -> {destination}")
 
-        # Snap source and destination to the nearest nodes in the subgraph
-        start_node = snap_to_nearest_node(subgraph, source)
-        end_node = snap_to_nearest_node(subgraph, destination)
-        logger.info(f"Start node: {start_node}, End node: {end_node}")
+                tasks = [pool.run(run_algorithm, routers, name, endpoints, start_node, end_node) for name in missing]
+                if need_alternatives:
+                    tasks.append(pool.run(run_alternatives, endpoints, start_node, end_node,
+                                          route_request.alternatives + 1))
+                outcomes = await asyncio.gather(*tasks)
+                results = dict(zip(missing, outcomes))
+                fresh = {}
+                for name, result in results.items():
+                    cached[name] = fresh[keys[name]] = filter_result(result)
+                if need_alternatives:
+                    # The fastest route is already in the results; keep only the other routes
+                    alternatives = fresh[alternatives_key] = outcomes[-1]["routes"][1:]
+                if fresh:
+                    await pool.run(cache.put_many, fresh)
+
+                response = {"results": [cached[name] for name in algorithms]}
+                if route_request.alternatives:
+                    response["alternatives"] = alternatives
+                if route_request.render_images:
+                    # Visited nodes are only known for searches computed just now
+                    searches = {name: (results[name].get("visited_nodes", []) if name in results else [],
+                                       cached[name]["route"])
+                                for name in ("dijkstra", "astar") if name in cached}
+                    if searches:
+                        response["render_job_id"] = get_render_jobs().submit(
+                            render_search_job, graph_manager, searches, start_node, end_node, data_folder)
+                logger.info(f"Route calculated: {len(missing)} of {len(algorithms)} algorithms computed, "
+                            f"the rest served from the cache")
+                return response
 
-        # Use the A* algorithm and Dijkstra's algorithm to calculate the shortest path
-        astar_router = AmbulanceRouter(subgraph)
-        dijkstra_router = DijkstraRouter(subgraph)
-
-        astar_result = astar_router.find_route(start_node, end_node)
-        dijkstra_result = dijkstra_router.find_route(start_node, end_node)
-
-        # Generate two images: Dijkstra only, and A* with route
-        img_dijkstra = visualize_dijkstra_points(
-            subgraph,
-            dijkstra_result.get("visited_nodes", []),
-            dijkstra_result.get("route", []),
-            start_node,
-            end_node,
-            data_folder
-        )
-        img_astar = visualize_astar_points(
-            subgraph,
-            astar_result.get("visited_nodes", []),
-            astar_result.get("route", []),
-            start_node,
-            end_node,
-            data_folder
-        )
-        logger.info(f"Dijkstra image: {img_dijkstra}, A* image: {img_astar}")
-
-        def filter_result(res):
-            return {
-                "algorithm": res.get("algorithm"),
-                "time": res.get("time"),
-                "nodes": res.get("nodes"),
-                "distance": res.get("distance"),
-                "route": res.get("route"),
-            }
-        response = {"results": [filter_result(astar_result), filter_result(dijkstra_result)]}
-
-        # Store the route in the cache
-        route_cache[cache_key] = response
-        logger.info(f"Route calculated and cached with key: {cache_key}")
-
-        return response
+        # Identical requests in flight (retries, several consoles asking for the
+        # same incident) wait for one computation instead of each running it
+        flight_key = "\n".join([keys[name] for name in algorithms] +
+                               ([alternatives_key] if route_request.alternatives else []) +
+                               (["render"] if route_request.render_images else []))
+        response = await route_flights.run(flight_key, compute)
+        # Each request gets its own route format; the serialiser skips the
+        # response model's validation of every route point
+        return CompactJSONResponse(await pool.run(format_route_response, response, route_request.route_format,
+                                                  route_request.simplify_zooms))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error calculating route: {e}")
         raise HTTPException(status_code=500, detail="Failed to calculate route")
 
+def requested_algorithms(graph_manager, route_request: RouteRequest) -> List[str]:
+    """Algorithms a route request runs, in response order."""
+    if route_request.algorithms:
+        return list(dict.fromkeys(route_request.algorithms))  # Drop duplicates, keep order
+    algorithms = ["astar", "dijkstra"]
+    if graph_manager.get_contraction_hierarchy() is not None:
+        algorithms.append("ch")
+    return algorithms
+
+def route_cache_keys(graph_manager, cache, route_request: RouteRequest, algorithms: List[str], endpoints,
+                     start_node: int, end_node: int, departure: datetime, queue: str) -> Tuple[Dict[str, str], str]:
+    """
+    Route cache keys of a route request.
+
+    Returns:
+        ({algorithm: key}, key of the alternative routes)
+    """
+    # Cache variant of each algorithm: everything besides the endpoints and
+    # traffic epoch its result depends on. Time-dependent results are cached
+    # per minute of departure
+    variants = {name: name for name in algorithms}
+    for name in ("astar", "dijkstra", "alt"):
+        variants[name] = f"{name}:{queue}"
+    variants["td_astar"] = f"td_astar:{departure.strftime('%Y-%m-%dT%H:%M%z')}"
+
+    if endpoints is not None:
+        compiled = graph_manager.get_compiled()
+        start_key, end_key = edge_snap_key(compiled, endpoints.source), edge_snap_key(compiled, endpoints.dest)
+    else:
+        start_key, end_key = start_node, end_node
+    # Traffic-following results are keyed on the traffic snapshot's fingerprint
+    # rather than the epoch counter, which restarts in every process sharing
+    # the disk tier. The rest do not change with traffic updates
+    traffic = graph_manager.traffic_fingerprint
+    keys = {name: cache.make_key(start_key, end_key, variants[name],
+                                 traffic if name in TRAFFIC_ALGORITHMS else FREE_FLOW)
+            for name in algorithms}
+    alternatives_key = cache.make_key(start_key, end_key, f"alternatives:{route_request.alternatives}", FREE_FLOW)
+    return keys, alternatives_key
+
+def run_algorithm(routers: Dict[str, tuple], name: str, endpoints, start_node: int, end_node: int,
+                  visited: List[int] = None) -> Dict[str, Any]:
+    """Run one algorithm of a route request (on the routing pool); visited collects its settled nodes."""
+    router, options = routers[name]
+    if visited is not None:
+        options = dict(options, visited=visited)
+    if endpoints is not None:
+        return router.find_route_from_snaps(endpoints, **options)
+    return router.find_route(start_node, end_node, **options)
+
+def run_alternatives(endpoints, start_node: int, end_node: int, count: int) -> Dict[str, Any]:
+    """The count fastest plateau routes of a route request (on the routing pool)."""
+    dijkstra_router = get_dijkstra_router()
+    if endpoints is not None:
+        return dijkstra_router.find_alternatives_from_snaps(endpoints, count)
+    return dijkstra_router.find_alternatives(start_node, end_node, count)
+
+def prepare_route_request(graph_manager, route_request: RouteRequest, algorithms: List[str],
+                          source: Tuple[float, float], destination: Tuple[float, float], departure: datetime,
+                          queue: str) -> tuple:
+    """
+    Set up the routers and snap the endpoints of a route request (runs on the routing pool).
+
+    Returns:
+        ({algorithm: (router, options)}, edge endpoints or None in node
+        snap mode, start node id, end node id)
+    """
+    # Both routers share the compiled graph owned by the graph manager
+    astar_router = get_ambulance_router()
+    dijkstra_router = get_dijkstra_router()
+    routers = {
+        "astar": (astar_router, {"queue": queue}),
+        "dijkstra": (dijkstra_router, {"queue": queue}),
+        "bidirectional_astar": (astar_router, {"bidirectional": True}),
+        "bidirectional_dijkstra": (dijkstra_router, {"bidirectional": True}),
+        "alt": (astar_router, {"use_landmarks": True, "queue": queue}),
+        "td_astar": (astar_router, {"departure": departure}),
+    }
+    if "ch" in algorithms:
+        ch_router = get_ch_router()
+        if ch_router is None:
+            raise HTTPException(status_code=400, detail="Contraction hierarchy has not been built for this graph")
+        routers["ch"] = (ch_router, {})
+    if "crp" in algorithms:
+        routers["crp"] = (get_crp_router(), {})
+
+    if route_request.snap_mode == "edge":
+        # Project source and destination onto the nearest road edges and
+        # start/end mid-edge, so we never jump across a divider
+        edge_index = graph_manager.get_edge_index()
+        endpoints = EdgeRouteEndpoints(edge_index, edge_index.snap(source), edge_index.snap(destination))
+        compiled = graph_manager.get_compiled()
+        start_node = int(compiled.node_ids[endpoints.source.nearest_node])
+        end_node = int(compiled.node_ids[endpoints.dest.nearest_node])
+        logger.info(f"Source snapped to {endpoints.source}, destination snapped to {endpoints.dest}")
+    else:
+        # Snap source and destination to the nearest nodes via the shared KD-tree
+        endpoints = None
+        node_index = graph_manager.get_node_index()
+        start_node = node_index.nearest(source)
+        end_node = node_index.nearest(destination)
+        logger.info(f"Start node: {start_node}, End node: {end_node}")
+    return routers, endpoints, start_node, end_node
+
+def render_search_job(graph_manager, searches: Dict[str, Tuple[List[int], List[List[float]]]], start_node: int,
+                      end_node: int, data_folder: str) -> Dict[str, str]:
+    """Background render job: draw the search images over the cached base map tiles."""
+    compiled = graph_manager.get_compiled()
+    start, end = compiled.node_index(start_node), compiled.node_index(end_node)
+    return render_search_images(graph_manager.get_base_tiles(), searches,
+                                (compiled.lat_list[start], compiled.lng_list[start]),
+                                (compiled.lat_list[end], compiled.lng_list[end]), data_folder)
+
+@router.post("/routes/stream")
+async def stream_route(route_request: StreamRouteRequest):
+    """
+    Route comparison as server-sent events: each algorithm's route is sent as
+    soon as it is found (cached ones first) instead of after all of them.
+
+    Events, all with JSON data:
+        start: algorithms and snapped endpoints
+        route: one algorithm's result, in the requested route format, with 'cached'
+        frontier: with frontier set, a batch of nodes settled by a running
+            search as compiled node index deltas ('deltas'; the running sum
+            over a search's frames gives the indices)
+        alternatives: the alternative routes, when requested
+        done / error: end of the stream
+    """
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        raise HTTPException(status_code=500, detail="Required map file is missing.")
+
+    logger.info(f"Received streamed route request: {route_request}")
+    source = (route_request.source_lat, route_request.source_lng)
+    destination = (route_request.dest_lat, route_request.dest_lng)
+    departure = route_request.departure_time or datetime.now(CITY_TIMEZONE)
+    queue = route_request.priority_queue or get_settings().PRIORITY_QUEUE
+
+    # Setup errors (unknown hierarchy, busy pool) are still plain HTTP errors
+    pool = get_routing_pool()
+    with pool.admit():
+        algorithms = await pool.run(requested_algorithms, graph_manager, route_request)
+        routers, endpoints, start_node, end_node = await pool.run(
+            prepare_route_request, graph_manager, route_request, algorithms, source, destination, departure, queue)
+        cache = await pool.run(get_route_cache)
+    keys, alternatives_key = route_cache_keys(graph_manager, cache, route_request, algorithms, endpoints,
+                                              start_node, end_node, departure, queue)
+    events = route_events(graph_manager, route_request, algorithms, routers, endpoints, start_node, end_node,
+                          cache, keys, alternatives_key)
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def route_events(graph_manager, route_request: StreamRouteRequest, algorithms: List[str],
+                       routers: Dict[str, tuple], endpoints, start_node: int, end_node: int, cache,
+                       keys: Dict[str, str], alternatives_key: str) -> AsyncIterator[bytes]:
+    """Server-sent events of a streamed route request (see stream_route)."""
+    pool = get_routing_pool()
+    compiled = graph_manager.get_compiled()
+    route_format, zooms = route_request.route_format, route_request.simplify_zooms
+    if endpoints is not None:
+        snapped = [list(endpoints.source.point), list(endpoints.dest.point)]
+    else:
+        snapped = [[compiled.lat_list[index], compiled.lng_list[index]]
+                   for index in (compiled.node_index(start_node), compiled.node_index(end_node))]
+    yield sse_event("start", {"algorithms": algorithms, "source": snapped[0], "destination": snapped[1],
+                              "graph_loaded_at": graph_manager.loaded_at})
+
+    async def route_event(result: Dict[str, Any], cached: bool) -> bytes:
+        fields = await pool.run(route_fields, result["route"], route_format, zooms)
+        return sse_event("route", dict(result, **fields, cached=cached))
+
+    try:
+        with pool.admit():
+            lookups = await pool.run(cache.get_many, [keys[name] for name in algorithms] +
+                                     ([alternatives_key] if route_request.alternatives else []))
+            cached = dict(zip(algorithms, lookups))
+            alternatives = lookups[-1] if route_request.alternatives else None
+            for name in algorithms:
+                if cached[name] is not None:
+                    yield await route_event(cached[name], True)
+            missing = [name for name in algorithms if cached[name] is None]
+
+            # Searches append their settled nodes to these lists from the
+            # worker threads; the loop below sends what is new on every tick
+            frontiers = {name: [] for name in missing if route_request.frontier and name in FRONTIER_ALGORITHMS}
+            sent = {name: 0 for name in frontiers}
+            last_node = {name: 0 for name in frontiers}
+            tasks = {asyncio.ensure_future(pool.run(run_algorithm, routers, name, endpoints, start_node, end_node,
+                                                    frontiers.get(name))): name
+                     for name in missing}
+            if route_request.alternatives and alternatives is None:
+                tasks[asyncio.ensure_future(pool.run(run_alternatives, endpoints, start_node, end_node,
+                                                     route_request.alternatives + 1))] = None
+            interval = get_settings().STREAM_FRONTIER_INTERVAL_S if frontiers else None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=interval, return_when=asyncio.FIRST_COMPLETED)
+                for name, visited in frontiers.items():
+                    end = len(visited)
+                    if end > sent[name]:
+                        batch = np.asarray(visited[sent[name]:end], dtype=np.int64)
+                        deltas = np.diff(batch, prepend=last_node[name])
+                        sent[name], last_node[name] = end, int(batch[-1])
+                        yield sse_event("frontier", {"algorithm": name, "deltas": deltas.tolist()})
+                for task in done:
+                    name = tasks[task]
+                    outcome = task.result()
+                    if name is None:
+                        # The fastest route is already in the results; keep only the other routes
+                        alternatives = outcome["routes"][1:]
+                        await pool.run(cache.put_many, {alternatives_key: alternatives})
+                        continue
+                    # Its last frame was sent above; the settled nodes are not kept
+                    frontiers.pop(name, None)
+                    result = filter_result(outcome)
+                    await pool.run(cache.put_many, {keys[name]: result})
+                    yield await route_event(result, False)
+
+            if route_request.alternatives:
+                yield sse_event("alternatives", {"alternatives": [
+                    dict(alternative, **await pool.run(route_fields, alternative["route"], route_format, zooms))
+                    for alternative in alternatives
+                ]})
+        logger.info(f"Route streamed: {len(missing)} of {len(algorithms)} algorithms computed, "
+                    f"the rest served from the cache")
+        yield sse_event("done", {"computed": len(missing), "cached": len(algorithms) - len(missing)})
+    except HTTPException as e:
+        yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+    except Exception as e:
+        logger.error(f"Error streaming route: {e}")
+        yield sse_event("error", {"status_code": 500, "detail": "Failed to calculate route"})
+
 @router.get("/logs")
 async def get_logs():
     """Endpoint to fetch server logs"""
@@ -145,6 +469,296 @@ async def health_check():
     logger.info("Health check endpoint was called.")
     return {"status": "healthy", "service": "ambulance-routing"}
 
+@router.post("/routes/snap", response_model=SnapResponse)
+async def snap_points(snap_request: SnapRequest):
+    """Batch-snap many coordinates to their nearest road graph nodes"""
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        raise HTTPException(status_code=500, detail="Required map file is missing.")
+    if not snap_request.points:
+        return {"nodes": [], "distances_m": []}
+    pool = get_routing_pool()
+    with pool.admit():
+        return await pool.run(snap_response, graph_manager, snap_request)
+
+def snap_response(graph_manager, snap_request: SnapRequest) -> Dict[str, Any]:
+    """Body of /routes/snap (runs on the routing pool)."""
+    points = np.array([[p.lat, p.lng] for p in snap_request.points])
+    node_ids, distances = graph_manager.get_node_index().snap_points(points)
+    return {"nodes": node_ids.tolist(), "distances_m": distances.round(2).tolist()}
+
+@router.post("/routes/matrix", response_model=MatrixResponse)
+async def travel_time_matrix(matrix_request: MatrixRequest):
+    """Travel times and distances from every source to every target in one call"""
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        raise HTTPException(status_code=500, detail="Required map file is missing.")
+    size = len(matrix_request.sources) * len(matrix_request.targets)
+    max_cells = get_settings().MATRIX_MAX_CELLS
+    if size > max_cells:
+        raise HTTPException(status_code=400, detail=f"Matrix of {size} cells exceeds the limit of {max_cells}")
+    pool = get_routing_pool()
+    with pool.admit():
+        return await pool.run(matrix_response, graph_manager, matrix_request)
+
+def matrix_response(graph_manager, matrix_request: MatrixRequest) -> Dict[str, Any]:
+    """Body of /routes/matrix (runs on the routing pool)."""
+    matrix_router = get_matrix_router()
+    if matrix_request.engine == "ch" and matrix_router.hierarchy is None:
+        raise HTTPException(status_code=400, detail="Contraction hierarchy has not been built for this graph")
+
+    sources = np.array([[p.lat, p.lng] for p in matrix_request.sources])
+    targets = np.array([[p.lat, p.lng] for p in matrix_request.targets])
+    start = time.perf_counter()
+    if matrix_request.snap_mode == "edge":
+        edge_index = graph_manager.get_edge_index()
+        result = matrix_router.matrix_from_snaps(edge_index, edge_index.snap_points(sources),
+                                                 edge_index.snap_points(targets), engine=matrix_request.engine)
+    else:
+        node_index = graph_manager.get_node_index()
+        start_nodes, _ = node_index.snap_points(sources)
+        end_nodes, _ = node_index.snap_points(targets)
+        result = matrix_router.matrix_from_nodes(start_nodes.tolist(), end_nodes.tolist(),
+                                                 engine=matrix_request.engine)
+    computation_time = time.perf_counter() - start
+
+    def compact(values: np.ndarray, decimals: int) -> List:
+        flat = values.ravel()
+        return [round(float(v), decimals) if np.isfinite(v) else None for v in flat]
+
+    return {
+        "shape": list(result["durations"].shape),
+        "durations_s": compact(result["durations"], 1),
+        "distances_m": compact(result["distances"], 1),
+        "algorithm": result["algorithm"],
+        "computation_time": computation_time,
+        "nodes": result["nodes"],
+    }
+
+@router.post("/routes/isochrones", response_model=IsochroneResponse)
+async def isochrones(isochrone_request: IsochroneRequest):
+    """Areas reachable within each time band from hospitals/depots, via bounded Dijkstra"""
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        raise HTTPException(status_code=500, detail="Required map file is missing.")
+    if any(minutes <= 0 for minutes in isochrone_request.bands_minutes):
+        raise HTTPException(status_code=400, detail="Band limits must be positive")
+    pool = get_routing_pool()
+    with pool.admit():
+        return await pool.run(isochrone_response, graph_manager, isochrone_request)
+
+def isochrone_response(graph_manager, isochrone_request: IsochroneRequest) -> Dict[str, Any]:
+    """Body of /routes/isochrones (runs on the routing pool)."""
+    dijkstra_router = get_dijkstra_router()
+    points = np.array([[p.lat, p.lng] for p in isochrone_request.sources])
+    bands = isochrone_request.bands_minutes
+    start = time.perf_counter()
+    if isochrone_request.snap_mode == "edge":
+        edge_index = graph_manager.get_edge_index()
+        snaps = edge_index.snap_points(points)
+        groups = [[snap] for snap in snaps] if isochrone_request.per_source else [snaps]
+        results = [dijkstra_router.find_reachable_from_snaps(edge_index, group, bands) for group in groups]
+    else:
+        node_ids, _ = graph_manager.get_node_index().snap_points(points)
+        node_ids = node_ids.tolist()
+        groups = [[node] for node in node_ids] if isochrone_request.per_source else [node_ids]
+        results = [dijkstra_router.find_reachable(group, bands) for group in groups]
+    computation_time = time.perf_counter() - start
+
+    if not isochrone_request.include_nodes:
+        for result in results:
+            for band in result["bands"]:
+                band["nodes"] = None
+    return {
+        "isochrones": [
+            {"source_index": index if isochrone_request.per_source else None, "bands": result["bands"]}
+            for index, result in enumerate(results)
+        ],
+        "computation_time": computation_time,
+        "nodes": sum(result["nodes"] for result in results),
+    }
+
+@router.post("/routes/hospitals/nearest", response_model=NearestHospitalsResponse)
+async def nearest_hospitals(hospital_request: NearestHospitalsRequest):
+    """Fastest hospitals from a point with their routes, looked up in the precomputed trees"""
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        raise HTTPException(status_code=500, detail="Required map file is missing.")
+    pool = get_routing_pool()
+    with pool.admit():
+        return await pool.run(nearest_hospitals_response, graph_manager, hospital_request)
+
+def nearest_hospitals_response(graph_manager, hospital_request: NearestHospitalsRequest) -> Dict[str, Any]:
+    """Body of /routes/hospitals/nearest (runs on the routing pool; the first call builds the trees)."""
+    hospital_router = get_hospital_router()
+    if hospital_router is None:
+        raise HTTPException(status_code=404, detail="No hospitals registered")
+
+    point = (hospital_request.lat, hospital_request.lng)
+    if hospital_request.snap_mode == "edge":
+        edge_index = graph_manager.get_edge_index()
+        result = hospital_router.find_nearest_from_snap(edge_index, edge_index.snap(point), hospital_request.k)
+    else:
+        start_node = graph_manager.get_node_index().nearest(point)
+        result = hospital_router.find_nearest(start_node, hospital_request.k)
+    return {"hospitals": result["hospitals"], "computation_time": result["total_time"]}
+
+def trip_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "trip_id": result["trip_id"],
+        "traffic_epoch": result["traffic_epoch"],
+        "distance": result["distance"],
+        "time_mins": result["time_mins"],
+        "route": result["route"],
+        "nodes": result["nodes"],
+        "repaired_edges": result["repaired_edges"],
+        "rerouted": result["rerouted"],
+        "computation_time": result["total_time"],
+    }
+
+def start_trip_response(graph_manager, trip_request: TripRequest) -> Dict[str, Any]:
+    """Body of POST /routes/trips (runs on the routing pool)."""
+    node_index = graph_manager.get_node_index()
+    start_node = node_index.nearest((trip_request.source_lat, trip_request.source_lng))
+    end_node = node_index.nearest((trip_request.dest_lat, trip_request.dest_lng))
+    return trip_response(get_trip_router().start_trip(start_node, end_node))
+
+def update_trip_response(graph_manager, trip_id: str, position: TripPositionRequest) -> Dict[str, Any]:
+    """Body of POST /routes/trips/{trip_id} (runs on the routing pool)."""
+    node = None
+    if position.lat is not None:
+        node = graph_manager.get_node_index().nearest((position.lat, position.lng))
+    return trip_response(get_trip_router().update_trip(trip_id, node))
+
+@router.post("/routes/trips", response_model=TripResponse)
+async def start_trip(trip_request: TripRequest):
+    """Start a live trip whose route is repaired incrementally as traffic changes"""
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        raise HTTPException(status_code=500, detail="Required map file is missing.")
+    pool = get_routing_pool()
+    with pool.admit():
+        return await pool.run(start_trip_response, graph_manager, trip_request)
+
+@router.post("/routes/trips/{trip_id}", response_model=TripResponse)
+async def update_trip(trip_id: str, position: TripPositionRequest):
+    """Report the vehicle position and get the route repaired for any traffic change since the last call"""
+    graph_manager = get_graph_manager()
+    if (position.lat is None) != (position.lng is None):
+        raise HTTPException(status_code=400, detail="Provide both lat and lng, or neither")
+    pool = get_routing_pool()
+    with pool.admit():
+        return await pool.run(update_trip_response, graph_manager, trip_id, position)
+
+@router.delete("/routes/trips/{trip_id}")
+async def end_trip(trip_id: str):
+    """Drop a live trip and its search state"""
+    pool = get_routing_pool()
+    with pool.admit():
+        await pool.run(lambda: get_trip_router().end_trip(trip_id))
+    return {"trip_id": trip_id, "status": "ended"}
+
+@router.post("/routes/closures", response_model=RoadClosureResponse)
+async def close_roads(closure_request: RoadClosureRequest):
+    """Close or reopen roads for live trips; each trip reroutes on its next update"""
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        raise HTTPException(status_code=500, detail="Required map file is missing.")
+    pool = get_routing_pool()
+    with pool.admit():
+        return await pool.run(close_roads_response, graph_manager, closure_request)
+
+def close_roads_response(graph_manager, closure_request: RoadClosureRequest) -> Dict[str, Any]:
+    """Body of /routes/closures (runs on the routing pool)."""
+    edge_index = graph_manager.get_edge_index()
+    snaps = edge_index.snap_points([(p.lat, p.lng) for p in closure_request.points])
+    closed = get_trip_router().close_roads([snap.edge for snap in snaps], reopen=closure_request.reopen)
+    return {"closed_edges": closed}
+
+@router.post("/routes/traffic", response_model=TrafficUpdateResponse)
+async def update_traffic(traffic_request: TrafficUpdateRequest):
+    """Apply a traffic snapshot (random or from the weekly profiles) to the CRP router and live trips; the other algorithms keep free-flow weights"""
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        raise HTTPException(status_code=500, detail="Required map file is missing.")
+    if traffic_request.mode == "random" and traffic_request.min_factor > traffic_request.max_factor:
+        raise HTTPException(status_code=400, detail="min_factor must not exceed max_factor")
+    pool = get_routing_pool()
+    with pool.admit():
+        return await pool.run(apply_traffic_request, graph_manager, traffic_request)
+
+def apply_traffic_request(graph_manager, traffic_request: TrafficUpdateRequest) -> Dict[str, Any]:
+    """Body of /routes/traffic (runs on the routing pool: customizing the CRP overlays takes a while)."""
+    compiled = graph_manager.get_compiled()
+    if traffic_request.mode == "profile":
+        profiles = graph_manager.get_traffic_profiles()
+        if profiles is None:
+            raise HTTPException(status_code=400, detail="No traffic profiles available")
+        departure = traffic_request.departure_time or datetime.now(CITY_TIMEZONE)
+        weights = profiles.weights_at(compiled.weights, week_seconds(departure))
+    else:
+        weights = random_traffic_weights(compiled.weights, traffic_request.min_factor,
+                                         traffic_request.max_factor, seed=traffic_request.seed)
+    start = time.perf_counter()
+    epoch = graph_manager.apply_traffic(weights)
+    customization_time = time.perf_counter() - start
+    logger.info(f"Traffic epoch {epoch} applied in {customization_time:.3f}s")
+    return {"traffic_epoch": epoch, "customization_time": customization_time}
+
+@router.get("/routes/graph")
+async def graph_status():
+    """Endpoint exposing load time and memory footprint of the shared road graph"""
+    return get_graph_manager().stats()
+
+@router.get("/routes/graph/nodes")
+async def graph_nodes():
+    """
+    Coordinates of every graph node in compiled index order, as a polyline
+    with 6 decimal digits: the table to map streamed frontier indices with.
+    """
+    graph_manager = get_graph_manager()
+    if not graph_manager.is_available:
+        raise HTTPException(status_code=500, detail="Required map file is missing.")
+    pool = get_routing_pool()
+    with pool.admit():
+        return CompactJSONResponse(await pool.run(node_table, graph_manager))
+
+def node_table(graph_manager) -> Dict[str, Any]:
+    """Body of /routes/graph/nodes (runs on the routing pool)."""
+    compiled = graph_manager.get_compiled()
+    return {"count": compiled.num_nodes, "graph_loaded_at": graph_manager.loaded_at,
+            "polyline": encode_polyline(np.column_stack((compiled.lat, compiled.lng)), 6)}
+
+@router.get("/routes/renders/{job_id}", response_model=RenderJobResponse)
+async def render_job_status(job_id: str):
+    """State of a background render job; finished images are fetched from /routes/renders/{job_id}/{name}"""
+    job = get_render_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired render job {job_id}")
+    return {**job, "images": {name: f"/routes/renders/{job_id}/{name}" for name in job["images"]}}
+
+@router.get("/routes/renders/{job_id}/{name}")
+async def render_job_image(job_id: str, name: str):
+    """PNG image of one search drawn by a finished render job"""
+    job = get_render_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired render job {job_id}")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Render job {job_id} is {job['status']}")
+    path = job["images"].get(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Render job {job_id} has no image {name}")
+    return FileResponse(path, media_type="image/png")
+
+@router.get("/routes/cache")
+async def cache_status():
+    """Endpoint exposing route cache hit/miss counters, memory use and coalesced requests"""
+    # Opening the cache compiles the graph and the SQLite tier on a cold process
+    pool = get_routing_pool()
+    with pool.admit():
+        stats = await pool.run(lambda: get_route_cache().stats())
+    return {**stats, "coalesced": route_flights.coalesced}
+
 # @router.post("/proximity")
 # async def handle_proximity(request: Request):
 #     data = await request.json()
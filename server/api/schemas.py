@@ -1,5 +1,11 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from datetime import datetime
+from pydantic import BaseModel, Field, conint
+from typing import List, Dict, Any, Literal, Optional, Union
+
+AlgorithmName = Literal["astar", "dijkstra", "bidirectional_astar", "bidirectional_dijkstra", "ch", "alt", "crp",
+                        "td_astar"]
+RouteFormat = Literal["coordinates", "polyline5", "polyline6"]
+
 
 class RouteRequest(BaseModel):
     """Request model for route calculation."""
@@ -7,6 +13,71 @@ class RouteRequest(BaseModel):
     source_lng: float = Field(..., description="Source location longitude")
     dest_lat: float = Field(..., description="Destination location latitude")
     dest_lng: float = Field(..., description="Destination location longitude")
+    snap_mode: Literal["edge", "node"] = Field(
+        "edge", description="Snap endpoints onto the nearest road edge (mid-edge start/end) or the nearest node"
+    )
+    algorithms: Optional[List[AlgorithmName]] = Field(
+        None, min_items=1,
+        description="Algorithms to run and compare, in response order. Defaults to A* and Dijkstra, "
+                    "plus Contraction Hierarchies when the graph has been preprocessed"
+    )
+    alternatives: int = Field(
+        0, ge=0, le=5,
+        description="Number of alternative routes to return besides the fastest one (plateau method)"
+    )
+    departure_time: Optional[datetime] = Field(
+        None, description="Departure time for time-dependent A* (td_astar); defaults to now. "
+                          "Times without a timezone are Bengaluru local time"
+    )
+    render_images: bool = Field(
+        False, description="Draw the A*/Dijkstra search images in a background job; poll /routes/renders/{job_id}. "
+                           "Searches served from the cache are drawn without their visited nodes"
+    )
+    priority_queue: Optional[Literal["heapq", "addressable", "radix"]] = Field(
+        None, description="Priority queue for the A*, ALT and Dijkstra searches: binary heap with duplicate "
+                          "entries, binary heap with decrease-key, or radix heap over deciseconds. "
+                          "Defaults to the server setting"
+    )
+    route_format: RouteFormat = Field(
+        "coordinates", description="How routes are returned: [lat, lng] lists in 'route', or an encoded polyline "
+                                   "with 5 or 6 decimal digits in 'polyline' (and 'route' left out)"
+    )
+    simplify_zooms: Optional[List[conint(ge=0, le=22)]] = Field(
+        None, max_items=8,
+        description="Map zoom levels to also return Douglas-Peucker simplified routes for, in 'simplified' "
+                    "keyed by zoom and in the route_format"
+    )
+
+
+class StreamRouteRequest(RouteRequest):
+    """
+    Request model for the streamed route comparison. render_images is not
+    used: the frontier frames take the place of the search images.
+    """
+    frontier: bool = Field(
+        False, description="Also stream the nodes each A*/Dijkstra-family search settles, in batched frames of "
+                           "compiled node index deltas (map them with /routes/graph/nodes)"
+    )
+
+
+class TrafficUpdateRequest(BaseModel):
+    """
+    Traffic snapshot applied to every edge: random factors (same as
+    add_random_traffic_to_subgraph), or the weekly profiles at a given time.
+    Only the CRP router and live trips follow it; the other algorithms search
+    free-flow weights (td_astar the weekly profiles).
+    """
+    mode: Literal["random", "profile"] = Field("random", description="Random multipliers or the traffic profiles")
+    departure_time: Optional[datetime] = Field(None, description="Time to evaluate the profiles at; defaults to now")
+    min_factor: float = Field(0.7, gt=0, description="Smallest travel time multiplier")
+    max_factor: float = Field(1.5, gt=0, description="Largest travel time multiplier")
+    seed: Optional[int] = Field(None, description="Random seed, for reproducible snapshots")
+
+
+class TrafficUpdateResponse(BaseModel):
+    """Traffic epoch now used by the CRP router and how long the re-customization took."""
+    traffic_epoch: int
+    customization_time: float
 
 
 class RouteCoordinate(BaseModel):
@@ -15,6 +86,133 @@ class RouteCoordinate(BaseModel):
     lng: float
 
 
+class SnapRequest(BaseModel):
+    """Request model for batch snapping coordinates to graph nodes."""
+    points: List[RouteCoordinate]
+
+
+class SnapResponse(BaseModel):
+    """Nearest node id and snapping distance (metres) for each requested point."""
+    nodes: List[int]
+    distances_m: List[float]
+
+
+class MatrixRequest(BaseModel):
+    """Request model for a many-to-many travel-time matrix (e.g. ambulances x incidents)."""
+    sources: List[RouteCoordinate] = Field(..., min_items=1)
+    targets: List[RouteCoordinate] = Field(..., min_items=1)
+    snap_mode: Literal["edge", "node"] = Field(
+        "edge", description="Snap points onto the nearest road edge (mid-edge start/end) or the nearest node"
+    )
+    engine: Literal["auto", "dijkstra", "ch"] = Field(
+        "auto", description="CH buckets when a contraction hierarchy is available, otherwise one Dijkstra per source"
+    )
+
+
+class MatrixResponse(BaseModel):
+    """Row-major (sources x targets) matrices; null marks an unreachable pair."""
+    shape: List[int]
+    durations_s: List[Optional[float]]
+    distances_m: List[Optional[float]]
+    algorithm: str
+    computation_time: float
+    nodes: int
+
+
+class IsochroneRequest(BaseModel):
+    """Request model for reachability bands around hospitals or depots."""
+    sources: List[RouteCoordinate] = Field(..., min_items=1)
+    bands_minutes: List[float] = Field([8, 12, 15], min_items=1, description="Band limits in minutes")
+    snap_mode: Literal["edge", "node"] = Field(
+        "edge", description="Snap sources onto the nearest road edge (mid-edge start) or the nearest node"
+    )
+    per_source: bool = Field(
+        False, description="One bounded search per source instead of one multi-source search for all of them"
+    )
+    include_nodes: bool = Field(True, description="Return the node ids of every band")
+
+
+class IsochroneBand(BaseModel):
+    """
+    Nodes newly reachable within this band, the cumulative count, and per
+    source the [lat, lng] hull of the area it reaches first within the band.
+    """
+    minutes: float
+    node_count: int
+    nodes: Optional[List[int]] = None
+    polygons: List[List[List[float]]]
+
+
+class Isochrone(BaseModel):
+    """Bands of one source (source_index) or of all sources together (source_index null)."""
+    source_index: Optional[int] = None
+    bands: List[IsochroneBand]
+
+
+class IsochroneResponse(BaseModel):
+    isochrones: List[Isochrone]
+    computation_time: float
+    nodes: int
+
+
+class NearestHospitalsRequest(BaseModel):
+    """Request model for the fastest hospitals from a point."""
+    lat: float
+    lng: float
+    k: int = Field(3, ge=1, le=20, description="Number of hospitals to return")
+    snap_mode: Literal["edge", "node"] = Field(
+        "edge", description="Snap the point onto the nearest road edge (mid-edge start) or the nearest node"
+    )
+
+
+class HospitalRoute(BaseModel):
+    hospital: Dict[str, Any]
+    eta_mins: float
+    distance: float
+    route: List[List[float]]
+
+
+class NearestHospitalsResponse(BaseModel):
+    hospitals: List[HospitalRoute]
+    computation_time: float
+
+
+class TripRequest(BaseModel):
+    """Request model for starting a live trip (endpoints snap to the nearest nodes)."""
+    source_lat: float
+    source_lng: float
+    dest_lat: float
+    dest_lng: float
+
+
+class TripPositionRequest(BaseModel):
+    """Current vehicle position; omit it to only pick up traffic updates and closures."""
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+
+
+class TripResponse(BaseModel):
+    trip_id: str
+    traffic_epoch: int
+    distance: float
+    time_mins: Optional[float]  # None when the destination is no longer reachable
+    route: List[List[float]]
+    nodes: int  # Nodes expanded by this (re)planning step
+    repaired_edges: int  # Changed edges that touched the trip's search state
+    rerouted: bool
+    computation_time: float
+
+
+class RoadClosureRequest(BaseModel):
+    """Close (or reopen) the road nearest to each point, in both directions, for live trips."""
+    points: List[RouteCoordinate] = Field(..., min_items=1)
+    reopen: bool = False
+
+
+class RoadClosureResponse(BaseModel):
+    closed_edges: int
+
+
 class AlgorithmComparison(BaseModel):
     """Model for algorithm performance comparison."""
     algorithm: str
@@ -36,10 +234,34 @@ class AlgorithmResult(BaseModel):
     time: float
     nodes: int
     distance: float
-    route: List[List[float]]  # or List[Tuple[float, float]]
+    route: Optional[List[List[float]]] = None  # or List[Tuple[float, float]]; None for encoded formats
+    eta_mins: Optional[float] = None  # Only for time-dependent algorithms
+    polyline: Optional[str] = None  # Only for the polyline route formats
+    simplified: Optional[Dict[str, Union[str, List[List[float]]]]] = None  # zoom -> simplified route
+
+
+class AlternativeRoute(BaseModel):
+    distance: float
+    time_mins: float
+    route: Optional[List[List[float]]] = None
+    polyline: Optional[str] = None
+    simplified: Optional[Dict[str, Union[str, List[List[float]]]]] = None
+    stretch: float  # Extra travel time relative to the fastest route, e.g. 0.12 = 12% longer
+    overlap: float  # Largest share of travel time in common with a route listed before it
+    method: str
 
 
 class RouteComparisonResponse(BaseModel):
     results: List[AlgorithmResult]
+    alternatives: Optional[List[AlternativeRoute]] = None
+    render_job_id: Optional[str] = None
+
+
+class RenderJobResponse(BaseModel):
+    """State of a background render job and the images it produced, by search name."""
+    job_id: str
+    status: Literal["pending", "running", "done", "failed"]
+    images: Dict[str, str]
+    error: Optional[str] = None
 
     
\ No newline at end of file
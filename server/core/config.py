@@ -1,5 +1,6 @@
 from pydantic import BaseSettings
 from functools import lru_cache
+from typing import List
 
 class Settings(BaseSettings):
     # API settings
@@ -11,11 +12,37 @@ class Settings(BaseSettings):
     USE_NODE_BASED_ROUTING: bool = True   # Enable node-based routing
     
     # Graph settings
-    GRAPH_FILE: str = "data/graph.pkl"
+    GRAPH_FILE: str = "data/graph_snapshot"  # binary snapshot directory (core/routing/snapshot.py)
+    GRAPHML_FILE: str = "data/simplified_bengaluru.graphml"
+    WRITE_GRAPH_SNAPSHOT: bool = True  # write a snapshot after parsing the GraphML
+    CH_FILE: str = "data/graph_ch"  # contraction hierarchy directory (core/routing/contraction.py)
+    BUILD_CONTRACTION_HIERARCHY: bool = False  # preprocess on first use when no hierarchy is on disk
+    LANDMARKS_FILE: str = "data/graph_landmarks"  # ALT landmark tables (core/routing/landmarks.py)
+    LANDMARK_COUNT: int = 16
+    LANDMARK_STRATEGY: str = "avoid"  # "avoid" or "farthest"
+    HOSPITALS_FILE: str = "data/hospitals.json"  # hospital registry, [{"id", "name", "lat", "lng"}, ...]
+    HOSPITAL_TREES_FILE: str = "data/hospital_trees"  # shortest-path trees (core/routing/hospital_trees.py)
+    TRAFFIC_DATASET_FILE: str = "data/Banglore_traffic_Dataset.csv"  # daily per-road Travel Time Index
+    TRAFFIC_PROFILES_FILE: str = "data/traffic_profiles"  # weekly profiles (core/routing/traffic_profiles.py)
+    MATRIX_MAX_CELLS: int = 10000  # largest sources x targets product accepted by /routes/matrix
+    CRP_CELL_SIZES: List[int] = [128, 2048, 32768]  # max nodes per cell on each overlay level (core/routing/crp.py)
+    TRIP_MAX_ACTIVE: int = 1000  # live trips with incremental search state (core/routing/trip_router.py)
+    TRIP_IDLE_TTL_S: float = 3600.0  # drop a live trip after this long without updates
+    ROUTING_WORKERS: int = 4  # worker threads for route requests (core/worker_pool.py)
+    ROUTING_QUEUE_DEPTH: int = 16  # route requests allowed to wait for a worker before answering 503
+    ROUTE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # memory budget of the route cache (core/route_cache.py)
+    ROUTE_CACHE_TTL_S: float = 900.0  # lifetime of a cached route
+    ROUTE_CACHE_DB: str = ""  # SQLite file for the shared on-disk tier, e.g. "data/route_cache.sqlite"; "" disables it
+    ROUTE_CACHE_SNAP_RESOLUTION_M: float = 10.0  # mid-edge snaps this close share cached routes
+    RENDER_WORKERS: int = 1  # threads drawing search images in the background (core/render_jobs.py)
+    RENDER_MAX_PENDING: int = 8  # render jobs queued or running before new ones are skipped
+    BASE_TILES_DIR: str = "data/base_tiles"  # base map tile cache (core/routing/base_tiles.py); "" keeps it in memory
+    STREAM_FRONTIER_INTERVAL_S: float = 0.05  # how often /routes/stream sends search frontier frames (api/routes.py)
     
     # Algorithm settings
     DIJKSTRA_WEIGHT_FACTOR: float = 1.0
     ASTAR_WEIGHT_FACTOR: float = 1.0
+    PRIORITY_QUEUE: str = "heapq"  # default queue of the A*/Dijkstra searches (core/routing/priority_queues.py)
     
     # Performance settings
     ENABLE_PERFORMANCE_LOGGING: bool = True
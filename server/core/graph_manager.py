@@ -0,0 +1,462 @@
+import os
+import sys
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+import numpy as np
+import networkx as nx
+
+from core.routing.graph_builder import load_graph_from_file
+from core.routing.compiled import CompiledGraph
+from core.routing.edge_index import EdgeSpatialIndex
+from core.routing.geometry_store import EdgeGeometryStore
+from core.routing.base_tiles import BaseMapTiles
+from core.routing.contraction import ContractionHierarchy, load_or_build_hierarchy
+from core.routing.landmarks import LandmarkTables, load_or_build_landmarks
+from core.routing.crp import CRPEngine
+from core.routing.hospital_trees import HospitalTrees, load_hospitals, load_or_build_trees
+from core.routing.traffic_profiles import TrafficProfiles, compiled_edge_highways, load_or_build_profiles
+from core.routing.snapshot import (
+    GraphSnapshot, build_snapshot, is_snapshot_fresh, load_snapshot, snapshot_to_graph
+)
+from core.config import get_settings
+from utils.geo_helpers import NodeSpatialIndex
+
+logger = logging.getLogger(__name__)
+
+FREE_FLOW = "free-flow"  # traffic fingerprint before any traffic snapshot is applied
+
+
+def estimate_graph_memory(G: nx.MultiDiGraph) -> int:
+    """
+    Estimate the memory footprint (in bytes) of a NetworkX graph.
+
+    Counts the adjacency containers plus the node and edge attribute dicts
+    and their values. Shared objects (interned strings, small ints) are
+    counted once per reference, so this is an upper-bound style estimate.
+    """
+    total = sys.getsizeof(G._node) + sys.getsizeof(G._adj)
+    for node, data in G.nodes(data=True):
+        total += sys.getsizeof(node) + sys.getsizeof(data)
+        total += sum(sys.getsizeof(value) for value in data.values())
+    for u, nbrs in G._adj.items():
+        total += sys.getsizeof(nbrs)
+        for v, keydict in nbrs.items():
+            total += sys.getsizeof(keydict)
+            for data in keydict.values():
+                total += sys.getsizeof(data)
+                total += sum(sys.getsizeof(value) for value in data.values())
+    return total
+
+
+class GraphManager:
+    """
+    Owns the road network graph for the lifetime of the process.
+
+    The graph is loaded once (normally from the FastAPI lifespan in main.py)
+    and the same instance is handed to every router, so route requests no
+    longer pay for parsing the GraphML file.
+
+    When a fresh binary snapshot (see core/routing/snapshot.py) exists it is
+    memory-mapped instead of parsing the GraphML; the NetworkX graph is then
+    materialised from the snapshot arrays on first use.
+    """
+
+    def __init__(self, graph_file: Optional[str] = None, snapshot_dir: Optional[str] = None):
+        settings = get_settings()
+        self.graph_file = graph_file or settings.GRAPHML_FILE
+        self.snapshot_dir = snapshot_dir or settings.GRAPH_FILE
+        self.write_snapshot = settings.WRITE_GRAPH_SNAPSHOT
+        self.ch_dir = settings.CH_FILE
+        self.build_hierarchy = settings.BUILD_CONTRACTION_HIERARCHY
+        self.landmark_dir = settings.LANDMARKS_FILE
+        self.landmark_count = settings.LANDMARK_COUNT
+        self.landmark_strategy = settings.LANDMARK_STRATEGY
+        self.crp_cell_sizes = settings.CRP_CELL_SIZES
+        self.hospitals_file = settings.HOSPITALS_FILE
+        self.hospital_tree_dir = settings.HOSPITAL_TREES_FILE
+        self.traffic_dataset_file = settings.TRAFFIC_DATASET_FILE
+        self.traffic_profile_dir = settings.TRAFFIC_PROFILES_FILE
+        self.base_tile_dir = settings.BASE_TILES_DIR
+        self._graph: Optional[nx.MultiDiGraph] = None
+        self._snapshot: Optional[GraphSnapshot] = None
+        self._compiled: Optional[CompiledGraph] = None
+        self._node_index: Optional[NodeSpatialIndex] = None
+        self._geometry: Optional[EdgeGeometryStore] = None
+        self._edge_index: Optional[EdgeSpatialIndex] = None
+        self._base_tiles: Optional[BaseMapTiles] = None
+        self._hierarchy: Optional[ContractionHierarchy] = None
+        self._hierarchy_checked = False
+        self._landmarks: Optional[LandmarkTables] = None
+        self._crp: Optional[CRPEngine] = None
+        self._hospital_trees: Optional[HospitalTrees] = None
+        self._hospital_trees_checked = False
+        self._traffic_profiles: Optional[TrafficProfiles] = None
+        self._traffic_profiles_checked = False
+        self._traffic_weights: Optional[np.ndarray] = None  # None = free-flow compiled weights
+        self.traffic_epoch = 0
+        self.traffic_fingerprint = FREE_FLOW  # same traffic snapshot -> same fingerprint, in any process
+        self.traffic_updated_at: Optional[float] = None  # unix timestamp
+        self._lock = threading.RLock()
+        self.source: Optional[str] = None  # "snapshot" or "graphml"
+        self.load_time: Optional[float] = None  # seconds
+        self.materialize_time: Optional[float] = None  # seconds, snapshot -> NetworkX
+        self.memory_bytes: Optional[int] = None
+        self.loaded_at: Optional[float] = None  # unix timestamp
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._graph is not None or self._snapshot is not None
+
+    @property
+    def is_available(self) -> bool:
+        """Whether a graph is loaded or can be loaded from disk."""
+        return (self.is_loaded or os.path.exists(self.graph_file)
+                or is_snapshot_fresh(self.snapshot_dir, self.graph_file))
+
+    def load(self, graph_file: Optional[str] = None, force: bool = False) -> None:
+        """
+        Load the graph if it is not loaded yet, preferring the binary snapshot.
+
+        Args:
+            graph_file: Optional path overriding the configured GraphML file
+            force: Reload even if a graph is already loaded
+        """
+        with self._lock:
+            if self.is_loaded and not force and graph_file in (None, self.graph_file):
+                return
+
+            if graph_file:
+                self.graph_file = graph_file
+            self._graph = None
+            self._snapshot = None
+            self._compiled = None
+            self._node_index = None
+            self._geometry = None
+            self._edge_index = None
+            self._base_tiles = None
+            self._hierarchy = None
+            self._hierarchy_checked = False
+            self._landmarks = None
+            self._crp = None
+            self._hospital_trees = None
+            self._hospital_trees_checked = False
+            self._traffic_profiles = None
+            self._traffic_profiles_checked = False
+            self._traffic_weights = None
+            self.traffic_epoch = 0
+            self.traffic_fingerprint = FREE_FLOW
+            self.traffic_updated_at = None
+            self.materialize_time = None
+
+            start = time.perf_counter()
+            if is_snapshot_fresh(self.snapshot_dir, self.graph_file):
+                self._snapshot = load_snapshot(self.snapshot_dir)
+                self.source = "snapshot"
+                self.load_time = time.perf_counter() - start
+                self.memory_bytes = self._snapshot.nbytes()
+                logger.info(
+                    f"Graph manager mapped snapshot {self.snapshot_dir} in {self.load_time * 1000:.1f}ms "
+                    f"({self._snapshot.num_nodes} nodes, {self._snapshot.num_edges} edges)"
+                )
+            else:
+                if not os.path.exists(self.graph_file):
+                    raise FileNotFoundError(f"Graph file not found: {self.graph_file}")
+                graph = load_graph_from_file(self.graph_file)
+                self.source = "graphml"
+                self.load_time = time.perf_counter() - start
+                self.memory_bytes = estimate_graph_memory(graph)
+                self._graph = graph
+                logger.info(
+                    f"Graph manager loaded {self.graph_file} in {self.load_time:.2f}s "
+                    f"({len(graph.nodes)} nodes, {len(graph.edges)} edges, ~{self.memory_bytes / 1e6:.1f} MB)"
+                )
+                if self.write_snapshot and self._write_snapshot(graph):
+                    # Compile from the snapshot just written, like every later
+                    # process will: its float32 weights give the same routes and
+                    # graph signature, so saved preprocessing and caches carry over
+                    self._snapshot = load_snapshot(self.snapshot_dir)
+            self.loaded_at = time.time()
+
+        # Routers built on a previous graph must not outlive it
+        from core.router import reset_routers
+        reset_routers()
+
+    def _write_snapshot(self, graph: nx.MultiDiGraph) -> bool:
+        """Persist a snapshot so the next start can skip GraphML parsing. Returns whether it was written."""
+        try:
+            build_snapshot(graph, self.snapshot_dir, source_file=self.graph_file)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not write graph snapshot to {self.snapshot_dir}: {e}")
+            return False
+
+    def get_snapshot(self) -> Optional[GraphSnapshot]:
+        """Return the memory-mapped snapshot, if the graph was loaded from one."""
+        if not self.is_loaded:
+            self.load()
+        return self._snapshot
+
+    def get_graph(self) -> nx.MultiDiGraph:
+        """Return the shared graph, loading (or materialising) it on first use."""
+        if self._graph is not None:
+            return self._graph
+        with self._lock:
+            if not self.is_loaded:
+                self.load()
+            if self._graph is None:
+                start = time.perf_counter()
+                self._graph = snapshot_to_graph(self._snapshot)
+                self.materialize_time = time.perf_counter() - start
+                logger.info(f"Materialised NetworkX graph from snapshot in {self.materialize_time:.2f}s")
+        return self._graph
+
+    def get_compiled(self) -> CompiledGraph:
+        """
+        Return the array-backed CSR view of the shared graph, building it once.
+        Built straight from the snapshot arrays when available.
+        """
+        if self._compiled is not None:
+            return self._compiled
+        with self._lock:
+            if self._compiled is None:
+                snapshot = self.get_snapshot()
+                if snapshot is not None:
+                    self._compiled = CompiledGraph.from_snapshot(snapshot)
+                else:
+                    self._compiled = CompiledGraph.from_graph(self.get_graph())
+        return self._compiled
+
+    def get_node_index(self) -> NodeSpatialIndex:
+        """Return the KD-tree over node coordinates, building it once per graph."""
+        if self._node_index is not None:
+            return self._node_index
+        with self._lock:
+            if self._node_index is None:
+                start = time.perf_counter()
+                self._node_index = NodeSpatialIndex.from_compiled(self.get_compiled())
+                logger.info(f"Built node spatial index in {time.perf_counter() - start:.3f}s")
+        return self._node_index
+
+    def get_geometry_store(self) -> EdgeGeometryStore:
+        """
+        Return the flattened geometry of the compiled edges (route densification,
+        snapping and base tiles). Built straight from the snapshot arrays when
+        available; otherwise from the GraphML graph, whose Shapely geometries are
+        dropped afterwards.
+        """
+        if self._geometry is not None:
+            return self._geometry
+        with self._lock:
+            if self._geometry is None:
+                compiled = self.get_compiled()
+                snapshot = self.get_snapshot()
+                if snapshot is not None:
+                    self._geometry = EdgeGeometryStore.build(compiled, snapshot=snapshot)
+                else:
+                    graph = self.get_graph()
+                    self._geometry = EdgeGeometryStore.build(compiled, graph=graph)
+                    for _, _, data in graph.edges(data=True):
+                        data.pop('geometry', None)
+        return self._geometry
+
+    def get_edge_index(self) -> EdgeSpatialIndex:
+        """Return the edge-geometry spatial index used for mid-edge snapping."""
+        if self._edge_index is not None:
+            return self._edge_index
+        with self._lock:
+            if self._edge_index is None:
+                self._edge_index = EdgeSpatialIndex(self.get_compiled(), self.get_geometry_store())
+        return self._edge_index
+
+    def get_base_tiles(self) -> BaseMapTiles:
+        """Return the base map tiles search images are drawn on (core/routing/base_tiles.py)."""
+        if self._base_tiles is not None:
+            return self._base_tiles
+        with self._lock:
+            if self._base_tiles is None:
+                compiled = self.get_compiled()
+                # Tiles of another graph are never reused
+                tile_dir = os.path.join(self.base_tile_dir, compiled.signature()[:16]) if self.base_tile_dir else None
+                self._base_tiles = BaseMapTiles(compiled, self.get_geometry_store(), tile_dir=tile_dir)
+        return self._base_tiles
+
+    def get_contraction_hierarchy(self) -> Optional[ContractionHierarchy]:
+        """
+        Return the contraction hierarchy of the compiled graph, or None when it
+        has not been preprocessed (see core/routing/contraction.py). With
+        BUILD_CONTRACTION_HIERARCHY set, a missing hierarchy is built on first use.
+        """
+        if self._hierarchy_checked:
+            return self._hierarchy
+        with self._lock:
+            if not self._hierarchy_checked:
+                self._hierarchy = load_or_build_hierarchy(self.ch_dir, self.get_compiled(),
+                                                          build=self.build_hierarchy)
+                self._hierarchy_checked = True
+                if self._hierarchy is None:
+                    logger.info(f"No contraction hierarchy for the current graph in {self.ch_dir}")
+        return self._hierarchy
+
+    def get_landmarks(self) -> LandmarkTables:
+        """
+        Return the ALT landmark tables of the compiled graph. They are cheap to
+        compute, so missing or stale tables are rebuilt and saved on first use.
+        """
+        if self._landmarks is not None:
+            return self._landmarks
+        with self._lock:
+            if self._landmarks is None:
+                self._landmarks = load_or_build_landmarks(
+                    self.landmark_dir, self.get_compiled(),
+                    count=self.landmark_count, strategy=self.landmark_strategy,
+                )
+        return self._landmarks
+
+    def get_crp(self) -> CRPEngine:
+        """
+        Return the multilevel overlay engine (core/routing/crp.py). The
+        partition is built once per graph and customized with the current
+        traffic weights.
+        """
+        if self._crp is not None:
+            return self._crp
+        with self._lock:
+            if self._crp is None:
+                crp = CRPEngine(self.get_compiled(), self.crp_cell_sizes)
+                crp.customize(self._traffic_weights, self.traffic_epoch)
+                self._crp = crp
+        return self._crp
+
+    def get_hospital_trees(self) -> Optional[HospitalTrees]:
+        """
+        Return the shortest-path trees towards the registered hospitals, or None
+        when no hospitals are registered. Missing or stale trees are rebuilt
+        and saved on first use (see core/routing/hospital_trees.py).
+        """
+        if self._hospital_trees_checked:
+            return self._hospital_trees
+        with self._lock:
+            if not self._hospital_trees_checked:
+                hospitals = load_hospitals(self.hospitals_file)
+                if hospitals:
+                    points = np.array([[h["lat"], h["lng"]] for h in hospitals])
+                    positions, _ = self.get_node_index().nearest_positions(points)
+                    self._hospital_trees = load_or_build_trees(self.hospital_tree_dir, self.get_compiled(),
+                                                               hospitals, positions.tolist())
+                else:
+                    logger.info(f"No hospitals registered in {self.hospitals_file}")
+                self._hospital_trees_checked = True
+        return self._hospital_trees
+
+    def get_traffic_profiles(self) -> Optional[TrafficProfiles]:
+        """
+        Return the weekly travel-time profiles built from the traffic dataset,
+        or None when the dataset is missing. Missing or stale profiles are
+        rebuilt and saved on first use (see core/routing/traffic_profiles.py).
+        """
+        if self._traffic_profiles_checked:
+            return self._traffic_profiles
+        with self._lock:
+            if not self._traffic_profiles_checked:
+                if os.path.isfile(self.traffic_dataset_file):
+                    compiled = self.get_compiled()
+                    snapshot = self.get_snapshot()
+
+                    def highways():
+                        return compiled_edge_highways(
+                            compiled, snapshot=snapshot, graph=None if snapshot is not None else self.get_graph()
+                        )
+
+                    self._traffic_profiles = load_or_build_profiles(self.traffic_profile_dir, compiled,
+                                                                    highways, self.traffic_dataset_file)
+                else:
+                    logger.info(f"No traffic dataset at {self.traffic_dataset_file}")
+                self._traffic_profiles_checked = True
+        return self._traffic_profiles
+
+    def apply_traffic(self, weights: np.ndarray) -> int:
+        """
+        Install a new traffic snapshot and re-customize the overlay engine.
+
+        Args:
+            weights: Travel time (seconds) of every compiled edge, e.g. from
+                CompiledGraph.weights_from_graph or random_traffic_weights
+
+        Returns:
+            The new traffic epoch
+        """
+        compiled = self.get_compiled()
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (compiled.num_edges,):
+            raise ValueError(f"Expected {compiled.num_edges} edge weights, got {weights.shape}")
+        if np.any(weights < 0) or not np.all(np.isfinite(weights)):
+            raise ValueError("Traffic weights must be finite and non-negative")
+        crp = self.get_crp()
+        fingerprint = hashlib.sha1(weights.tobytes()).hexdigest()[:16]
+        with self._lock:
+            epoch = self.traffic_epoch + 1
+            # Customize before publishing the epoch, so queries never see an
+            # epoch whose metric is not in place yet
+            crp.customize(weights, epoch)
+            self._traffic_weights = weights
+            self.traffic_epoch = epoch
+            self.traffic_fingerprint = fingerprint
+            self.traffic_updated_at = time.time()
+        return epoch
+
+    def get_traffic_weights(self) -> np.ndarray:
+        """Travel time of every compiled edge under the current traffic snapshot."""
+        if self._traffic_weights is not None:
+            return self._traffic_weights
+        return self.get_compiled().weights
+
+    def stats(self) -> Dict[str, Any]:
+        """Load time and memory footprint of the shared graph."""
+        if not self.is_loaded:
+            return {"loaded": False, "graph_file": self.graph_file, "snapshot_dir": self.snapshot_dir}
+        if self._snapshot is not None:
+            nodes, edges = self._snapshot.num_nodes, self._snapshot.num_edges
+        else:
+            nodes, edges = len(self._graph.nodes), len(self._graph.edges)
+        return {
+            "loaded": True,
+            "source": self.source,
+            "graph_file": self.graph_file,
+            "snapshot_dir": self.snapshot_dir,
+            "nodes": nodes,
+            "edges": edges,
+            "load_time_s": round(self.load_time, 4),
+            "materialize_time_s": round(self.materialize_time, 4) if self.materialize_time is not None else None,
+            "memory_mb": round(self.memory_bytes / 1e6, 2),
+            "loaded_at": self.loaded_at,
+            "geometry_mb": round(self._geometry.nbytes / 1e6, 2) if self._geometry is not None else None,
+            "contraction_hierarchy": self._hierarchy is not None,
+            "landmarks": self._landmarks.num_landmarks if self._landmarks is not None else None,
+            "hospital_trees": self._hospital_trees.num_hospitals if self._hospital_trees is not None else None,
+            "traffic_profiles": self._traffic_profiles.num_profiles if self._traffic_profiles is not None else None,
+            "crp_levels": self._crp.num_levels if self._crp is not None else None,
+            "traffic_epoch": self.traffic_epoch,
+            "traffic_updated_at": self.traffic_updated_at,
+        }
+
+
+_graph_manager: Optional[GraphManager] = None
+
+
+def get_graph_manager() -> GraphManager:
+    """
+    Get or create the process-wide GraphManager.
+
+    Returns:
+        GraphManager: The shared graph manager
+    """
+    global _graph_manager
+
+    if _graph_manager is None:
+        _graph_manager = GraphManager()
+
+    return _graph_manager
@@ -0,0 +1,103 @@
+import uuid
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RenderJobs:
+    """
+    Background jobs drawing search images, off the route request path.
+
+    A job runs fn(*args, **kwargs), which returns {image name: file path}.
+    Jobs run on their own small executor (never on the routing pool) and the
+    most recent max_jobs are kept for clients to poll.
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 8, max_jobs: int = 256):
+        """
+        Args:
+            workers: Threads rendering images
+            max_pending: Jobs allowed to wait or run; further submissions are refused
+            max_jobs: Finished jobs remembered for polling
+        """
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+        logger.info(f"RenderJobs initialized ({workers} workers, {max_pending} pending jobs).")
+
+    def submit(self, fn: Callable[..., Dict[str, str]], *args, **kwargs) -> Optional[str]:
+        """Queue a render job. Returns its id, or None if too many jobs are pending."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                logger.warning(f"{self._pending} render jobs pending: skipping render")
+                return None
+            self._pending += 1
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {"job_id": job_id, "status": "pending", "images": {}, "error": None,
+                                  "submitted_at": time.time(), "finished_at": None}
+            while len(self._jobs) > self.max_jobs:
+                oldest = next(iter(self._jobs.values()))
+                if oldest["status"] in ("pending", "running"):
+                    break
+                del self._jobs[oldest["job_id"]]
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable[..., Dict[str, str]], args: tuple, kwargs: dict) -> None:
+        job = self._jobs[job_id]
+        job["status"] = "running"
+        try:
+            job["images"] = fn(*args, **kwargs)
+            job["status"] = "done"
+        except Exception as e:
+            logger.error(f"Render job {job_id} failed: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+_render_jobs: Optional[RenderJobs] = None
+
+
+def get_render_jobs() -> RenderJobs:
+    """
+    Get or create the process-wide render job queue.
+
+    Returns:
+        RenderJobs: The shared job queue, sized from the RENDER_* settings
+    """
+    global _render_jobs
+
+    if _render_jobs is None:
+        settings = get_settings()
+        _render_jobs = RenderJobs(workers=settings.RENDER_WORKERS, max_pending=settings.RENDER_MAX_PENDING)
+
+    return _render_jobs
+
+
+def shutdown_render_jobs() -> None:
+    """Stop the render workers (application shutdown)."""
+    global _render_jobs
+
+    if _render_jobs is not None:
+        _render_jobs.shutdown()
+        _render_jobs = None
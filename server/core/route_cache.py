@@ -0,0 +1,197 @@
+"""
+Route result cache.
+
+Entries are keyed on what a search actually depends on: the snapped
+endpoints (node ids, or edge position plus offset bucket for mid-edge
+snaps), the algorithm and its options, the traffic snapshot (for the
+algorithms that follow it) and the graph fingerprint
+(GraphManager.traffic_fingerprint, CompiledGraph.signature). GPS
+jitter that snaps to the same place therefore hits, and a traffic update or
+graph rebuild can never serve a stale route.
+
+The memory tier is an LRU bounded by a byte budget (the size of each
+entry's JSON encoding) with a TTL. The optional SQLite tier keeps entries
+across restarts and shares them between server processes; memory misses
+fall through to it and disk hits are promoted back into memory.
+"""
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import get_settings
+from core.graph_manager import get_graph_manager
+from core.routing.compiled import CompiledGraph
+from core.routing.edge_index import EdgeSnap
+
+logger = logging.getLogger(__name__)
+
+PURGE_EVERY = 256  # Disk writes between sweeps of expired rows
+
+
+def edge_snap_key(compiled: CompiledGraph, snap: EdgeSnap, resolution_m: float = None) -> str:
+    """Cache key component of a mid-edge snap: the edge and the position along it in resolution_m buckets."""
+    if resolution_m is None:
+        resolution_m = get_settings().ROUTE_CACHE_SNAP_RESOLUTION_M
+    offset = float(compiled.lengths[snap.edge]) * snap.fraction
+    return f"e{snap.edge}@{int(offset // resolution_m)}"
+
+
+class RouteCache:
+    """
+    Two-tier LRU/TTL cache of JSON-serialisable route results.
+
+    Args:
+        namespace: Graph fingerprint; entries of other graphs are never returned
+        max_bytes: Memory budget, as the total size of the cached JSON encodings
+        ttl: Seconds an entry stays valid in either tier
+        db_path: SQLite file for the disk tier; None or "" keeps the cache in memory only
+    """
+
+    def __init__(self, namespace: str, max_bytes: int = 64 * 1024 * 1024, ttl: float = 900.0,
+                 db_path: Optional[str] = None):
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()  # key -> (expires, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_writes = 0
+        if db_path:
+            self._open_db(db_path)
+        logger.info(f"RouteCache initialized ({max_bytes / 1e6:.0f} MB, TTL {ttl:.0f}s, "
+                    f"disk tier {db_path or 'disabled'}).")
+
+    def _open_db(self, db_path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        db = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")  # Readers in other processes do not block writers
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, expires REAL NOT NULL, value BLOB NOT NULL)")
+        db.execute("DELETE FROM routes WHERE expires < ?", (time.time(),))
+        self._db = db
+
+    def make_key(self, start: Any, end: Any, algorithm: str, traffic: str) -> str:
+        """Cache key of one algorithm's result between two snapped endpoints under a traffic snapshot."""
+        return f"{self.namespace}|{start}|{end}|{algorithm}|{traffic}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None (counted as a miss)."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                self._drop(key)
+            if self._db is not None:
+                row = self._db.execute("SELECT expires, value FROM routes WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[0] > now:
+                    value = json.loads(row[1])
+                    self._store(key, row[0], len(row[1]), value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        return [self.get(key) for key in keys]
+
+    def put_many(self, items: Dict[str, Any]) -> None:
+        for key, value in items.items():
+            self.put(key, value)
+
+    def put(self, key: str, value: Any) -> None:
+        """Cache a JSON-serialisable value under key in both tiers."""
+        encoded = json.dumps(value, separators=(",", ":")).encode()
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._store(key, expires, len(encoded), value)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO routes (key, expires, value) VALUES (?, ?, ?)",
+                                 (key, expires, encoded))
+                self._db_writes += 1
+                if self._db_writes % PURGE_EVERY == 0:
+                    self._db.execute("DELETE FROM routes WHERE expires < ?", (time.time(),))
+
+    def _store(self, key: str, expires: float, size: int, value: Any) -> None:
+        """Insert into the memory tier and evict down to the byte budget. Caller holds the lock."""
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (expires, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM routes")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "entries": len(self._entries),
+            "memory_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "disk_tier": self._db is not None,
+        }
+
+
+_route_cache: Optional[RouteCache] = None
+_route_cache_graph = None  # Compiled graph the cache namespace was derived from
+
+
+def get_route_cache() -> RouteCache:
+    """
+    Get or create the process-wide route cache for the current graph. A
+    reloaded graph gets a fresh cache under its own fingerprint.
+
+    Returns:
+        RouteCache: The shared cache, configured from the ROUTE_CACHE_* settings
+    """
+    global _route_cache, _route_cache_graph
+
+    compiled = get_graph_manager().get_compiled()
+    if _route_cache is None or _route_cache_graph is not compiled:
+        if _route_cache is not None:
+            _route_cache.close()
+        settings = get_settings()
+        _route_cache = RouteCache(compiled.signature(), max_bytes=settings.ROUTE_CACHE_MAX_BYTES,
+                                  ttl=settings.ROUTE_CACHE_TTL_S, db_path=settings.ROUTE_CACHE_DB)
+        _route_cache_graph = compiled
+
+    return _route_cache
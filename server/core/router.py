@@ -1,9 +1,14 @@
 import logging
 import functools
-from typing import Dict, Any, Tuple, List
+from typing import Dict, Any, Tuple, List, Optional
 
 from core.routing.a_star import AmbulanceRouter
 from core.routing.dijkstra import DijkstraRouter
+from core.routing.ch_router import ContractionHierarchyRouter
+from core.routing.crp_router import CustomizableRouter
+from core.routing.matrix import MatrixRouter
+from core.routing.hospital_router import HospitalRouter
+from core.routing.trip_router import TripRouter
 from core.graph_manager import get_graph_manager
 from core.config import get_settings
 
@@ -12,6 +17,11 @@ logger = logging.getLogger(__name__)
 # Cache router instances to avoid recreating them for each request
 _ambulance_router = None
 _dijkstra_router = None
+_ch_router = None
+_crp_router = None
+_matrix_router = None
+_hospital_router = None
+_trip_router = None
 
 def get_ambulance_router() -> AmbulanceRouter:
     """
@@ -24,13 +34,15 @@ def get_ambulance_router() -> AmbulanceRouter:
     global _ambulance_router
     
     if _ambulance_router is None:
-        # Get the graph from the graph manager
         graph_manager = get_graph_manager()
-        graph = graph_manager.get_graph()
-        
-        # Create a new router instance
-        _ambulance_router = AmbulanceRouter(graph)
-        logger.info(f"AmbulanceRouter initialized with graph containing {len(graph.nodes)} nodes and {len(graph.edges)} edges.")
+
+        # Create a new router instance sharing the compiled CSR view; the
+        # NetworkX graph (legacy search only), landmark tables and traffic
+        # profiles are only fetched when a query needs them
+        _ambulance_router = AmbulanceRouter(graph_manager.get_graph, compiled=graph_manager.get_compiled(),
+                                            landmarks=graph_manager.get_landmarks,
+                                            profiles=graph_manager.get_traffic_profiles,
+                                            geometry=graph_manager.get_geometry_store)
     
     return _ambulance_router
 
@@ -45,22 +57,118 @@ def get_dijkstra_router() -> DijkstraRouter:
     global _dijkstra_router
     
     if _dijkstra_router is None:
-        # Get the graph from the graph manager
         graph_manager = get_graph_manager()
-        graph = graph_manager.get_graph()
-        
-        # Create a new router instance
-        _dijkstra_router = DijkstraRouter(graph)
-        logger.info(f"DijkstraRouter initialized with graph containing {len(graph.nodes)} nodes and {len(graph.edges)} edges.")
+
+        # Create a new router instance sharing the compiled CSR view; the
+        # NetworkX graph is only materialized for the legacy search
+        _dijkstra_router = DijkstraRouter(graph_manager.get_graph, compiled=graph_manager.get_compiled(),
+                                          geometry=graph_manager.get_geometry_store)
     
     return _dijkstra_router
 
+def get_ch_router() -> Optional[ContractionHierarchyRouter]:
+    """
+    Get or create the Contraction Hierarchies router.
+
+    Returns:
+        ContractionHierarchyRouter, or None if no hierarchy has been preprocessed
+        for the current graph
+    """
+    global _ch_router
+
+    if _ch_router is None:
+        graph_manager = get_graph_manager()
+        hierarchy = graph_manager.get_contraction_hierarchy()
+        if hierarchy is None:
+            return None
+        _ch_router = ContractionHierarchyRouter(graph_manager.get_geometry_store(), graph_manager.get_compiled(),
+                                               hierarchy)
+
+    return _ch_router
+
+def get_crp_router() -> CustomizableRouter:
+    """
+    Get or create the CRP router. It follows traffic updates on its own:
+    GraphManager.apply_traffic re-customizes the engine it shares.
+
+    Returns:
+        CustomizableRouter: A router instance on the multilevel overlays
+    """
+    global _crp_router
+
+    if _crp_router is None:
+        graph_manager = get_graph_manager()
+        _crp_router = CustomizableRouter(graph_manager.get_geometry_store(), graph_manager.get_compiled(),
+                                         graph_manager.get_crp())
+
+    return _crp_router
+
+def get_matrix_router() -> MatrixRouter:
+    """
+    Get or create the travel-time matrix router. It uses the contraction
+    hierarchy when one has been preprocessed for the current graph.
+
+    Returns:
+        MatrixRouter: A router instance for many-to-many queries
+    """
+    global _matrix_router
+
+    if _matrix_router is None:
+        graph_manager = get_graph_manager()
+        _matrix_router = MatrixRouter(graph_manager.get_compiled(), graph_manager.get_contraction_hierarchy())
+
+    return _matrix_router
+
+def get_hospital_router() -> Optional[HospitalRouter]:
+    """
+    Get or create the nearest-hospital router.
+
+    Returns:
+        HospitalRouter, or None if no hospitals are registered
+    """
+    global _hospital_router
+
+    if _hospital_router is None:
+        graph_manager = get_graph_manager()
+        trees = graph_manager.get_hospital_trees()
+        if trees is None:
+            return None
+        _hospital_router = HospitalRouter(graph_manager.get_geometry_store(), graph_manager.get_compiled(), trees)
+
+    return _hospital_router
+
+def get_trip_router() -> TripRouter:
+    """
+    Get or create the live trip router. Trips follow traffic updates through
+    the graph manager's current traffic epoch and weights.
+
+    Returns:
+        TripRouter: A router keeping incremental search state per active trip
+    """
+    global _trip_router
+
+    if _trip_router is None:
+        graph_manager = get_graph_manager()
+        settings = get_settings()
+        _trip_router = TripRouter(
+            graph_manager.get_geometry_store(), graph_manager.get_compiled(),
+            traffic=lambda: (graph_manager.traffic_epoch, graph_manager.get_traffic_weights()),
+            max_trips=settings.TRIP_MAX_ACTIVE, idle_ttl=settings.TRIP_IDLE_TTL_S,
+        )
+
+    return _trip_router
+
 def reset_routers():
     """
     Reset the router instances.
     This is useful when the graph is updated and the routers need to be recreated.
     """
-    global _ambulance_router, _dijkstra_router
+    global _ambulance_router, _dijkstra_router, _ch_router, _crp_router, _matrix_router, _hospital_router, _trip_router
     _ambulance_router = None
     _dijkstra_router = None
+    _ch_router = None
+    _crp_router = None
+    _matrix_router = None
+    _hospital_router = None
+    _trip_router = None
     logger.info("Router instances have been reset")
@@ -3,10 +3,17 @@ import heapq
 import numpy as np
 import logging
 import time as time_module
-from typing import List, Dict, Any, Tuple
+from datetime import datetime
+from typing import List, Dict, Any, Tuple, Callable, Optional, Union
 from fastapi import HTTPException
 from core.metrics import calculate_route_metrics
-from core.routing.graph_builder import densify_route_path
+from core.routing.compiled import CompiledGraph
+from core.routing.csr_search import (astar_csr, astar_csr_seeded, astar_csr_time_dependent, bidirectional_csr_seeded,
+                                     best_first_csr, queue_heuristic)
+from core.routing.edge_index import EdgeRouteEndpoints, assemble_route_coords
+from core.routing.geometry_store import EdgeGeometryStore
+from core.routing.landmarks import LandmarkTables
+from core.routing.traffic_profiles import TrafficProfiles, week_seconds
 import math
 
 logger = logging.getLogger(__name__)
@@ -16,10 +23,70 @@ class AmbulanceRouter:
     A* algorithm implementation for emergency vehicle routing.
     """
     
-    def __init__(self, graph: nx.MultiDiGraph):
-        self.graph = graph
-        self.nodes = list(graph.nodes())
-        logger.info(f"AmbulanceRouter initialized with graph containing {len(self.graph.nodes)} nodes and {len(self.graph.edges)} edges.")
+    def __init__(self, graph: Union[nx.MultiDiGraph, Callable[[], nx.MultiDiGraph]], compiled: CompiledGraph = None,
+                 landmarks: Union[LandmarkTables, Callable[[], LandmarkTables]] = None,
+                 profiles: Union[TrafficProfiles, Callable[[], Optional[TrafficProfiles]]] = None,
+                 geometry: Union[EdgeGeometryStore, Callable[[], EdgeGeometryStore]] = None):
+        self._graph = graph  # NetworkX graph, or a callable that materializes it for the legacy search
+        self.compiled = compiled  # Array-backed view used by the compiled search mode
+        self._landmarks = landmarks  # ALT tables, or a callable that loads them on first use
+        self._profiles = profiles  # Weekly travel-time profiles, or a callable that loads them on first use
+        self._geometry = geometry  # Flattened edge geometry, or a callable that loads it on first use
+        self._lng_scale = None
+        if compiled is not None:
+            logger.info(f"AmbulanceRouter initialized with compiled graph containing {compiled.num_nodes} nodes "
+                        f"and {compiled.num_edges} edges.")
+        else:
+            logger.info(f"AmbulanceRouter initialized with graph containing {len(self.graph.nodes)} nodes and {len(self.graph.edges)} edges.")
+
+    @property
+    def graph(self) -> nx.MultiDiGraph:
+        """The NetworkX graph, materialized on first use (only the legacy search and helpers need it)."""
+        if callable(self._graph):
+            self._graph = self._graph()
+        return self._graph
+
+    @property
+    def _lng_meters_per_degree(self) -> float:
+        """Metres per degree of longitude at the graph's mean latitude (legacy heuristic)."""
+        if self._lng_scale is None:
+            if self.compiled is not None:
+                mean_lat = float(self.compiled.lat.mean()) if self.compiled.num_nodes else 0.0
+            else:
+                mean_lat = np.mean([data['y'] for _, data in self.graph.nodes(data=True)]) if len(self.graph) else 0.0
+            self._lng_scale = 111320 * abs(math.cos(math.radians(mean_lat)))
+        return self._lng_scale
+
+    @property
+    def landmarks(self) -> LandmarkTables:
+        """ALT landmark tables, computed from the compiled graph if none were given."""
+        if callable(self._landmarks):
+            self._landmarks = self._landmarks()
+        if self._landmarks is None:
+            if self.compiled is None:
+                self.compiled = CompiledGraph.from_graph(self.graph)
+            self._landmarks = LandmarkTables.build(self.compiled)
+        return self._landmarks
+
+    @property
+    def profiles(self) -> TrafficProfiles:
+        """Time-dependent travel-time profiles (core/routing/traffic_profiles.py)."""
+        if callable(self._profiles):
+            self._profiles = self._profiles()
+        if self._profiles is None:
+            raise HTTPException(status_code=400, detail="No traffic profiles available for time-dependent routing")
+        return self._profiles
+
+    @property
+    def geometry(self) -> EdgeGeometryStore:
+        """Flattened edge geometry for route densification, built from the graph if none was given."""
+        if callable(self._geometry):
+            self._geometry = self._geometry()
+        if self._geometry is None:
+            if self.compiled is None:
+                self.compiled = CompiledGraph.from_graph(self.graph)
+            self._geometry = EdgeGeometryStore.build(self.compiled, graph=self.graph)
+        return self._geometry
 
     def heuristic(self, node1: int, node2: int) -> float:
         """
@@ -30,16 +97,27 @@ class AmbulanceRouter:
         lat2, lng2 = self.graph.nodes[node2]['y'], self.graph.nodes[node2]['x']
         
         # Simple Euclidean distance (faster than geodesic)
-        # Convert to approximate meters using lat/lng degree distances
+        # Convert to approximate meters using lat/lng degree distances; the
+        # longitude scale is fixed per graph so no cos() is needed per call
         lat_diff_m = (lat2 - lat1) * 111320  # ~111.32 km per degree latitude
-        lng_diff_m = (lng2 - lng1) * 111320 * abs(math.cos(math.radians((lat1 + lat2) / 2)))
+        lng_diff_m = (lng2 - lng1) * self._lng_meters_per_degree
         
         distance_m = math.sqrt(lat_diff_m**2 + lng_diff_m**2)
         avg_speed_mps = 8.33  # ~30 km/h
         return distance_m / avg_speed_mps
     
-    def find_route(self, start_node: int, end_node: int) -> dict:
+    def find_route(self, start_node: int, end_node: int, use_compiled: bool = None,
+                   bidirectional: bool = False, use_landmarks: bool = False, departure: datetime = None,
+                   queue: str = "heapq", visited: List[int] = None) -> dict:
         """A* with performance debugging (replaces previous logic, keeps DS and function name the same)"""
+        if departure is not None:
+            return self.find_route_departing(start_node, end_node, departure, visited=visited)
+        if use_compiled is None:
+            use_compiled = self.compiled is not None
+        if use_compiled or bidirectional or use_landmarks or queue != "heapq" or visited is not None:
+            return self.find_route_compiled(start_node, end_node, bidirectional=bidirectional,
+                                            use_landmarks=use_landmarks, queue=queue, visited=visited)
+
         start_time = time_module.perf_counter()
         heuristic_time = 0
         neighbor_time = 0
@@ -121,8 +199,7 @@ class AmbulanceRouter:
         
         # Now do the expensive densification (outside of core algorithm timing)
         densification_start = time_module.perf_counter()
-        densified_route = densify_route_path(self.graph, path)
-        route_coords = [[pt['lat'], pt['lng']] for pt in densified_route]
+        route_coords = self.geometry.densify_nodes(path).tolist()
         densification_time = time_module.perf_counter() - densification_start
         
         # Total elapsed time including densification
@@ -144,6 +221,198 @@ class AmbulanceRouter:
             "visited_nodes": list(visited_nodes)
         }
     
+    def find_route_compiled(self, start_node: int, end_node: int, bidirectional: bool = False,
+                            use_landmarks: bool = False, queue: str = "heapq", visited: List[int] = None) -> dict:
+        """
+        A* on the compiled CSR arrays; same result format as find_route.
+        With bidirectional, runs bidirectional A* (see bidirectional_csr_seeded);
+        with use_landmarks, A* guided by the ALT landmark lower bounds. queue
+        picks the priority queue of the unidirectional searches
+        (core/routing/priority_queues.py). Expanded nodes are appended to
+        visited, if given, while the search runs.
+        """
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        compiled = self.compiled
+        algorithm = "Bidirectional A*" if bidirectional else "A* (ALT)" if use_landmarks else "A*"
+        landmarks = self.landmarks if use_landmarks else None
+
+        start_time = time_module.perf_counter()
+        source, target = compiled.node_index(start_node), compiled.node_index(end_node)
+        if bidirectional:
+            search = bidirectional_csr_seeded(compiled, [(source, 0.0)], {target: 0.0}, use_heuristic=True,
+                                              visited=visited)
+        elif queue != "heapq":
+            sources, targets = [(source, 0.0)], {target: 0.0}
+            heuristic = (landmarks.heuristic(sources, targets) if use_landmarks else
+                         queue_heuristic(compiled, (compiled.lat_list[target], compiled.lng_list[target]), queue))
+            search = best_first_csr(compiled, sources, targets, queue=queue, heuristic=heuristic, visited=visited)
+        elif use_landmarks:
+            sources, targets = [(source, 0.0)], {target: 0.0}
+            search = astar_csr_seeded(compiled, sources, targets,
+                                      heuristic=landmarks.heuristic(sources, targets), visited=visited)
+        else:
+            search = astar_csr(compiled, source, target, visited=visited)
+        core_algorithm_time = time_module.perf_counter() - start_time
+
+        if not search["path"]:
+            logger.warning(f"No route found from node {start_node} to node {end_node}.")
+            raise HTTPException(status_code=404, detail="No path found between the source and destination")
+
+        distance, time = compiled.path_metrics(search["path"])
+        path = compiled.to_node_ids(search["path"])
+
+        densification_start = time_module.perf_counter()
+        route_coords = self.geometry.densify_path(search["path"]).tolist()
+        densification_time = time_module.perf_counter() - densification_start
+        total_elapsed = time_module.perf_counter() - start_time
+
+        logger.info(f"Route found (compiled {algorithm}): {len(path)} nodes, {distance:.2f} km, {time:.2f} mins. "
+                    f"Visited {search['visited_count']} nodes in {core_algorithm_time:.4f}s.")
+
+        return {
+            "algorithm": algorithm,
+            "time": core_algorithm_time,
+            "total_time": total_elapsed,
+            "densification_time": densification_time,
+            "nodes": search["visited_count"],
+            "distance": distance,
+            "route": route_coords,
+            "visited_nodes": compiled.to_node_ids(search["visited"])
+        }
+
+    def find_route_from_snaps(self, endpoints: EdgeRouteEndpoints, bidirectional: bool = False,
+                              use_landmarks: bool = False, departure: datetime = None, queue: str = "heapq",
+                              visited: List[int] = None) -> dict:
+        """
+        A* between two points snapped onto edges: the search is seeded with the
+        partial edge costs from the source point and finishes on the partial
+        edge into the destination point. Same result format as find_route.
+        """
+        if departure is not None:
+            return self.find_route_departing_from_snaps(endpoints, departure, visited=visited)
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        compiled = self.compiled
+        algorithm = "Bidirectional A*" if bidirectional else "A* (ALT)" if use_landmarks else "A*"
+        landmarks = self.landmarks if use_landmarks else None
+
+        start_time = time_module.perf_counter()
+        if bidirectional:
+            search = bidirectional_csr_seeded(compiled, endpoints.sources, endpoints.targets,
+                                              source_point=endpoints.source.point,
+                                              target_point=endpoints.dest.point, use_heuristic=True,
+                                              visited=visited)
+        elif queue != "heapq":
+            sources, targets = endpoints.sources, endpoints.targets
+            heuristic = (landmarks.heuristic(sources, targets) if use_landmarks else
+                         queue_heuristic(compiled, endpoints.dest.point, queue))
+            search = best_first_csr(compiled, sources, targets, queue=queue, heuristic=heuristic, visited=visited)
+        elif use_landmarks:
+            sources, targets = endpoints.sources, endpoints.targets
+            search = astar_csr_seeded(compiled, sources, targets,
+                                      heuristic=landmarks.heuristic(sources, targets), visited=visited)
+        else:
+            search = astar_csr_seeded(compiled, endpoints.sources, endpoints.targets,
+                                      target_point=endpoints.dest.point, visited=visited)
+        resolved = endpoints.resolve(search)
+        core_algorithm_time = time_module.perf_counter() - start_time
+
+        if resolved is None:
+            logger.warning(f"No route found from edge {endpoints.source.edge} to edge {endpoints.dest.edge}.")
+            raise HTTPException(status_code=404, detail="No path found between the source and destination")
+
+        densification_start = time_module.perf_counter()
+        route_coords = assemble_route_coords(self.geometry, resolved)
+        densification_time = time_module.perf_counter() - densification_start
+        total_elapsed = time_module.perf_counter() - start_time
+
+        distance, time = resolved["length"] / 1000.0, resolved["cost"] / 60.0
+        logger.info(f"Route found (edge-snapped {algorithm}): {distance:.2f} km, {time:.2f} mins. "
+                    f"Visited {search['visited_count']} nodes in {core_algorithm_time:.4f}s.")
+
+        return {
+            "algorithm": algorithm,
+            "time": core_algorithm_time,
+            "total_time": total_elapsed,
+            "densification_time": densification_time,
+            "nodes": search["visited_count"],
+            "distance": distance,
+            "route": route_coords,
+            "visited_nodes": compiled.to_node_ids(search["visited"])
+        }
+
+    def find_route_departing(self, start_node: int, end_node: int, departure: datetime,
+                             visited: List[int] = None) -> dict:
+        """
+        Time-dependent A*: the fastest route when leaving at departure, with
+        every edge costed at the time the vehicle reaches it. Same result
+        format as find_route plus 'eta_mins'.
+        """
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        compiled = self.compiled
+        profiles = self.profiles
+
+        start_time = time_module.perf_counter()
+        search = astar_csr_time_dependent(compiled, [(compiled.node_index(start_node), 0.0)],
+                                          {compiled.node_index(end_node): 0.0}, week_seconds(departure), profiles,
+                                          visited=visited)
+        core_algorithm_time = time_module.perf_counter() - start_time
+
+        if not search["path"]:
+            logger.warning(f"No route found from node {start_node} to node {end_node}.")
+            raise HTTPException(status_code=404, detail="No path found between the source and destination")
+
+        distance, _ = compiled.path_metrics(search["path"])
+        route_coords = self.geometry.densify_path(search["path"]).tolist()
+        return self._departing_result(search, distance, search["cost"], route_coords, departure,
+                                      core_algorithm_time, start_time)
+
+    def find_route_departing_from_snaps(self, endpoints: EdgeRouteEndpoints, departure: datetime,
+                                        visited: List[int] = None) -> dict:
+        """Time-dependent A* between two points snapped onto edges (see find_route_departing)."""
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        compiled = self.compiled
+        profiles = self.profiles
+        t = week_seconds(departure)
+        factors = profiles.factors_at(t)
+        # The partial legs are costed at the departure time
+        source_factor = float(factors[profiles.edge_profile[endpoints.source.edge]])
+        dest_factor = float(factors[profiles.edge_profile[endpoints.dest.edge]])
+
+        start_time = time_module.perf_counter()
+        search = astar_csr_time_dependent(compiled, [(node, cost * source_factor) for node, cost in endpoints.sources],
+                                          {node: cost * dest_factor for node, cost in endpoints.targets.items()},
+                                          t, profiles, target_point=endpoints.dest.point, visited=visited)
+        # The direct trip along the shared edge is costed at the departure time too
+        resolved = endpoints.resolve(search, direct_factor=source_factor)
+        core_algorithm_time = time_module.perf_counter() - start_time
+
+        if resolved is None:
+            logger.warning(f"No route found from edge {endpoints.source.edge} to edge {endpoints.dest.edge}.")
+            raise HTTPException(status_code=404, detail="No path found between the source and destination")
+
+        route_coords = assemble_route_coords(self.geometry, resolved)
+        return self._departing_result(search, resolved["length"] / 1000.0, resolved["cost"], route_coords, departure,
+                                      core_algorithm_time, start_time)
+
+    def _departing_result(self, search: Dict[str, Any], distance: float, cost: float, route_coords: List[List[float]],
+                          departure: datetime, core_algorithm_time: float, start_time: float) -> dict:
+        logger.info(f"Route found (time-dependent A*, departing {departure.isoformat()}): {distance:.2f} km, "
+                    f"ETA {cost / 60.0:.2f} mins. Visited {search['visited_count']} nodes in {core_algorithm_time:.4f}s.")
+        return {
+            "algorithm": "Time-dependent A*",
+            "time": core_algorithm_time,
+            "total_time": time_module.perf_counter() - start_time,
+            "nodes": search["visited_count"],
+            "distance": distance,
+            "eta_mins": cost / 60.0,
+            "route": route_coords,
+            "visited_nodes": self.compiled.to_node_ids(search["visited"])
+        }
+
     def _reconstruct_path(self, came_from: Dict[int, int], current: int) -> List[int]:
         """Reconstruct the path from start to end node."""
         path = [current]
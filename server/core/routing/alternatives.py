@@ -0,0 +1,175 @@
+"""
+Alternative routes from one pair of search trees (plateau method).
+
+A forward Dijkstra tree from the source and a backward tree (on the reverse
+graph) from the target are grown until they cover every node whose via
+route s -> v -> t is within the allowed stretch of the optimum. Where both
+trees use the same edge they form a plateau: every node on it has the same
+via cost df + db, and long plateaus mark genuinely different, locally
+optimal routes. Each plateau gives the route
+
+    forward tree path to the plateau start + plateau + backward tree path to t
+
+Candidates are taken by decreasing plateau length and kept if they respect
+the stretch and overlap bounds. If the plateaus do not yield k routes, a
+penalty fallback re-runs Dijkstra with the edges of the chosen routes made
+more expensive.
+"""
+import heapq
+import logging
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+import numpy as np
+
+from core.routing.compiled import CompiledGraph
+from core.routing.csr_search import dijkstra_csr_seeded
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+MAX_STRETCH = 0.25  # Alternatives may take up to 25% longer than the fastest route
+MAX_OVERLAP = 0.7  # ...and share at most 70% of their travel time with an already chosen route
+MIN_PLATEAU = 0.1  # Plateau must cover 10% of the optimum (local optimality)
+PENALTY_FACTOR = 1.4  # Weight multiplier per fallback round for edges on chosen routes
+
+
+def _grow_tree(offsets: List[int], edge_targets: List[int], weights: List[float], state,
+               seeds: List[Tuple[int, float]], stop: Callable[[float, int], bool]) -> List[int]:
+    """
+    Dijkstra from seeds on one search direction. stop(d, u) is checked on
+    every pop of an unsettled node and ends the search. Returns the settled nodes.
+    """
+    gen = state.reset()
+    dist, parent, stamp, settled = state.dist, state.parent, state.stamp, state.settled
+    heappush, heappop = heapq.heappush, heapq.heappop
+    queue = []
+    for node, cost in seeds:
+        if stamp[node] != gen or cost < dist[node]:
+            dist[node], parent[node], stamp[node] = cost, -1, gen
+            heappush(queue, (cost, node))
+
+    visited = []
+    while queue:
+        d, u = heappop(queue)
+        if settled[u] == gen:
+            continue
+        if stop(d, u):
+            break
+        settled[u] = gen
+        visited.append(u)
+        for e in range(offsets[u], offsets[u + 1]):
+            v = edge_targets[e]
+            nd = d + weights[e]
+            if stamp[v] != gen or nd < dist[v]:
+                dist[v], parent[v], stamp[v] = nd, u, gen
+                heappush(queue, (nd, v))
+    return visited
+
+
+def alternative_routes(compiled: CompiledGraph, sources: List[Tuple[int, float]], targets: Dict[int, float],
+                       k: int = 3, max_stretch: float = MAX_STRETCH, max_overlap: float = MAX_OVERLAP,
+                       min_plateau: float = MIN_PLATEAU) -> Dict[str, Any]:
+    """
+    Up to k routes between seeded sources and targets (same seeds as
+    dijkstra_csr_seeded), the fastest one first.
+
+    Returns:
+        dict with 'routes' (each with 'path', 'cost', 'stretch', 'overlap' and
+        'method': "optimal", "plateau" or "penalty") and 'visited_count'
+    """
+    reverse = compiled.reverse_view()
+    forward = compiled.state_pool.acquire(0)
+    backward = compiled.state_pool.acquire(1)
+
+    # Forward tree: until the optimum is known and then up to the stretch bound
+    best = [INF, -1]
+
+    def forward_stop(d: float, u: int) -> bool:
+        if u in targets and d + targets[u] < best[0]:
+            best[0], best[1] = d + targets[u], u
+        return d > (1 + max_stretch) * best[0]
+
+    forward_visited = _grow_tree(compiled.offsets_list, compiled.targets_list, compiled.weights_list,
+                                 forward, sources, forward_stop)
+    optimum, best_target = best
+    if best_target < 0:
+        return {"routes": [], "visited_count": len(forward_visited)}
+    bound = (1 + max_stretch) * optimum
+    backward_visited = _grow_tree(reverse.offsets_list, reverse.targets_list, reverse.weights_list,
+                                  backward, list(targets.items()), lambda d, u: d > bound)
+    visited = len(forward_visited) + len(backward_visited)
+
+    f_gen, b_gen = forward.generation, backward.generation
+    df, f_parent, f_settled = forward.dist, forward.parent, forward.settled
+    db, b_parent, b_settled = backward.dist, backward.parent, backward.settled
+
+    # Plateau edges u -> v lie on both trees: v's forward parent is u and u's
+    # backward parent (its next node towards the target) is v
+    on_plateau = {}
+    for u in forward_visited:
+        if b_settled[u] != b_gen or df[u] + db[u] > bound:
+            continue
+        v = b_parent[u]
+        if v >= 0 and f_settled[v] == f_gen and f_parent[v] == u:
+            on_plateau[u] = v
+    starts = [u for u in on_plateau if not (f_parent[u] >= 0 and on_plateau.get(f_parent[u]) == u)]
+
+    plateaus = []
+    for start in starts:
+        end = start
+        while end in on_plateau:
+            end = on_plateau[end]
+        plateaus.append((df[end] - df[start], start, end))
+    plateaus.sort(reverse=True)
+
+    weights = compiled.weights
+    routes: List[Dict[str, Any]] = []
+    chosen_edges: List[Set[int]] = []
+
+    def admit(path: List[int], cost: float, method: str) -> bool:
+        if len(set(path)) != len(path) or cost > bound + 1e-9:
+            return False
+        edges = set(compiled.path_edges(path))
+        overlap = 0.0
+        if cost > 0:
+            for other in chosen_edges:
+                shared = float(weights[list(edges & other)].sum()) if edges & other else 0.0
+                overlap = max(overlap, shared / cost)
+        if overlap > max_overlap:
+            return False
+        routes.append({"path": path, "cost": cost, "stretch": cost / optimum - 1 if optimum > 0 else 0.0,
+                       "overlap": overlap, "method": method})
+        chosen_edges.append(edges)
+        return True
+
+    admit(forward.path_from_root(best_target), optimum, "optimal")
+    for length, start, end in plateaus:
+        if len(routes) >= k or length < min_plateau * optimum:
+            break  # Sorted by length: every remaining plateau is shorter
+        path = forward.path_from_root(start)
+        path.pop()
+        node = start
+        while node >= 0:
+            path.append(node)
+            node = b_parent[node]
+        admit(path, df[start] + db[start], "plateau")
+
+    # Penalty fallback: make the chosen routes more expensive and search again
+    source_costs = dict(sources)
+    penalized = np.array(weights, dtype=np.float64)
+    for _ in range(2 * k):
+        if len(routes) >= k:
+            break
+        for edges in chosen_edges:
+            penalized[list(edges)] *= PENALTY_FACTOR
+        search = dijkstra_csr_seeded(compiled, sources, targets, weights=penalized.tolist())
+        visited += search["visited_count"]
+        path = search["path"]
+        if not path:
+            break
+        cost = source_costs[path[0]] + float(weights[compiled.path_edges(path)].sum()) + targets[path[-1]]
+        admit(path, cost, "penalty")
+
+    logger.info(f"Alternatives: {len(routes)} routes ({', '.join(r['method'] for r in routes)}) "
+                f"from {len(plateaus)} plateaus, {visited} nodes settled")
+    return {"routes": routes, "visited_count": visited}
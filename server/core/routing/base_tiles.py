@@ -0,0 +1,204 @@
+"""
+Search visualisation on a cached base map.
+
+The road network is drawn once per tile of a fixed degree grid and the
+tiles are kept in memory and on disk; a search image only composes the
+tiles covering its bounding box and draws the visited nodes, the route and
+the endpoints on top. This replaces ox.plot_graph on a freshly copied
+subgraph for every request (visualize_dijkstra_points/visualize_astar_points).
+
+Drawing goes through matplotlib's object API (Figure + Agg canvas), not
+pyplot, so images can be rendered from worker threads.
+"""
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+import matplotlib.image as mpimg
+
+from core.routing.compiled import CompiledGraph
+from core.routing.geometry_store import EdgeGeometryStore
+
+logger = logging.getLogger(__name__)
+
+TILE_DEG = 0.01  # Tile size in degrees (~1.1 km at Bengaluru's latitude)
+TILE_PX = 256  # Tile size in pixels
+BBOX_MARGIN_DEG = 0.02  # Margin around source and destination, as extract_subgraph
+ROAD_COLOR = "#bbbbbb"
+NODE_COLOR = "#cccccc"
+
+# Overlay style of each search image: visited colour, legend label and title
+SEARCH_STYLES = {
+    "dijkstra": ("blue", "Dijkstra visited", "Dijkstra's route", "Dijkstra Visited Nodes (blue)"),
+    "astar": ("green", "A* visited", "A* route", "A* Visited Nodes (green), Route (red)"),
+}
+
+
+class BaseMapTiles:
+    """
+    Road network raster tiles on a TILE_DEG grid; tile (tx, ty) covers
+    longitudes [tx, tx + 1) * TILE_DEG and latitudes [ty, ty + 1) * TILE_DEG.
+
+    Args:
+        compiled: Compiled graph (node positions)
+        geometry: Edge geometry of the compiled graph
+        tile_dir: Directory for the PNG tile cache; None keeps tiles in memory only
+        max_tiles: Tiles kept in memory
+    """
+
+    def __init__(self, compiled: CompiledGraph, geometry: EdgeGeometryStore, tile_dir: Optional[str] = None,
+                 max_tiles: int = 512):
+        self.compiled = compiled
+        self.tile_dir = tile_dir
+        self.max_tiles = max_tiles
+        self._tiles: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rendered = 0
+        self.disk_hits = 0
+
+        # Road segments as (lng, lat) pairs; the store holds each two-way road once
+        owned = ~geometry.reversed
+        is_last = np.zeros(len(geometry.coords), dtype=bool)
+        is_last[(geometry.starts + geometry.counts - 1)[owned & (geometry.counts > 0)]] = True
+        start = np.flatnonzero(~is_last)
+        coords = geometry.coords[:, ::-1]
+        self.segments = np.stack([coords[start], coords[start + 1]], axis=1)
+        self.seg_min = self.segments.min(axis=1)
+        self.seg_max = self.segments.max(axis=1)
+        self.nodes = np.column_stack([compiled.lng, compiled.lat])
+        if tile_dir:
+            os.makedirs(tile_dir, exist_ok=True)
+
+    def tile(self, tx: int, ty: int) -> np.ndarray:
+        """RGBA pixels (TILE_PX x TILE_PX, north up) of one tile."""
+        key = (tx, ty)
+        with self._lock:
+            pixels = self._tiles.get(key)
+            if pixels is not None:
+                self._tiles.move_to_end(key)
+                return pixels
+
+        path = os.path.join(self.tile_dir, f"{tx}_{ty}.png") if self.tile_dir else None
+        if path is not None and os.path.exists(path):
+            pixels = (mpimg.imread(path) * 255).astype(np.uint8)
+            self.disk_hits += 1
+        else:
+            pixels = self._render_tile(tx, ty)
+            self.rendered += 1
+            if path is not None:
+                tmp_path = f"{path}.{threading.get_ident()}.tmp.png"
+                mpimg.imsave(tmp_path, pixels)
+                os.replace(tmp_path, path)
+
+        with self._lock:
+            self._tiles[key] = pixels
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        return pixels
+
+    def _render_tile(self, tx: int, ty: int) -> np.ndarray:
+        west, south = tx * TILE_DEG, ty * TILE_DEG
+        east, north = west + TILE_DEG, south + TILE_DEG
+        inside = ((self.seg_max[:, 0] >= west) & (self.seg_min[:, 0] <= east) &
+                  (self.seg_max[:, 1] >= south) & (self.seg_min[:, 1] <= north))
+        nodes = self.nodes[(self.nodes[:, 0] >= west) & (self.nodes[:, 0] <= east) &
+                           (self.nodes[:, 1] >= south) & (self.nodes[:, 1] <= north)]
+
+        fig = Figure(figsize=(TILE_PX / 100, TILE_PX / 100), dpi=100, facecolor="white")
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.set_axis_off()
+        ax.set_xlim(west, east)
+        ax.set_ylim(south, north)
+        ax.add_collection(LineCollection(self.segments[inside], colors=ROAD_COLOR, linewidths=0.8))
+        ax.scatter(nodes[:, 0], nodes[:, 1], c=NODE_COLOR, s=1, linewidths=0)
+        canvas.draw()
+        return np.asarray(canvas.buffer_rgba()).copy()
+
+    def compose(self, south: float, west: float, north: float, east: float) -> Tuple[np.ndarray, List[float]]:
+        """
+        Stitch the tiles covering a bounding box.
+
+        Returns:
+            (RGBA image, [west, east, south, north] extent of the image in degrees)
+        """
+        tx0, tx1 = math.floor(west / TILE_DEG), math.floor(east / TILE_DEG)
+        ty0, ty1 = math.floor(south / TILE_DEG), math.floor(north / TILE_DEG)
+        # Rows run from north to south
+        rows = [np.concatenate([self.tile(tx, ty) for tx in range(tx0, tx1 + 1)], axis=1)
+                for ty in range(ty1, ty0 - 1, -1)]
+        extent = [tx0 * TILE_DEG, (tx1 + 1) * TILE_DEG, ty0 * TILE_DEG, (ty1 + 1) * TILE_DEG]
+        return np.concatenate(rows, axis=0), extent
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cached_tiles": len(self._tiles), "rendered": self.rendered, "disk_hits": self.disk_hits}
+
+
+def render_search_image(tiles: BaseMapTiles, name: str, visited: Sequence[int], route: List[List[float]],
+                        source: Tuple[float, float], dest: Tuple[float, float], outdir: str) -> str:
+    """
+    Draw one search (visited nodes, route, endpoints) over the base map
+    around source and dest.
+
+    Args:
+        tiles: Base map
+        name: Key of SEARCH_STYLES ("dijkstra" or "astar")
+        visited: Visited node ids
+        route: Route as [lat, lng] points
+        source, dest: (lat, lng) of the snapped endpoints
+        outdir: Directory the PNG is written to
+
+    Returns:
+        Path of the image
+    """
+    color, visited_label, route_label, title = SEARCH_STYLES[name]
+    start = time.perf_counter()
+    north = max(source[0], dest[0]) + BBOX_MARGIN_DEG
+    south = min(source[0], dest[0]) - BBOX_MARGIN_DEG
+    east = max(source[1], dest[1]) + BBOX_MARGIN_DEG
+    west = min(source[1], dest[1]) - BBOX_MARGIN_DEG
+    base, extent = tiles.compose(south, west, north, east)
+
+    compiled = tiles.compiled
+    indices = np.fromiter((compiled.index[n] for n in visited if n in compiled.index), dtype=np.int64)
+    lat, lng = compiled.lat[indices], compiled.lng[indices]
+    in_view = (lat >= south) & (lat <= north) & (lng >= west) & (lng <= east)
+
+    width, height = (east - west) / TILE_DEG * TILE_PX, (north - south) / TILE_DEG * TILE_PX
+    fig = Figure(figsize=(width / 100, height / 100), dpi=100, facecolor="white")
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes([0.02, 0.02, 0.96, 0.92])
+    ax.set_axis_off()
+    ax.imshow(base, extent=extent, interpolation="nearest")
+    ax.set_xlim(west, east)
+    ax.set_ylim(south, north)
+    if in_view.any():
+        ax.scatter(lng[in_view], lat[in_view], c=color, s=6, label=visited_label, alpha=0.7, zorder=5)
+    if route:
+        points = np.asarray(route, dtype=np.float64)
+        ax.scatter(points[:, 1], points[:, 0], c='red', s=10, label=route_label, alpha=0.9, zorder=6)
+    ax.scatter([source[1]], [source[0]], c='orange', s=30, marker='*', label='Source', zorder=10)
+    ax.scatter([dest[1]], [dest[0]], c='purple', s=30, marker='*', label='Destination', zorder=10)
+    ax.legend()
+    ax.set_title(title)
+
+    fname = f"{name}_{source[0]:.5f}.{source[1]:.5f}.{dest[0]:.5f}.{dest[1]:.5f}.png"
+    outpath = os.path.join(outdir, fname)
+    canvas.print_png(outpath)
+    logger.info(f"{title}: rendered {outpath} in {time.perf_counter() - start:.3f}s")
+    return outpath
+
+
+def render_search_images(tiles: BaseMapTiles, searches: Dict[str, Tuple[Sequence[int], List[List[float]]]],
+                         source: Tuple[float, float], dest: Tuple[float, float], outdir: str) -> Dict[str, str]:
+    """Draw several searches ({name: (visited node ids, route)}); returns {name: image path}."""
+    return {name: render_search_image(tiles, name, visited, route, source, dest, outdir)
+            for name, (visited, route) in searches.items()}
@@ -0,0 +1,237 @@
+"""
+Compiled, array-backed view of the road graph for the search loops.
+
+Nodes are renumbered 0..N-1 and the adjacency is stored in CSR form
+(offsets/targets). Parallel edges are collapsed to the one with the smallest
+travel_time, which is the edge both routers would pick anyway, so the search
+loops never touch NetworkX dicts.
+"""
+import logging
+import time
+import hashlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+import networkx as nx
+
+from core.routing.search_state import SearchStatePool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRAVEL_TIME = 1000  # Same fallback the routers use for edges without travel_time (also used by snapshots)
+
+
+class CompiledGraph:
+    """
+    Integer-indexed CSR view of a road graph.
+
+    Attributes:
+        node_ids: OSM node id of each index
+        lat, lng: Node coordinates
+        offsets: CSR row pointers, edges of node i are offsets[i]:offsets[i+1]
+        targets: Target node index of each collapsed edge
+        weights: Minimum travel_time (seconds) over the parallel edges
+        lengths: Length (metres) of the chosen parallel edge
+        edge_keys: MultiDiGraph key of the chosen parallel edge
+        edge_refs: Position of the chosen edge in the input edge list (the
+            snapshot edge arrays, or G.edges() order when compiled from NetworkX)
+    """
+
+    def __init__(self, node_ids: np.ndarray, lat: np.ndarray, lng: np.ndarray,
+                 offsets: np.ndarray, targets: np.ndarray, weights: np.ndarray,
+                 lengths: np.ndarray, edge_keys: np.ndarray, edge_refs: np.ndarray = None):
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.lengths = np.asarray(lengths, dtype=np.float64)
+        self.edge_keys = np.asarray(edge_keys, dtype=np.int32)
+        self.edge_refs = (np.asarray(edge_refs, dtype=np.int64) if edge_refs is not None
+                          else np.arange(len(self.targets), dtype=np.int64))
+        self.index: Dict[int, int] = {node: i for i, node in enumerate(self.node_ids.tolist())}
+
+        # Plain Python lists: indexing these in the search loops is much
+        # cheaper than indexing NumPy arrays element by element
+        self.offsets_list: List[int] = self.offsets.tolist()
+        self.targets_list: List[int] = self.targets.tolist()
+        self.weights_list: List[float] = self.weights.tolist()
+        self.lengths_list: List[float] = self.lengths.tolist()
+        self.lat_list: List[float] = self.lat.tolist()
+        self.lng_list: List[float] = self.lng.tolist()
+
+        # Per-thread search arrays reused across queries (reset is O(1))
+        self.state_pool = SearchStatePool(self.num_nodes)
+        self._reverse: "CompiledGraph" = None
+        self._max_speed_mps: float = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def from_arrays(cls, node_ids: np.ndarray, lat: np.ndarray, lng: np.ndarray,
+                    sources: np.ndarray, targets: np.ndarray, travel_times: np.ndarray,
+                    lengths: np.ndarray, keys: np.ndarray) -> "CompiledGraph":
+        """Build the CSR view from flat (possibly parallel, unsorted) edge arrays."""
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        travel_times = np.asarray(travel_times, dtype=np.float64)
+
+        # Sort by (source, target, travel_time) and keep the first, i.e. the
+        # fastest, edge of every (source, target) group
+        order = np.lexsort((travel_times, targets, sources))
+        sources, targets = sources[order], targets[order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        order = order[keep]
+        sources, targets = sources[keep], targets[keep]
+
+        offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(node_ids)), out=offsets[1:])
+        return cls(
+            node_ids, lat, lng, offsets, targets,
+            travel_times[order],
+            np.asarray(lengths, dtype=np.float64)[order],
+            np.asarray(keys)[order],
+            order,
+        )
+
+    @classmethod
+    def from_graph(cls, G: nx.MultiDiGraph) -> "CompiledGraph":
+        """Compile a NetworkX/OSMnx MultiDiGraph."""
+        start = time.perf_counter()
+        index = {node: i for i, node in enumerate(G.nodes())}
+        node_ids = np.fromiter(G.nodes(), dtype=np.int64, count=len(G))
+        lat = np.array([data.get('y', data.get('lat', 0.0)) for _, data in G.nodes(data=True)], dtype=np.float64)
+        lng = np.array([data.get('x', data.get('lon', 0.0)) for _, data in G.nodes(data=True)], dtype=np.float64)
+
+        sources, targets, travel_times, lengths, keys = [], [], [], [], []
+        for u, v, k, data in G.edges(keys=True, data=True):
+            sources.append(index[u])
+            targets.append(index[v])
+            travel_times.append(data.get('travel_time', DEFAULT_TRAVEL_TIME))
+            lengths.append(data.get('length', 0.0))
+            keys.append(k)
+
+        compiled = cls.from_arrays(node_ids, lat, lng, sources, targets, travel_times, lengths, keys)
+        logger.info(
+            f"Compiled graph with {compiled.num_nodes} nodes and {compiled.num_edges} collapsed edges "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return compiled
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "CompiledGraph":
+        """Compile a GraphSnapshot without going through NetworkX."""
+        start = time.perf_counter()
+        compiled = cls.from_arrays(
+            snapshot.node_ids, snapshot.lat, snapshot.lng,
+            snapshot.sources(), snapshot.targets, snapshot.travel_time,
+            snapshot.length, snapshot.keys,
+        )
+        logger.info(
+            f"Compiled snapshot with {compiled.num_nodes} nodes and {compiled.num_edges} collapsed edges "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return compiled
+
+    def weights_from_graph(self, G: nx.MultiDiGraph) -> np.ndarray:
+        """
+        Collapse the current travel_time of a NetworkX graph with the same
+        nodes (e.g. after TrafficSimulator.apply_constant_congestion) onto the
+        compiled edges, keeping the minimum over parallel edges.
+        """
+        n = self.num_nodes
+        index = self.index
+        sources, targets, travel_times = [], [], []
+        for u, v, data in G.edges(data=True):
+            if u in index and v in index:
+                sources.append(index[u])
+                targets.append(index[v])
+                travel_times.append(data.get('travel_time', DEFAULT_TRAVEL_TIME))
+
+        # CSR edges are sorted by (source, target), so source * N + target is sorted too
+        compiled_keys = self.sources().astype(np.int64) * n + self.targets
+        keys = np.asarray(sources, dtype=np.int64) * n + np.asarray(targets, dtype=np.int64)
+        positions = np.searchsorted(compiled_keys, keys)
+        found = positions < len(compiled_keys)
+        found[found] = compiled_keys[positions[found]] == keys[found]
+
+        weights = np.full(self.num_edges, np.inf)
+        np.minimum.at(weights, positions[found], np.asarray(travel_times, dtype=np.float64)[found])
+        return np.where(np.isfinite(weights), weights, self.weights)
+
+    def reverse_view(self) -> "CompiledGraph":
+        """
+        The transposed graph (every edge u -> v becomes v -> u), built once.
+        Its edge_refs are the positions of the corresponding forward edges.
+        """
+        if self._reverse is None:
+            self._reverse = CompiledGraph.from_arrays(
+                self.node_ids, self.lat, self.lng,
+                self.targets, self.sources(), self.weights, self.lengths, self.edge_keys,
+            )
+        return self._reverse
+
+    @property
+    def max_speed_mps(self) -> float:
+        """
+        Highest length / travel_time over all edges. Straight-line distance
+        divided by this speed never overestimates the remaining travel time.
+        """
+        if self._max_speed_mps is None:
+            valid = self.weights > 0
+            speeds = self.lengths[valid] / self.weights[valid]
+            self._max_speed_mps = float(speeds.max()) if len(speeds) else 1.0
+        return self._max_speed_mps
+
+    def signature(self) -> str:
+        """
+        Fingerprint of the topology and weights. Preprocessed data built for
+        this graph (contraction hierarchy, landmark tables) is tagged with it.
+        """
+        digest = hashlib.sha1()
+        for array in (self.node_ids, self.offsets, self.targets, self.weights):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    def node_index(self, node_id: int) -> int:
+        """Map an OSM node id to its compiled index."""
+        return self.index[node_id]
+
+    def to_node_ids(self, path: List[int]) -> List[int]:
+        """Map a path of compiled indices back to OSM node ids."""
+        node_ids = self.node_ids
+        return [int(node_ids[i]) for i in path]
+
+    def edge_position(self, u: int, v: int) -> int:
+        """Position of the collapsed edge u -> v in the edge arrays, or -1."""
+        start, end = self.offsets_list[u], self.offsets_list[u + 1]
+        targets = self.targets_list
+        for e in range(start, end):
+            if targets[e] == v:
+                return e
+        return -1
+
+    def sources(self) -> np.ndarray:
+        """Source node index of every collapsed edge."""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.offsets))
+
+    def path_edges(self, path: List[int]) -> List[int]:
+        """Collapsed edge positions along a path of compiled indices."""
+        return [self.edge_position(u, v) for u, v in zip(path[:-1], path[1:])]
+
+    def path_metrics(self, path: List[int]) -> Tuple[float, float]:
+        """Total distance (km) and time (minutes) of a path of compiled indices."""
+        if not path or len(path) < 2:
+            return 0.0, 0.0
+        positions = self.path_edges(path)
+        total_distance = float(self.lengths[positions].sum())  # in meters
+        total_time = float(self.weights[positions].sum())  # in seconds
+        return total_distance / 1000.0, total_time / 60.0
@@ -0,0 +1,566 @@
+"""
+Contraction Hierarchies (CH) over the compiled road graph.
+
+Preprocessing contracts the nodes one by one in order of importance (edge
+difference, already contracted neighbours and hierarchy depth, with lazy
+updates).
+When contracting v, a shortcut u -> w is added unless a witness search finds
+a path from u to w that avoids v and is no longer than u -> v -> w. Every
+edge ends up stored at its lower-ranked endpoint:
+
+    up graph      edge u -> v with rank[v] > rank[u]        (forward search)
+    down graph    edge v <- u stored at v, rank[u] > rank[v] (backward search)
+
+A query runs Dijkstra upward from the source in the up graph and upward from
+the target in the down graph; the two searches meet at the highest-ranked node
+of the shortest path. Shortcuts are unpacked recursively through their middle
+node, so the result is an ordinary path of compiled node indices.
+
+The hierarchy is written next to the graph snapshot as a directory of .npy
+files plus a manifest, and is tied to the compiled graph it was built from:
+
+    rank           int32   (N,)    contraction order of each node
+    up_offsets     int64   (N+1,)  CSR row pointers of the up graph
+    up_targets     int32   (U,)    higher-ranked head of each up edge
+    up_weights     float64 (U,)    travel time (seconds)
+    up_middle      int32   (U,)    contracted middle node, -1 for road edges
+    down_offsets   int64   (N+1,)  same for the down graph
+    down_targets   int32   (D,)    higher-ranked tail of each down edge
+    down_weights   float64 (D,)
+    down_middle    int32   (D,)
+
+Build one with:
+    python -m core.routing.contraction
+"""
+import os
+import json
+import time
+import heapq
+import shutil
+import logging
+import argparse
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from core.routing.compiled import CompiledGraph
+from core.routing.search_state import SearchStatePool
+
+logger = logging.getLogger(__name__)
+
+CH_FORMAT = "lab_el-contraction-hierarchy"
+CH_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+CH_ARRAYS = ("rank", "up_offsets", "up_targets", "up_weights", "up_middle",
+             "down_offsets", "down_targets", "down_weights", "down_middle")
+
+INF = float('inf')
+WITNESS_SETTLE_LIMIT = 500  # Nodes a witness search may settle before giving up (adds a shortcut)
+PRIORITY_SETTLE_LIMIT = 20  # Cheaper budget used only to estimate contraction priorities
+
+
+def _witness_search(out_adj: List[Dict[int, Tuple[float, int]]], source: int, excluded: int,
+                    targets: Dict[int, Tuple[float, int]], max_cost: float, settle_limit: int) -> Dict[int, float]:
+    """
+    Bounded Dijkstra from source in the remaining graph, skipping the node
+    being contracted. Stops once every target is settled.
+    """
+    dist = {source: 0.0}
+    queue = [(0.0, source)]
+    settled = 0
+    remaining = len(targets) - (source in targets)
+    heappush, heappop, get = heapq.heappush, heapq.heappop, dist.get
+    while queue:
+        d, x = heappop(queue)
+        if d > dist[x]:
+            continue
+        if d > max_cost or settled >= settle_limit:
+            break
+        settled += 1
+        if x in targets and x != source:
+            remaining -= 1
+            if remaining <= 0:
+                break
+        for y, (w, _) in out_adj[x].items():
+            if y == excluded:
+                continue
+            nd = d + w
+            if nd < get(y, INF):
+                dist[y] = nd
+                heappush(queue, (nd, y))
+    return dist
+
+
+def _shortcuts_for(out_adj, in_adj, v: int, settle_limit: int) -> List[Tuple[int, int, float]]:
+    """Shortcuts (u, w, cost) needed to contract v without changing any distance."""
+    out_edges = out_adj[v]
+    if not out_edges:
+        return []
+    max_out = max(w for w, _ in out_edges.values())
+    shortcuts = []
+    for u, w_in in in_adj[v].items():
+        dist = _witness_search(out_adj, u, v, out_edges, w_in + max_out, settle_limit)
+        for w, (w_out, _) in out_edges.items():
+            if w == u:
+                continue
+            cost = w_in + w_out
+            if dist.get(w, INF) > cost:
+                shortcuts.append((u, w, cost))
+    return shortcuts
+
+
+class ContractionHierarchy:
+    """
+    Node ranks plus the upward (forward) and downward (backward) CH graphs.
+    Node numbering is that of the CompiledGraph the hierarchy was built from.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], manifest: Optional[Dict[str, Any]] = None):
+        self.manifest = manifest or {}
+        self.rank = np.asarray(arrays["rank"], dtype=np.int32)
+        self.up_offsets = np.asarray(arrays["up_offsets"], dtype=np.int64)
+        self.up_targets = np.asarray(arrays["up_targets"], dtype=np.int32)
+        self.up_weights = np.asarray(arrays["up_weights"], dtype=np.float64)
+        self.up_middle = np.asarray(arrays["up_middle"], dtype=np.int32)
+        self.down_offsets = np.asarray(arrays["down_offsets"], dtype=np.int64)
+        self.down_targets = np.asarray(arrays["down_targets"], dtype=np.int32)
+        self.down_weights = np.asarray(arrays["down_weights"], dtype=np.float64)
+        self.down_middle = np.asarray(arrays["down_middle"], dtype=np.int32)
+
+        # Plain lists for the query loops, as in CompiledGraph
+        self.rank_list: List[int] = self.rank.tolist()
+        self.up_offsets_list: List[int] = self.up_offsets.tolist()
+        self.up_targets_list: List[int] = self.up_targets.tolist()
+        self.up_weights_list: List[float] = self.up_weights.tolist()
+        self.up_middle_list: List[int] = self.up_middle.tolist()
+        self.down_offsets_list: List[int] = self.down_offsets.tolist()
+        self.down_targets_list: List[int] = self.down_targets.tolist()
+        self.down_weights_list: List[float] = self.down_weights.tolist()
+        self.down_middle_list: List[int] = self.down_middle.tolist()
+
+        self.state_pool = SearchStatePool(self.num_nodes)
+        self._lengths: Optional[Tuple[List[float], List[float]]] = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.rank)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.up_targets) + len(self.down_targets)
+
+    @property
+    def num_shortcuts(self) -> int:
+        return int((self.up_middle >= 0).sum() + (self.down_middle >= 0).sum())
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, settle_limit: int = WITNESS_SETTLE_LIMIT) -> "ContractionHierarchy":
+        """
+        Contract every node of the compiled graph.
+
+        Args:
+            compiled: Graph to preprocess (edge weights are travel times)
+            settle_limit: Witness search budget; lower is faster but adds more shortcuts
+
+        Returns:
+            ContractionHierarchy over the compiled node indices
+        """
+        start = time.perf_counter()
+        n = compiled.num_nodes
+        offsets, targets, weights = compiled.offsets_list, compiled.targets_list, compiled.weights_list
+
+        # Remaining graph: out_adj[u][v] = (weight, middle), in_adj[v][u] = weight
+        out_adj: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(n)]
+        in_adj: List[Dict[int, float]] = [{} for _ in range(n)]
+        for u in range(n):
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                if v != u:
+                    out_adj[u][v] = (weights[e], -1)
+                    in_adj[v][u] = weights[e]
+
+        deleted_neighbours = [0] * n
+        level = [0] * n  # Depth in the hierarchy; keeps the contraction spread out
+
+        def priority(v: int) -> int:
+            shortcuts = _shortcuts_for(out_adj, in_adj, v, min(settle_limit, PRIORITY_SETTLE_LIMIT))
+            edge_difference = len(shortcuts) - len(in_adj[v]) - len(out_adj[v])
+            return 2 * edge_difference + deleted_neighbours[v] + level[v]
+
+        keys = [priority(v) for v in range(n)]
+        queue = [(key, v) for v, key in enumerate(keys)]
+        heapq.heapify(queue)
+        logger.info(f"CH: initial node ordering computed in {time.perf_counter() - start:.1f}s")
+
+        rank = np.zeros(n, dtype=np.int32)
+        up_edges: List[Tuple[int, int, float, int]] = []
+        down_edges: List[Tuple[int, int, float, int]] = []
+        contracted = [False] * n
+        shortcut_count = 0
+        next_rank = 0
+
+        while queue:
+            key, v = heapq.heappop(queue)
+            if contracted[v] or key != keys[v]:
+                continue  # Already contracted, or a superseded queue entry
+            # Lazy update: re-evaluate and postpone v if it is no longer the cheapest
+            current = priority(v)
+            if queue and current > queue[0][0]:
+                keys[v] = current
+                heapq.heappush(queue, (current, v))
+                continue
+
+            shortcuts = _shortcuts_for(out_adj, in_adj, v, settle_limit)
+            neighbours = set(out_adj[v]) | set(in_adj[v])
+            contracted[v] = True
+            rank[v] = next_rank
+            next_rank += 1
+
+            # Every remaining neighbour outranks v, so its edges are final now
+            for w, (weight, middle) in out_adj[v].items():
+                up_edges.append((v, w, weight, middle))
+                del in_adj[w][v]
+                deleted_neighbours[w] += 1
+            for u, weight in in_adj[v].items():
+                down_edges.append((v, u, weight, out_adj[u][v][1]))
+                del out_adj[u][v]
+                deleted_neighbours[u] += 1
+            out_adj[v] = {}
+            in_adj[v] = {}
+
+            for u, w, cost in shortcuts:
+                existing = out_adj[u].get(w)
+                if existing is None or cost < existing[0]:
+                    out_adj[u][w] = (cost, v)
+                    in_adj[w][u] = cost
+                    shortcut_count += 1
+
+            # Contracting v changed its neighbours' degrees; refresh their keys
+            for x in neighbours:
+                level[x] = max(level[x], level[v] + 1)
+                keys[x] = priority(x)
+                heapq.heappush(queue, (keys[x], x))
+
+            if next_rank % 20000 == 0:
+                logger.info(f"CH: contracted {next_rank}/{n} nodes, {shortcut_count} shortcuts so far")
+
+        hierarchy = cls({
+            "rank": rank,
+            **cls._to_csr("up", n, up_edges),
+            **cls._to_csr("down", n, down_edges),
+        })
+        logger.info(
+            f"Built contraction hierarchy for {n} nodes in {time.perf_counter() - start:.1f}s "
+            f"({hierarchy.num_edges} edges, {hierarchy.num_shortcuts} shortcuts)"
+        )
+        return hierarchy
+
+    @staticmethod
+    def _to_csr(prefix: str, n: int, edges: List[Tuple[int, int, float, int]]) -> Dict[str, np.ndarray]:
+        tails = np.array([e[0] for e in edges], dtype=np.int64)
+        order = np.argsort(tails, kind="stable")
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=n), out=offsets[1:])
+        return {
+            f"{prefix}_offsets": offsets,
+            f"{prefix}_targets": np.array([e[1] for e in edges], dtype=np.int32)[order],
+            f"{prefix}_weights": np.array([e[2] for e in edges], dtype=np.float64)[order],
+            f"{prefix}_middle": np.array([e[3] for e in edges], dtype=np.int32)[order],
+        }
+
+    def save(self, out_dir: str, compiled: CompiledGraph) -> str:
+        """Write the hierarchy atomically, tagged with the signature of compiled."""
+        arrays = {name: getattr(self, name) for name in CH_ARRAYS}
+        manifest = {
+            "format": CH_FORMAT,
+            "version": CH_VERSION,
+            "created_at": time.time(),
+            "num_nodes": self.num_nodes,
+            "num_edges": self.num_edges,
+            "num_shortcuts": self.num_shortcuts,
+            "graph_signature": compiled.signature(),
+        }
+        tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+        self.manifest = manifest
+        logger.info(f"Contraction hierarchy written to {out_dir}")
+        return out_dir
+
+    @classmethod
+    def load(cls, ch_dir: str, compiled: CompiledGraph) -> Optional["ContractionHierarchy"]:
+        """Load a hierarchy, or return None if it is missing or was built for another graph."""
+        manifest_path = os.path.join(ch_dir, MANIFEST_NAME)
+        if not os.path.isfile(manifest_path):
+            return None
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable contraction hierarchy manifest {manifest_path}: {e}")
+            return None
+        if manifest.get("format") != CH_FORMAT or manifest.get("version") != CH_VERSION:
+            logger.info(f"Ignoring contraction hierarchy {ch_dir}: format/version mismatch")
+            return None
+        if manifest.get("graph_signature") != compiled.signature():
+            logger.info(f"Ignoring contraction hierarchy {ch_dir}: built for a different graph")
+            return None
+        arrays = {name: np.load(os.path.join(ch_dir, f"{name}.npy")) for name in CH_ARRAYS}
+        return cls(arrays, manifest)
+
+    def query(self, sources: List[Tuple[int, float]], targets: Dict[int, float]) -> Dict[str, Any]:
+        """
+        Bidirectional upward search between seeded sources and targets (same
+        seeds as dijkstra_csr_seeded), followed by shortcut unpacking.
+
+        Returns:
+            dict with 'path' (compiled indices of road edges), 'cost', 'target',
+            'visited_count' and 'visited' (nodes settled by either search)
+        """
+        up_offsets, up_targets, up_weights = self.up_offsets_list, self.up_targets_list, self.up_weights_list
+        down_offsets, down_targets, down_weights = (self.down_offsets_list, self.down_targets_list,
+                                                    self.down_weights_list)
+
+        forward = self.state_pool.acquire(0)
+        backward = self.state_pool.acquire(1)
+        f_gen, b_gen = forward.reset(), backward.reset()
+        df, f_parent, f_stamp, f_settled = forward.dist, forward.parent, forward.stamp, forward.settled
+        db, b_parent, b_stamp, b_settled = backward.dist, backward.parent, backward.stamp, backward.settled
+
+        heappush, heappop = heapq.heappush, heapq.heappop
+        f_queue, b_queue = [], []
+        for node, cost in sources:
+            if f_stamp[node] != f_gen or cost < df[node]:
+                df[node], f_parent[node], f_stamp[node] = cost, -1, f_gen
+                heappush(f_queue, (cost, node))
+        for node, cost in targets.items():
+            if b_stamp[node] != b_gen or cost < db[node]:
+                db[node], b_parent[node], b_stamp[node] = cost, -1, b_gen
+                heappush(b_queue, (cost, node))
+
+        best, meeting = INF, -1
+        visited = []
+
+        # Upward searches cannot stop at the first meeting; each side runs until
+        # its own queue head is no better than the best meeting cost
+        while (f_queue and f_queue[0][0] < best) or (b_queue and b_queue[0][0] < best):
+            forward_turn = b_queue == [] or b_queue[0][0] >= best or (
+                f_queue and f_queue[0][0] < best and f_queue[0][0] <= b_queue[0][0])
+            if forward_turn:
+                d, u = heappop(f_queue)
+                if f_settled[u] == f_gen or d > df[u]:
+                    continue
+                f_settled[u] = f_gen
+                visited.append(u)
+                if b_stamp[u] == b_gen and d + db[u] < best:
+                    best, meeting = d + db[u], u
+                for e in range(up_offsets[u], up_offsets[u + 1]):
+                    v = up_targets[e]
+                    nd = d + up_weights[e]
+                    if f_stamp[v] != f_gen or nd < df[v]:
+                        df[v], f_parent[v], f_stamp[v] = nd, u, f_gen
+                        heappush(f_queue, (nd, v))
+            else:
+                d, u = heappop(b_queue)
+                if b_settled[u] == b_gen or d > db[u]:
+                    continue
+                b_settled[u] = b_gen
+                visited.append(u)
+                if f_stamp[u] == f_gen and d + df[u] < best:
+                    best, meeting = d + df[u], u
+                for e in range(down_offsets[u], down_offsets[u + 1]):
+                    v = down_targets[e]
+                    nd = d + down_weights[e]
+                    if b_stamp[v] != b_gen or nd < db[v]:
+                        db[v], b_parent[v], b_stamp[v] = nd, u, b_gen
+                        heappush(b_queue, (nd, v))
+
+        if meeting < 0:
+            return {"path": [], "cost": INF, "target": -1,
+                    "visited_count": len(visited), "visited": visited}
+
+        ch_path = forward.path_from_root(meeting)
+        node = b_parent[meeting]
+        while node >= 0:
+            ch_path.append(node)
+            node = b_parent[node]
+
+        path = [ch_path[0]]
+        for u, v in zip(ch_path[:-1], ch_path[1:]):
+            self._unpack_edge(u, v, path)
+        return {"path": path, "cost": best, "target": path[-1],
+                "visited_count": len(visited), "visited": visited}
+
+    def edge_lengths(self, compiled: CompiledGraph) -> Tuple[List[float], List[float]]:
+        """
+        Road length (metres) of every up and down edge, shortcuts included,
+        computed once. A shortcut through m is the sum of its two halves, which
+        were both fixed when m was contracted, so rounds of vectorised sums
+        over the shortcuts whose halves are known resolve every edge.
+        """
+        if self._lengths is not None:
+            return self._lengths
+        n = self.num_nodes
+        up_tails = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.up_offsets))
+        down_heads = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.down_offsets))
+        # Every CH edge in road direction a -> b: up edges first, then down edges
+        a = np.concatenate([up_tails, self.down_targets.astype(np.int64)])
+        b = np.concatenate([self.up_targets.astype(np.int64), down_heads])
+        middle = np.concatenate([self.up_middle, self.down_middle]).astype(np.int64)
+
+        keys = a * n + b
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+
+        def position(tails: np.ndarray, heads: np.ndarray) -> np.ndarray:
+            return order[np.searchsorted(sorted_keys, tails * n + heads)]
+
+        lengths = np.zeros(len(keys))
+        road = middle < 0
+        compiled_keys = compiled.sources().astype(np.int64) * n + compiled.targets
+        lengths[road] = compiled.lengths[np.searchsorted(compiled_keys, keys[road])]
+
+        pending = np.flatnonzero(~road)
+        first = position(a[pending], middle[pending])
+        second = position(middle[pending], b[pending])
+        done = road.copy()
+        while len(pending):
+            ready = done[first] & done[second]
+            if not ready.any():
+                raise ValueError("Contraction hierarchy has shortcuts with missing halves")
+            lengths[pending[ready]] = lengths[first[ready]] + lengths[second[ready]]
+            done[pending[ready]] = True
+            pending, first, second = pending[~ready], first[~ready], second[~ready]
+
+        num_up = len(self.up_targets)
+        self._lengths = (lengths[:num_up].tolist(), lengths[num_up:].tolist())
+        return self._lengths
+
+    def many_to_many(self, compiled: CompiledGraph, sources: List[Dict[int, Tuple[float, float]]],
+                     targets: List[Dict[int, Tuple[float, float]]]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Bucket-based many-to-many: one upward search per target in the down
+        graph leaves (column, cost, length) in a bucket at every node it
+        settles; one upward search per source in the up graph then scans the
+        buckets of the nodes it settles. Seeds are node -> (cost, length) as in
+        dijkstra_csr_one_to_many.
+
+        Returns:
+            (costs, lengths, settled_count) with costs/lengths shaped (sources, targets)
+        """
+        up_lengths, down_lengths = self.edge_lengths(compiled)
+        buckets: Dict[int, List[Tuple[int, float, float]]] = {}
+        settled_count = 0
+        for column, seeds in enumerate(targets):
+            for node, cost, length in self._upward(seeds, self.down_offsets_list, self.down_targets_list,
+                                                   self.down_weights_list, down_lengths):
+                buckets.setdefault(node, []).append((column, cost, length))
+                settled_count += 1
+
+        costs = np.full((len(sources), len(targets)), INF)
+        lengths = np.full((len(sources), len(targets)), INF)
+        for row, seeds in enumerate(sources):
+            best, best_length = costs[row].tolist(), lengths[row].tolist()
+            for node, cost, length in self._upward(seeds, self.up_offsets_list, self.up_targets_list,
+                                                   self.up_weights_list, up_lengths):
+                settled_count += 1
+                for column, bucket_cost, bucket_length in buckets.get(node, ()):
+                    if cost + bucket_cost < best[column]:
+                        best[column] = cost + bucket_cost
+                        best_length[column] = length + bucket_length
+            costs[row], lengths[row] = best, best_length
+        return costs, lengths, settled_count
+
+    def _upward(self, seeds: Dict[int, Tuple[float, float]], offsets: List[int], heads: List[int],
+                weights: List[float], edge_lengths: List[float]) -> List[Tuple[int, float, float]]:
+        """Exhaustive upward search; (node, cost, length) of every settled node."""
+        state = self.state_pool.acquire()
+        gen = state.reset()
+        dist, stamp, settled = state.dist, state.stamp, state.settled
+        length: Dict[int, float] = {}
+        heappush, heappop = heapq.heappush, heapq.heappop
+        queue = []
+        for node, (cost, seed_length) in seeds.items():
+            if stamp[node] != gen or cost < dist[node]:
+                dist[node], stamp[node] = cost, gen
+                length[node] = seed_length
+                heappush(queue, (cost, node))
+
+        space = []
+        while queue:
+            d, u = heappop(queue)
+            if settled[u] == gen:
+                continue
+            settled[u] = gen
+            space.append((u, d, length[u]))
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                nd = d + weights[e]
+                if stamp[v] != gen or nd < dist[v]:
+                    dist[v], stamp[v] = nd, gen
+                    length[v] = length[u] + edge_lengths[e]
+                    heappush(queue, (nd, v))
+        return space
+
+    def _middle(self, u: int, v: int) -> int:
+        """Middle node of the CH edge u -> v (-1 for a road edge)."""
+        if self.rank_list[v] > self.rank_list[u]:
+            offsets, heads, middles, tail, head = self.up_offsets_list, self.up_targets_list, self.up_middle_list, u, v
+        else:
+            offsets, heads, middles, tail, head = (self.down_offsets_list, self.down_targets_list,
+                                                   self.down_middle_list, v, u)
+        for e in range(offsets[tail], offsets[tail + 1]):
+            if heads[e] == head:
+                return middles[e]
+        raise KeyError(f"No CH edge {u} -> {v}")
+
+    def _unpack_edge(self, u: int, v: int, path: List[int]) -> None:
+        """Append the road nodes after u up to v of the CH edge u -> v to path."""
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            middle = self._middle(a, b)
+            if middle < 0:
+                path.append(b)
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
+
+
+def load_or_build_hierarchy(ch_dir: str, compiled: CompiledGraph, build: bool = False) -> Optional[ContractionHierarchy]:
+    """
+    Load the hierarchy for compiled from ch_dir; when it is missing or stale
+    and build is set, run the preprocessing and write it there.
+    """
+    hierarchy = ContractionHierarchy.load(ch_dir, compiled)
+    if hierarchy is None and build:
+        hierarchy = ContractionHierarchy.build(compiled)
+        try:
+            hierarchy.save(ch_dir, compiled)
+        except OSError as e:
+            logger.warning(f"Could not write contraction hierarchy to {ch_dir}: {e}")
+    return hierarchy
+
+
+if __name__ == "__main__":
+    from core.config import get_settings
+    from core.graph_manager import GraphManager
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Preprocess the road graph into a contraction hierarchy")
+    parser.add_argument("--source", default=settings.GRAPHML_FILE, help="GraphML file (its snapshot is used if fresh)")
+    parser.add_argument("--out", default=settings.CH_FILE, help="Hierarchy output directory")
+    parser.add_argument("--settle-limit", type=int, default=WITNESS_SETTLE_LIMIT, help="Witness search budget")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    manager = GraphManager(graph_file=args.source)
+    manager.load()
+    compiled = manager.get_compiled()
+    ContractionHierarchy.build(compiled, settle_limit=args.settle_limit).save(args.out, compiled)
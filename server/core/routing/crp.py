@@ -0,0 +1,459 @@
+"""
+Customizable Route Planning (CRP) style multilevel overlay engine.
+
+Routing is split into three phases so that traffic updates stay cheap:
+
+1. Partition (metric independent, once per graph): nodes are split into
+   nested cells by recursive geometric bisection. Level 1 has the smallest
+   cells, every higher level merges whole cells of the level below.
+2. Overlay topology (metric independent, once per graph): for every level,
+   each cell gets a clique from its entry nodes to its exit nodes, plus the
+   original edges that cross cell borders on that level (cut edges).
+3. Customization (per traffic snapshot): clique weights are the shortest
+   paths inside each cell, computed bottom-up with scipy's csgraph Dijkstra
+   on the level below. No ordering or shortcut preprocessing is redone, so a
+   new set of travel times is applied in a fraction of the CH build time.
+   Clique edges that are no shorter than a detour over another boundary node
+   of the same cell are dropped from the metric, which keeps distances but
+   cuts most of the relaxations on grid-like street networks.
+
+A query is a Dijkstra where each node uses the highest level whose cell
+contains neither the source nor the target; overlay edges found on the way
+are unpacked level by level inside their cells.
+"""
+import math
+import time
+import heapq
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from core.routing.compiled import CompiledGraph
+from core.routing.search_state import SearchStatePool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CELL_SIZES = (128, 2048, 32768)  # Maximum nodes per cell on levels 1, 2, 3
+INF = float('inf')
+
+
+class MultilevelPartition:
+    """
+    Nested cells of the compiled graph.
+
+    Attributes:
+        cells: (L, N) int array, cells[l][v] is the cell of node v on level l + 1
+        cell_sizes: Maximum cell size of each level
+    """
+
+    def __init__(self, cells: np.ndarray, cell_sizes: Sequence[int]):
+        self.cells = np.asarray(cells, dtype=np.int64)
+        self.cell_sizes = list(cell_sizes)
+
+    @property
+    def num_levels(self) -> int:
+        return len(self.cells)
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, cell_sizes: Sequence[int] = DEFAULT_CELL_SIZES) -> "MultilevelPartition":
+        """
+        Recursive median bisection along the wider coordinate axis. Every split
+        halves a cell, so a level with cells of at most S nodes is simply the
+        partition after ceil(log2(N / S)) splits.
+        """
+        n = compiled.num_nodes
+        splits = []
+        for size in sorted(cell_sizes):
+            k = max(0, math.ceil(math.log2(n / size))) if n > size else 0
+            if k > 0 and k not in splits:
+                splits.append(k)
+        if not splits:
+            return cls(np.zeros((0, n), dtype=np.int64), [])
+        depth = splits[0]
+
+        # Scale longitude so both axes are in comparable units
+        ref_lat = float(np.mean(compiled.lat)) if n else 0.0
+        x = compiled.lng * math.cos(math.radians(ref_lat))
+        y = compiled.lat
+        codes = np.zeros(n, dtype=np.int64)
+        groups = [np.arange(n)]
+        for d in range(depth):
+            bit = 1 << (depth - 1 - d)
+            next_groups = []
+            for group in groups:
+                if len(group) < 2:
+                    next_groups.extend((group, group[:0]))
+                    continue
+                gx, gy = x[group], y[group]
+                coord = gx if np.ptp(gx) >= np.ptp(gy) else gy
+                order = np.argsort(coord, kind="stable")
+                half = len(group) // 2
+                low, high = group[order[:half]], group[order[half:]]
+                codes[high] |= bit
+                next_groups.extend((low, high))
+            groups = next_groups
+
+        cells = np.vstack([codes >> (depth - k) for k in splits])
+        sizes = [int(np.ceil(n / (1 << k))) for k in splits]
+        return cls(cells, sizes)
+
+
+class OverlayLevel:
+    """
+    Metric-independent overlay graph of one level in CSR form over all node
+    indices (only boundary nodes have edges).
+
+    Attributes:
+        offsets, targets: CSR adjacency
+        edge_refs: Compiled edge position for cut edges, -1 for clique edges
+        cut_positions, cut_edges: Where each cut edge sits and which compiled edge it is
+        cell_jobs: Per cell (domain, entry_local, exit_local, clique positions,
+            pair mask, via rows, via columns) used by the customization; the
+            via rows/columns index the nodes that are both entry and exit
+    """
+
+    def __init__(self, offsets: np.ndarray, targets: np.ndarray, edge_refs: np.ndarray,
+                 cut_positions: np.ndarray, cut_edges: np.ndarray,
+                 cell_jobs: List[Tuple[np.ndarray, ...]],
+                 boundary: np.ndarray):
+        self.offsets = offsets
+        self.targets = targets
+        self.edge_refs = edge_refs
+        self.cut_positions = cut_positions
+        self.cut_edges = cut_edges
+        self.cell_jobs = cell_jobs
+        self.boundary = boundary
+        self.offsets_list: List[int] = offsets.tolist()
+        self.targets_list: List[int] = targets.tolist()
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, cells: np.ndarray, domain_mask: Optional[np.ndarray]) -> "OverlayLevel":
+        """
+        Args:
+            compiled: Base graph
+            cells: Cell of every node on this level
+            domain_mask: Boundary nodes of the level below (None on level 1,
+                where the whole cell is searched during customization)
+        """
+        n = compiled.num_nodes
+        sources, targets = compiled.sources().astype(np.int64), compiled.targets.astype(np.int64)
+        cut_edges = np.flatnonzero(cells[sources] != cells[targets])
+        entries = np.unique(targets[cut_edges])
+        exits = np.unique(sources[cut_edges])
+        boundary = np.zeros(n, dtype=bool)
+        boundary[entries] = True
+        boundary[exits] = True
+
+        entries = entries[np.argsort(cells[entries], kind="stable")]
+        exits = exits[np.argsort(cells[exits], kind="stable")]
+        entry_cells, exit_cells = cells[entries], cells[exits]
+
+        domain_nodes = np.arange(n) if domain_mask is None else np.flatnonzero(domain_mask | boundary)
+        domain_nodes = domain_nodes[np.argsort(cells[domain_nodes], kind="stable")]
+        domain_cells = cells[domain_nodes]
+
+        clique_tails, clique_heads, jobs = [], [], []
+        generated = 0
+        for cell in np.unique(entry_cells):
+            cell_entries = entries[np.searchsorted(entry_cells, cell):np.searchsorted(entry_cells, cell, "right")]
+            cell_exits = exits[np.searchsorted(exit_cells, cell):np.searchsorted(exit_cells, cell, "right")]
+            if len(cell_exits) == 0:
+                continue
+            domain = domain_nodes[np.searchsorted(domain_cells, cell):np.searchsorted(domain_cells, cell, "right")]
+            _, via_rows, via_cols = np.intersect1d(cell_entries, cell_exits, assume_unique=True, return_indices=True)
+            tails = np.repeat(cell_entries, len(cell_exits))
+            heads = np.tile(cell_exits, len(cell_entries))
+            mask = tails != heads
+            count = int(mask.sum())
+            clique_tails.append(tails[mask])
+            clique_heads.append(heads[mask])
+            jobs.append((domain,
+                         np.searchsorted(domain, cell_entries),
+                         np.searchsorted(domain, cell_exits),
+                         np.arange(generated, generated + count),
+                         mask, via_rows, via_cols))
+            generated += count
+
+        tails = np.concatenate(clique_tails + [sources[cut_edges]]) if clique_tails else sources[cut_edges]
+        heads = np.concatenate(clique_heads + [targets[cut_edges]]) if clique_heads else targets[cut_edges]
+        refs = np.concatenate([np.full(generated, -1, dtype=np.int64), cut_edges])
+
+        order = np.argsort(tails, kind="stable")
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=n), out=offsets[1:])
+
+        jobs = [(domain, entry_local, exit_local, position[generated_ids], mask, via_rows, via_cols)
+                for domain, entry_local, exit_local, generated_ids, mask, via_rows, via_cols in jobs]
+        return cls(offsets, heads[order].astype(np.int32), refs[order], position[generated:],
+                   cut_edges, jobs, boundary)
+
+
+class OverlayMetric:
+    """
+    Edge weights of the base graph and the overlay levels for one traffic
+    epoch. Each level keeps only the overlay edges that are needed under these
+    weights, as its own CSR (offsets, targets, weights, edge_refs).
+    """
+
+    def __init__(self, epoch: int, base_weights: np.ndarray,
+                 levels: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]):
+        self.epoch = epoch
+        self.base_weights = base_weights
+        self.levels = levels
+        self.base_weights_list: List[float] = base_weights.tolist()
+        self.offsets_list: List[List[int]] = [offsets.tolist() for offsets, _, _, _ in levels]
+        self.targets_list: List[List[int]] = [targets.tolist() for _, targets, _, _ in levels]
+        self.weights_list: List[List[float]] = [weights.tolist() for _, _, weights, _ in levels]
+        self.edge_refs_list: List[List[int]] = [refs.tolist() for _, _, _, refs in levels]
+
+    @property
+    def num_edges(self) -> int:
+        return sum(len(targets) for _, targets, _, _ in self.levels)
+
+
+class CRPEngine:
+    """
+    Partition plus overlays of a compiled graph, and the current metric.
+    customize() swaps in a new metric atomically; queries read whichever
+    metric was current when they started.
+    """
+
+    def __init__(self, compiled: CompiledGraph, cell_sizes: Sequence[int] = DEFAULT_CELL_SIZES):
+        start = time.perf_counter()
+        self.compiled = compiled
+        self.partition = MultilevelPartition.build(compiled, cell_sizes)
+        self.levels: List[OverlayLevel] = []
+        domain_mask = None
+        for cells in self.partition.cells:
+            level = OverlayLevel.build(compiled, cells, domain_mask)
+            self.levels.append(level)
+            domain_mask = level.boundary
+        self.cell_lists: List[List[int]] = [cells.tolist() for cells in self.partition.cells]
+        self.metric: Optional[OverlayMetric] = None
+        self.state_pool = SearchStatePool(compiled.num_nodes)
+        self._customize_lock = threading.Lock()
+        logger.info(
+            f"CRP partition with {self.num_levels} levels "
+            f"({', '.join(str(len(np.unique(c))) for c in self.partition.cells)} cells, "
+            f"{sum(level.num_edges for level in self.levels)} overlay edges) "
+            f"built in {time.perf_counter() - start:.2f}s"
+        )
+
+    @property
+    def num_levels(self) -> int:
+        return len(self.levels)
+
+    @property
+    def epoch(self) -> Optional[int]:
+        return self.metric.epoch if self.metric is not None else None
+
+    def customize(self, weights: np.ndarray = None, epoch: int = 0) -> OverlayMetric:
+        """
+        Compute the overlay weights for a new set of edge travel times.
+
+        Args:
+            weights: Travel time of every compiled edge (defaults to compiled.weights)
+            epoch: Traffic epoch the weights belong to
+
+        Returns:
+            The new metric, which is now used by queries
+        """
+        start = time.perf_counter()
+        compiled = self.compiled
+        n = compiled.num_nodes
+        base = np.asarray(compiled.weights if weights is None else weights, dtype=np.float64)
+        with self._customize_lock:
+            below = csr_matrix((base, compiled.targets, compiled.offsets), shape=(n, n))
+            levels = []
+            for level in self.levels:
+                w = np.full(level.num_edges, INF)
+                w[level.cut_positions] = base[level.cut_edges]
+                keep = np.ones(level.num_edges, dtype=bool)
+                for domain, entry_local, exit_local, positions, mask, via_rows, via_cols in level.cell_jobs:
+                    sub = below[domain][:, domain]
+                    dist = dijkstra(sub, indices=entry_local)[:, exit_local]
+                    w[positions] = dist.ravel()[mask]
+                    keep[positions] = ~_redundant_pairs(dist, via_rows, via_cols).ravel()[mask]
+
+                keep &= np.isfinite(w)
+                tails = np.repeat(np.arange(n), np.diff(level.offsets))[keep]
+                offsets = np.zeros(n + 1, dtype=np.int64)
+                np.cumsum(np.bincount(tails, minlength=n), out=offsets[1:])
+                targets, weights = level.targets[keep], w[keep]
+                levels.append((offsets, targets, weights, level.edge_refs[keep]))
+                below = csr_matrix((weights, targets, offsets), shape=(n, n))
+
+            metric = OverlayMetric(epoch, base, levels)
+            self.metric = metric
+        logger.info(
+            f"CRP customization for traffic epoch {epoch} kept {metric.num_edges} overlay edges "
+            f"and took {time.perf_counter() - start:.3f}s"
+        )
+        return metric
+
+    def query(self, sources: List[Tuple[int, float]], targets: Dict[int, float]) -> Dict[str, Any]:
+        """
+        Multilevel Dijkstra between seeded sources and targets (same seeds as
+        dijkstra_csr_seeded) on the current metric.
+
+        Returns:
+            dict with 'path' (compiled indices of road edges), 'cost', 'target',
+            'epoch', 'visited_count' and 'visited'
+        """
+        metric = self.metric
+        if metric is None:
+            metric = self.customize()
+        compiled = self.compiled
+        base_offsets, base_targets = compiled.offsets_list, compiled.targets_list
+        base_weights = metric.base_weights_list
+        level_offsets, level_targets, level_weights = metric.offsets_list, metric.targets_list, metric.weights_list
+        cell_lists = self.cell_lists
+
+        seeds = [node for node, _ in sources] + list(targets)
+        seed_cells = [{cells[x] for x in seeds} for cells in cell_lists]
+        top_down = list(range(self.num_levels - 1, -1, -1))
+
+        state = self.state_pool.acquire()
+        gen = state.reset()
+        dist, parent, stamp, settled = state.dist, state.parent, state.stamp, state.settled
+        via: Dict[int, int] = {}  # level of the edge each node was reached through
+        visited = []
+
+        heappush, heappop = heapq.heappush, heapq.heappop
+        queue = []
+        for node, cost in sources:
+            if stamp[node] != gen or cost < dist[node]:
+                dist[node], parent[node], stamp[node] = cost, -1, gen
+                heappush(queue, (cost, node))
+
+        best, best_target = INF, -1
+        while queue:
+            d, u = heappop(queue)
+            if d >= best:
+                break
+            if settled[u] == gen:
+                continue
+            settled[u] = gen
+            visited.append(u)
+            if u in targets and d + targets[u] < best:
+                best, best_target = d + targets[u], u
+
+            # Highest level whose cell around u holds no source or target
+            level = 0
+            for l in top_down:
+                if cell_lists[l][u] not in seed_cells[l]:
+                    level = l + 1
+                    break
+            if level == 0:
+                offsets, edge_targets, weights = base_offsets, base_targets, base_weights
+            else:
+                offsets, edge_targets, weights = level_offsets[level - 1], level_targets[level - 1], level_weights[level - 1]
+
+            for e in range(offsets[u], offsets[u + 1]):
+                v = edge_targets[e]
+                if settled[v] == gen:
+                    continue
+                nd = d + weights[e]
+                if nd >= best:
+                    continue
+                if stamp[v] != gen or nd < dist[v]:
+                    dist[v], parent[v], stamp[v] = nd, u, gen
+                    via[v] = level
+                    heappush(queue, (nd, v))
+
+        if best_target < 0:
+            return {"path": [], "cost": INF, "target": -1, "epoch": metric.epoch,
+                    "visited_count": len(visited), "visited": visited}
+
+        overlay_path = state.path_from_root(best_target)
+        path = [overlay_path[0]]
+        for u, v in zip(overlay_path[:-1], overlay_path[1:]):
+            self._unpack(metric, via[v], u, v, path)
+        return {"path": path, "cost": best, "target": best_target, "epoch": metric.epoch,
+                "visited_count": len(visited), "visited": visited}
+
+    def _unpack(self, metric: OverlayMetric, level: int, a: int, b: int, path: List[int]) -> None:
+        """Append the road nodes after a up to b of the level-`level` edge a -> b to path."""
+        if level == 0:
+            path.append(b)
+            return
+        # A cut edge is an original road edge
+        offsets, targets, refs = metric.offsets_list[level - 1], metric.targets_list[level - 1], metric.edge_refs_list[level - 1]
+        for e in range(offsets[a], offsets[a + 1]):
+            if targets[e] == b and refs[e] >= 0:
+                path.append(b)
+                return
+
+        # Clique edge: redo the search inside the cell one level down
+        cells = self.cell_lists[level - 1]
+        cell = cells[a]
+        if level == 1:
+            offsets, targets, weights = (self.compiled.offsets_list, self.compiled.targets_list,
+                                         metric.base_weights_list)
+        else:
+            offsets, targets, weights = (metric.offsets_list[level - 2], metric.targets_list[level - 2],
+                                         metric.weights_list[level - 2])
+
+        dist = {a: 0.0}
+        parent = {a: -1}
+        queue = [(0.0, a)]
+        done = set()
+        while queue:
+            d, u = heapq.heappop(queue)
+            if u in done:
+                continue
+            done.add(u)
+            if u == b:
+                break
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                if cells[v] != cell:
+                    continue
+                nd = d + weights[e]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(queue, (nd, v))
+
+        inner = [b]
+        while parent[inner[-1]] != -1:
+            inner.append(parent[inner[-1]])
+        inner.reverse()
+        for u, v in zip(inner[:-1], inner[1:]):
+            self._unpack(metric, level - 1, u, v, path)
+
+
+def _redundant_pairs(dist: np.ndarray, via_rows: np.ndarray, via_cols: np.ndarray,
+                     max_elements: int = 4_000_000) -> np.ndarray:
+    """
+    Entry/exit pairs of one cell whose clique edge can be dropped: some other
+    boundary node c (both entry and exit) gives dist[a, c] + dist[c, b] <= dist[a, b]
+    with both legs strictly positive, so the two-edge detour over c is as short.
+    Requiring positive legs means every dropped edge is replaced by strictly
+    shorter kept edges, so no pair ever loses its connection.
+
+    Args:
+        dist: (entries, exits) in-cell distances
+        via_rows, via_cols: Row and column of each node that is both entry and exit
+
+    Returns:
+        Boolean mask shaped like dist
+    """
+    if len(via_rows) == 0 or dist.size * len(via_rows) > max_elements:
+        return np.zeros(dist.shape, dtype=bool)  # Large top-level cells keep their full clique
+    to_via = dist[:, via_cols]                      # (entries, vias)
+    from_via = dist[via_rows, :]                    # (vias, exits)
+    to_via = np.where(to_via > 0, to_via, INF)
+    from_via = np.where(from_via > 0, from_via, INF)
+    detour = (to_via[:, :, None] + from_via[None, :, :]).min(axis=1)
+    return np.isfinite(dist) & (detour <= dist)
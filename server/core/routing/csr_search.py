@@ -0,0 +1,633 @@
+"""
+Search kernels running on a CompiledGraph.
+
+These are the array-backed counterparts of the NetworkX loops in
+AmbulanceRouter.find_route and DijkstraRouter.find_route: node ids are
+integer indices, neighbours come from the CSR arrays and the edge weight is
+the precomputed minimum travel_time, so a relaxation is a handful of list
+lookups instead of dict lookups plus a min() over parallel edges.
+
+The point-to-point kernels append every settled node to a 'visited' list.
+A caller may pass its own list and read it while the search runs on another
+thread (list appends are atomic), e.g. to stream the search frontier.
+"""
+import heapq
+import math
+from typing import Callable, Dict, Any, List, Tuple
+
+from core.routing.compiled import CompiledGraph
+from core.routing.priority_queues import QUEUES
+from core.routing.search_state import SearchState
+
+INF = float('inf')
+METERS_PER_DEGREE = 111320  # ~111.32 km per degree latitude
+AVG_SPEED_MPS = 8.33  # ~30 km/h, same as AmbulanceRouter.heuristic
+
+
+def dijkstra_csr(compiled: CompiledGraph, source: int, target: int,
+                 state: SearchState = None, visited: List[int] = None) -> Dict[str, Any]:
+    """
+    Point-to-point Dijkstra on compiled indices.
+
+    Args:
+        compiled: Compiled graph
+        source, target: Compiled node indices
+        state: Search state to reuse; defaults to this thread's pooled state
+
+    Returns:
+        dict with 'path' (compiled indices, empty if unreachable), 'cost'
+        (seconds), 'visited_count' and 'visited' (settled indices)
+    """
+    return dijkstra_csr_seeded(compiled, [(source, 0.0)], {target: 0.0}, state=state, visited=visited)
+
+
+def dijkstra_csr_seeded(compiled: CompiledGraph, sources: List[Tuple[int, float]],
+                        targets: Dict[int, float], state: SearchState = None,
+                        weights: List[float] = None, visited: List[int] = None) -> Dict[str, Any]:
+    """
+    Dijkstra from several seeded sources to several targets.
+
+    Used to start and end mid-edge: a source seed is (node, cost already spent
+    to reach it) and a target entry maps node -> cost still needed after it.
+    weights overrides compiled.weights_list (e.g. penalised travel times).
+
+    Returns:
+        dict with 'path' (from the best seed to the best target), 'cost'
+        (including both seed and target costs), 'target', 'visited_count'
+        and 'visited'
+    """
+    offsets = compiled.offsets_list
+    edge_targets = compiled.targets_list
+    if weights is None:
+        weights = compiled.weights_list
+
+    if state is None:
+        state = compiled.state_pool.acquire()
+    gen = state.reset()
+    dist, parent, stamp, settled = state.dist, state.parent, state.stamp, state.settled
+    visited = [] if visited is None else visited
+
+    heappush, heappop = heapq.heappush, heapq.heappop
+    queue = []
+    for node, cost in sources:
+        if stamp[node] != gen or cost < dist[node]:
+            dist[node] = cost
+            parent[node] = -1
+            stamp[node] = gen
+            heappush(queue, (cost, node))
+
+    best, best_target = INF, -1
+    while queue:
+        d, u = heappop(queue)
+        if d >= best:
+            break
+        if settled[u] == gen:
+            continue
+        settled[u] = gen
+        visited.append(u)
+        if u in targets:
+            candidate = d + targets[u]
+            if candidate < best:
+                best, best_target = candidate, u
+                if d >= best:
+                    break
+        for e in range(offsets[u], offsets[u + 1]):
+            v = edge_targets[e]
+            if settled[v] == gen:
+                continue
+            nd = d + weights[e]
+            if stamp[v] != gen or nd < dist[v]:
+                dist[v] = nd
+                parent[v] = u
+                stamp[v] = gen
+                heappush(queue, (nd, v))
+
+    path = state.path_from_root(best_target) if best_target >= 0 else []
+    return {"path": path, "cost": best, "target": best_target,
+            "visited_count": len(visited), "visited": visited}
+
+
+def dijkstra_csr_bounded(compiled: CompiledGraph, sources: List[Tuple[int, float]], cutoff: float,
+                         state: SearchState = None) -> Dict[str, Any]:
+    """
+    Multi-source Dijkstra that settles every node within cutoff seconds of
+    the nearest seed and then stops (isochrones, coverage).
+
+    Returns:
+        dict with 'nodes' (settled indices in cost order), 'costs' (seconds),
+        'origins' (index into sources of the seed each node was reached from)
+        and 'visited_count'
+    """
+    offsets = compiled.offsets_list
+    edge_targets = compiled.targets_list
+    weights = compiled.weights_list
+
+    if state is None:
+        state = compiled.state_pool.acquire()
+    gen = state.reset()
+    dist, parent, stamp, settled = state.dist, state.parent, state.stamp, state.settled
+
+    # parent holds the seed position rather than the predecessor: only the
+    # origin of each node is needed, not the paths
+    heappush, heappop = heapq.heappush, heapq.heappop
+    queue = []
+    for origin, (node, cost) in enumerate(sources):
+        if cost <= cutoff and (stamp[node] != gen or cost < dist[node]):
+            dist[node], parent[node], stamp[node] = cost, origin, gen
+            heappush(queue, (cost, node))
+
+    nodes, costs, origins = [], [], []
+    while queue:
+        d, u = heappop(queue)
+        if d > cutoff:
+            break
+        if settled[u] == gen:
+            continue
+        settled[u] = gen
+        nodes.append(u)
+        costs.append(d)
+        origin = parent[u]
+        origins.append(origin)
+        for e in range(offsets[u], offsets[u + 1]):
+            v = edge_targets[e]
+            if settled[v] == gen:
+                continue
+            nd = d + weights[e]
+            if nd <= cutoff and (stamp[v] != gen or nd < dist[v]):
+                dist[v], parent[v], stamp[v] = nd, origin, gen
+                heappush(queue, (nd, v))
+
+    return {"nodes": nodes, "costs": costs, "origins": origins, "visited_count": len(nodes)}
+
+
+def dijkstra_csr_one_to_many(compiled: CompiledGraph, sources: Dict[int, Tuple[float, float]],
+                             targets: List[Dict[int, Tuple[float, float]]],
+                             state: SearchState = None) -> Tuple[List[float], List[float], int]:
+    """
+    One Dijkstra from a seeded source to many seeded targets, i.e. one row of
+    a travel-time matrix. Seeds map node -> (cost, length): for the source the
+    cost/length already spent to reach the node, for each target what is
+    still needed after it. Path lengths are carried along the search, so the
+    distance of each time-optimal path comes for free.
+
+    Returns:
+        (costs, lengths, visited_count); unreachable targets stay at inf
+    """
+    if not targets:
+        return [], [], 0
+    offsets = compiled.offsets_list
+    edge_targets = compiled.targets_list
+    weights = compiled.weights_list
+    edge_lengths = compiled.lengths_list
+
+    # node -> [(target column, cost after node, length after node)]
+    target_seeds: Dict[int, List[Tuple[int, float, float]]] = {}
+    for column, seeds in enumerate(targets):
+        for node, (cost, length) in seeds.items():
+            target_seeds.setdefault(node, []).append((column, cost, length))
+    best = [INF] * len(targets)
+    best_length = [INF] * len(targets)
+    unresolved = len(targets)
+    bound = INF  # Largest best cost once every target has been reached
+
+    if state is None:
+        state = compiled.state_pool.acquire()
+    gen = state.reset()
+    dist, stamp, settled = state.dist, state.stamp, state.settled
+    length: Dict[int, float] = {}
+    visited_count = 0
+
+    heappush, heappop = heapq.heappush, heapq.heappop
+    queue = []
+    for node, (cost, seed_length) in sources.items():
+        if stamp[node] != gen or cost < dist[node]:
+            dist[node], stamp[node] = cost, gen
+            length[node] = seed_length
+            heappush(queue, (cost, node))
+
+    while queue:
+        d, u = heappop(queue)
+        if d >= bound:
+            break
+        if settled[u] == gen:
+            continue
+        settled[u] = gen
+        visited_count += 1
+        if u in target_seeds:
+            for column, cost, tail_length in target_seeds[u]:
+                candidate = d + cost
+                if candidate < best[column]:
+                    if best[column] == INF:
+                        unresolved -= 1
+                    best[column] = candidate
+                    best_length[column] = length[u] + tail_length
+                    if unresolved == 0:
+                        bound = max(best)
+        for e in range(offsets[u], offsets[u + 1]):
+            v = edge_targets[e]
+            if settled[v] == gen:
+                continue
+            nd = d + weights[e]
+            if stamp[v] != gen or nd < dist[v]:
+                dist[v], stamp[v] = nd, gen
+                length[v] = length[u] + edge_lengths[e]
+                heappush(queue, (nd, v))
+
+    return best, best_length, visited_count
+
+
+def straight_line_heuristic(compiled: CompiledGraph, target_point: Tuple[float, float],
+                            avg_speed_mps: float = AVG_SPEED_MPS) -> Callable[[int], float]:
+    """Straight-line travel time (seconds) from a node index to target_point (latitude, longitude)."""
+    lat = compiled.lat_list
+    lng = compiled.lng_list
+    target_lat, target_lng = target_point
+    sqrt = math.sqrt
+    # Equirectangular distance with the longitude scale fixed at the target's
+    # latitude: one cos() per query instead of one per heuristic call
+    lng_scale = METERS_PER_DEGREE * abs(math.cos(math.radians(target_lat)))
+    inv_speed = 1.0 / avg_speed_mps
+
+    def heuristic(node: int) -> float:
+        lat_diff_m = (target_lat - lat[node]) * METERS_PER_DEGREE
+        lng_diff_m = (target_lng - lng[node]) * lng_scale
+        return sqrt(lat_diff_m * lat_diff_m + lng_diff_m * lng_diff_m) * inv_speed
+
+    return heuristic
+
+
+def queue_heuristic(compiled: CompiledGraph, target_point: Tuple[float, float], queue: str) -> Callable[[int], float]:
+    """
+    straight_line_heuristic for best_first_csr on the given queue. Monotone
+    queues get the bound at the graph's top speed, which is consistent; the
+    heaps keep the average speed of AmbulanceRouter.heuristic.
+    """
+    if QUEUES[queue].monotone:
+        return straight_line_heuristic(compiled, target_point, avg_speed_mps=compiled.max_speed_mps)
+    return straight_line_heuristic(compiled, target_point)
+
+
+def astar_csr(compiled: CompiledGraph, source: int, target: int,
+              avg_speed_mps: float = AVG_SPEED_MPS, state: SearchState = None,
+              visited: List[int] = None) -> Dict[str, Any]:
+    """
+    Point-to-point A* on compiled indices with the straight-line travel time
+    heuristic of AmbulanceRouter.heuristic.
+
+    Returns:
+        dict with 'path', 'cost', 'visited_count' and 'visited' (expanded indices)
+    """
+    return astar_csr_seeded(compiled, [(source, 0.0)], {target: 0.0},
+                            avg_speed_mps=avg_speed_mps, state=state, visited=visited)
+
+
+def astar_csr_seeded(compiled: CompiledGraph, sources: List[Tuple[int, float]],
+                     targets: Dict[int, float], target_point: Tuple[float, float] = None,
+                     avg_speed_mps: float = AVG_SPEED_MPS, state: SearchState = None,
+                     heuristic: Callable[[int], float] = None, visited: List[int] = None) -> Dict[str, Any]:
+    """
+    A* from seeded sources to seeded targets (see dijkstra_csr_seeded).
+
+    The default heuristic aims at target_point (latitude, longitude), which
+    defaults to the coordinates of the first target node. A custom heuristic
+    (e.g. LandmarkTables.heuristic) maps a node index to its lower bound.
+    """
+    offsets = compiled.offsets_list
+    edge_targets = compiled.targets_list
+    weights = compiled.weights_list
+
+    if heuristic is None:
+        if target_point is None:
+            first_target = next(iter(targets))
+            target_point = (compiled.lat_list[first_target], compiled.lng_list[first_target])
+        heuristic = straight_line_heuristic(compiled, target_point, avg_speed_mps)
+
+    if state is None:
+        state = compiled.state_pool.acquire()
+    gen = state.reset()
+    g_score, parent, stamp = state.dist, state.parent, state.stamp
+    visited = [] if visited is None else visited
+
+    heappush, heappop = heapq.heappush, heapq.heappop
+    queue = []
+    for node, cost in sources:
+        if stamp[node] != gen or cost < g_score[node]:
+            g_score[node] = cost
+            parent[node] = -1
+            stamp[node] = gen
+            heappush(queue, (cost + heuristic(node), cost, node))
+
+    best, best_target = INF, -1
+    while queue:
+        f, g, u = heappop(queue)
+        if f >= best:
+            break
+        if g > g_score[u]:
+            continue  # Stale queue entry
+        visited.append(u)
+        if u in targets:
+            candidate = g + targets[u]
+            if candidate < best:
+                best, best_target = candidate, u
+                if f >= best:
+                    break
+        for e in range(offsets[u], offsets[u + 1]):
+            v = edge_targets[e]
+            tentative = g + weights[e]
+            if stamp[v] != gen or tentative < g_score[v]:
+                g_score[v] = tentative
+                parent[v] = u
+                stamp[v] = gen
+                heappush(queue, (tentative + heuristic(v), tentative, v))
+
+    path = state.path_from_root(best_target) if best_target >= 0 else []
+    return {"path": path, "cost": best, "target": best_target,
+            "visited_count": len(visited), "visited": visited}
+
+
+def best_first_csr(compiled: CompiledGraph, sources: List[Tuple[int, float]], targets: Dict[int, float],
+                   queue: str = "radix", heuristic: Callable[[int], float] = None,
+                   state: SearchState = None, visited: List[int] = None) -> Dict[str, Any]:
+    """
+    Dijkstra (no heuristic) or A* from seeded sources to seeded targets on a
+    pluggable priority queue (core/routing/priority_queues.py).
+
+    dijkstra_csr_seeded and astar_csr_seeded are the heapq baselines. This
+    kernel only relies on the queue returning costs in order up to
+    queue.resolution: a node whose cost still improves after its expansion is
+    expanded again, and the search stops once the popped cost exceeds the
+    best target cost by more than the resolution. With an admissible
+    heuristic on the heaps, or a consistent one on the monotone radix heap
+    (see queue_heuristic), the result is then exact.
+
+    Args:
+        queue: Key of priority_queues.QUEUES ("heapq", "addressable", "radix")
+        heuristic: Lower bound on the travel time from a node index to the
+            targets (e.g. queue_heuristic); None runs Dijkstra
+
+    Returns:
+        dict as dijkstra_csr_seeded, plus 'queue_pushes' and 'queue_peak'
+    """
+    offsets = compiled.offsets_list
+    edge_targets = compiled.targets_list
+    weights = compiled.weights_list
+    pq = QUEUES[queue]()
+    push, pop, resolution = pq.push, pq.pop, pq.resolution
+
+    if state is None:
+        state = compiled.state_pool.acquire()
+    gen = state.reset()
+    g_score, parent, stamp = state.dist, state.parent, state.stamp
+    expanded_at: Dict[int, float] = {}  # Node -> g it was last expanded with
+    visited = [] if visited is None else visited
+
+    for node, cost in sources:
+        if stamp[node] != gen or cost < g_score[node]:
+            g_score[node] = cost
+            parent[node] = -1
+            stamp[node] = gen
+            push(cost + heuristic(node) if heuristic else cost, node)
+
+    best, best_target = INF, -1
+    while pq:
+        f, u = pop()
+        if f - resolution >= best:
+            break
+        g = g_score[u]
+        previous = expanded_at.get(u)
+        if previous is not None and previous <= g:
+            continue  # Stale entry: already expanded with this cost
+        if previous is None:
+            visited.append(u)
+        expanded_at[u] = g
+        if u in targets:
+            candidate = g + targets[u]
+            if candidate < best:
+                best, best_target = candidate, u
+        for e in range(offsets[u], offsets[u + 1]):
+            v = edge_targets[e]
+            tentative = g + weights[e]
+            if stamp[v] != gen or tentative < g_score[v]:
+                g_score[v] = tentative
+                parent[v] = u
+                stamp[v] = gen
+                push(tentative + heuristic(v) if heuristic else tentative, v)
+
+    path = state.path_from_root(best_target) if best_target >= 0 else []
+    return {"path": path, "cost": best, "target": best_target,
+            "visited_count": len(visited), "visited": visited,
+            "queue_pushes": pq.pushes, "queue_peak": pq.peak}
+
+
+def astar_csr_time_dependent(compiled: CompiledGraph, sources: List[Tuple[int, float]],
+                             targets: Dict[int, float], departure: float, profiles,
+                             target_point: Tuple[float, float] = None, state: SearchState = None,
+                             visited: List[int] = None) -> Dict[str, Any]:
+    """
+    A* by arrival time on time-dependent edge weights (see
+    core/routing/traffic_profiles.py): an edge entered at time t costs
+    compiled.weights[e] times the factor of its profile at t.
+
+    Args:
+        sources, targets: Seeds as in dijkstra_csr_seeded (source costs are
+            time already spent after departure)
+        departure: Departure time in seconds since Monday 00:00
+        profiles: TrafficProfiles of the compiled graph
+        target_point: (latitude, longitude) of the destination; without it
+            the heuristic takes the nearest target node
+
+    The profiles are FIFO, so settling nodes by arrival time is exact. The
+    heuristic is the straight-line distance at the graph's top speed, scaled
+    by the smallest profile factor, which keeps it admissible at any time.
+
+    Returns:
+        dict with 'path', 'cost' (travel seconds), 'target', 'visited_count' and 'visited'
+    """
+    offsets = compiled.offsets_list
+    edge_targets = compiled.targets_list
+    weights = compiled.weights_list
+    lat = compiled.lat_list
+    lng = compiled.lng_list
+    edge_profile = profiles.edge_profile_list
+    rows = profiles.rows
+    position = profiles.position
+
+    # Aim at the destination point: with several target seeds (an edge-snapped
+    # destination), any single seed node may lie beyond it
+    points = [target_point] if target_point is not None else [(lat[target], lng[target]) for target in targets]
+    sqrt = math.sqrt
+    lng_scale = METERS_PER_DEGREE * abs(math.cos(math.radians(points[0][0])))
+    inv_speed = min(profiles.min_factor, 1.0) / compiled.max_speed_mps
+
+    def heuristic(node: int) -> float:
+        best_m = INF
+        for target_lat, target_lng in points:
+            lat_diff_m = (target_lat - lat[node]) * METERS_PER_DEGREE
+            lng_diff_m = (target_lng - lng[node]) * lng_scale
+            best_m = min(best_m, lat_diff_m * lat_diff_m + lng_diff_m * lng_diff_m)
+        return sqrt(best_m) * inv_speed
+
+    if state is None:
+        state = compiled.state_pool.acquire()
+    gen = state.reset()
+    g_score, parent, stamp = state.dist, state.parent, state.stamp
+    visited = [] if visited is None else visited
+
+    heappush, heappop = heapq.heappush, heapq.heappop
+    queue = []
+    for node, cost in sources:
+        if stamp[node] != gen or cost < g_score[node]:
+            g_score[node] = cost
+            parent[node] = -1
+            stamp[node] = gen
+            heappush(queue, (cost + heuristic(node), cost, node))
+
+    best, best_target = INF, -1
+    while queue:
+        f, g, u = heappop(queue)
+        if f >= best:
+            break
+        if g > g_score[u]:
+            continue  # Stale queue entry
+        visited.append(u)
+        if u in targets:
+            candidate = g + targets[u]
+            if candidate < best:
+                best, best_target = candidate, u
+                if f >= best:
+                    break
+        # Every outgoing edge is entered at the same time: interpolate once per node
+        day, fraction = position(departure + g)
+        keep = 1.0 - fraction
+        for e in range(offsets[u], offsets[u + 1]):
+            v = edge_targets[e]
+            row = rows[edge_profile[e]]
+            tentative = g + weights[e] * (row[day] * keep + row[day + 1] * fraction)
+            if stamp[v] != gen or tentative < g_score[v]:
+                g_score[v] = tentative
+                parent[v] = u
+                stamp[v] = gen
+                heappush(queue, (tentative + heuristic(v), tentative, v))
+
+    path = state.path_from_root(best_target) if best_target >= 0 else []
+    return {"path": path, "cost": best, "target": best_target,
+            "visited_count": len(visited), "visited": visited}
+
+
+def bidirectional_csr_seeded(compiled: CompiledGraph, sources: List[Tuple[int, float]],
+                             targets: Dict[int, float], source_point: Tuple[float, float] = None,
+                             target_point: Tuple[float, float] = None, use_heuristic: bool = False,
+                             visited: List[int] = None) -> Dict[str, Any]:
+    """
+    Bidirectional Dijkstra (or bidirectional A*) between seeded sources and targets.
+
+    The forward search runs on the graph from the sources, the backward search
+    on the reverse view from the targets, always expanding the side whose
+    queue head is smaller. The search stops once the two queue heads together
+    cannot beat the best meeting cost found so far.
+
+    With use_heuristic the searches use the average potential
+    p(v) = (h_t(v) - h_s(v)) / 2, where h is the straight-line distance at the
+    graph's top speed. This potential is consistent for both directions, so the
+    same stopping rule stays exact.
+
+    Returns:
+        dict with 'path', 'cost', 'target', 'meeting_node', 'visited_count' and 'visited'
+    """
+    reverse = compiled.reverse_view()
+    f_offsets, f_targets, f_weights = compiled.offsets_list, compiled.targets_list, compiled.weights_list
+    b_offsets, b_targets, b_weights = reverse.offsets_list, reverse.targets_list, reverse.weights_list
+    lat, lng = compiled.lat_list, compiled.lng_list
+
+    if use_heuristic:
+        if source_point is None:
+            first = sources[0][0]
+            source_point = (lat[first], lng[first])
+        if target_point is None:
+            first = next(iter(targets))
+            target_point = (lat[first], lng[first])
+        s_lat, s_lng = source_point
+        t_lat, t_lng = target_point
+        lng_scale = METERS_PER_DEGREE * abs(math.cos(math.radians((s_lat + t_lat) / 2)))
+        half_inv_speed = 0.5 / compiled.max_speed_mps
+        sqrt = math.sqrt
+
+        def potential(node: int) -> float:
+            node_lat, node_lng = lat[node], lng[node]
+            dy_t = (t_lat - node_lat) * METERS_PER_DEGREE
+            dx_t = (t_lng - node_lng) * lng_scale
+            dy_s = (s_lat - node_lat) * METERS_PER_DEGREE
+            dx_s = (s_lng - node_lng) * lng_scale
+            return (sqrt(dy_t * dy_t + dx_t * dx_t) - sqrt(dy_s * dy_s + dx_s * dx_s)) * half_inv_speed
+    else:
+        def potential(node: int) -> float:
+            return 0.0
+
+    forward = compiled.state_pool.acquire(0)
+    backward = compiled.state_pool.acquire(1)
+    f_gen, b_gen = forward.reset(), backward.reset()
+    df, f_parent, f_stamp, f_settled = forward.dist, forward.parent, forward.stamp, forward.settled
+    db, b_parent, b_stamp, b_settled = backward.dist, backward.parent, backward.stamp, backward.settled
+
+    heappush, heappop = heapq.heappush, heapq.heappop
+    f_queue, b_queue = [], []
+    for node, cost in sources:
+        if f_stamp[node] != f_gen or cost < df[node]:
+            df[node], f_parent[node], f_stamp[node] = cost, -1, f_gen
+            heappush(f_queue, (cost + potential(node), cost, node))
+    for node, cost in targets.items():
+        if b_stamp[node] != b_gen or cost < db[node]:
+            db[node], b_parent[node], b_stamp[node] = cost, -1, b_gen
+            heappush(b_queue, (cost - potential(node), cost, node))
+
+    best, meeting = INF, -1
+    visited = [] if visited is None else visited
+
+    while f_queue and b_queue:
+        if f_queue[0][0] + b_queue[0][0] >= best:
+            break
+        if f_queue[0][0] <= b_queue[0][0]:
+            _, d, u = heappop(f_queue)
+            if f_settled[u] == f_gen or d > df[u]:
+                continue
+            f_settled[u] = f_gen
+            visited.append(u)
+            if b_stamp[u] == b_gen and d + db[u] < best:
+                best, meeting = d + db[u], u
+            for e in range(f_offsets[u], f_offsets[u + 1]):
+                v = f_targets[e]
+                nd = d + f_weights[e]
+                if f_stamp[v] != f_gen or nd < df[v]:
+                    df[v], f_parent[v], f_stamp[v] = nd, u, f_gen
+                    heappush(f_queue, (nd + potential(v), nd, v))
+                    if b_stamp[v] == b_gen and nd + db[v] < best:
+                        best, meeting = nd + db[v], v
+        else:
+            _, d, u = heappop(b_queue)
+            if b_settled[u] == b_gen or d > db[u]:
+                continue
+            b_settled[u] = b_gen
+            visited.append(u)
+            if f_stamp[u] == f_gen and d + df[u] < best:
+                best, meeting = d + df[u], u
+            for e in range(b_offsets[u], b_offsets[u + 1]):
+                v = b_targets[e]
+                nd = d + b_weights[e]
+                if b_stamp[v] != b_gen or nd < db[v]:
+                    db[v], b_parent[v], b_stamp[v] = nd, u, b_gen
+                    heappush(b_queue, (nd - potential(v), nd, v))
+                    if f_stamp[v] == f_gen and nd + df[v] < best:
+                        best, meeting = nd + df[v], v
+
+    if meeting < 0:
+        return {"path": [], "cost": INF, "target": -1, "meeting_node": -1,
+                "visited_count": len(visited), "visited": visited}
+
+    # Forward half from the seed to the meeting node, backward half on to the target
+    path = forward.path_from_root(meeting)
+    node = b_parent[meeting]
+    while node >= 0:
+        path.append(node)
+        node = b_parent[node]
+    return {"path": path, "cost": best, "target": path[-1], "meeting_node": meeting,
+            "visited_count": len(visited), "visited": visited}
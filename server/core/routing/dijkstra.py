@@ -1,11 +1,17 @@
 import networkx as nx
 import heapq
 import logging
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Callable, Union
+import numpy as np
 import osmnx as ox
 import time as time_module
-from geopy.distance import geodesic
-from core.routing.graph_builder import densify_route_path
+from utils.geo_helpers import haversine, polyline_length, convex_hull
+from core.routing.compiled import CompiledGraph
+from core.routing.alternatives import alternative_routes
+from core.routing.csr_search import (dijkstra_csr, dijkstra_csr_seeded, bidirectional_csr_seeded, dijkstra_csr_bounded,
+                                     best_first_csr)
+from core.routing.edge_index import EdgeRouteEndpoints, EdgeSnap, EdgeSpatialIndex, assemble_route_coords
+from core.routing.geometry_store import EdgeGeometryStore
 
 # Check if CuPy is available
 try:
@@ -21,10 +27,36 @@ class DijkstraRouter:
     Dijkstra's algorithm implementation for comparison with A* performance.
     """
     
-    def __init__(self, graph: nx.MultiDiGraph, traffic_provider=None):
-        self.graph = graph
+    def __init__(self, graph: Union[nx.MultiDiGraph, Callable[[], nx.MultiDiGraph]], traffic_provider=None,
+                 compiled: CompiledGraph = None,
+                 geometry: Union[EdgeGeometryStore, Callable[[], EdgeGeometryStore]] = None):
+        self._graph = graph  # NetworkX graph, or a callable that materializes it for the legacy search
         self.traffic_provider = traffic_provider
-        logger.info(f"DijkstraRouter initialized with graph containing {len(self.graph.nodes)} nodes and {len(self.graph.edges)} edges.")
+        self.compiled = compiled  # Array-backed view used by the compiled search mode
+        self._geometry = geometry  # Flattened edge geometry, or a callable that loads it on first use
+        if compiled is not None:
+            logger.info(f"DijkstraRouter initialized with compiled graph containing {compiled.num_nodes} nodes "
+                        f"and {compiled.num_edges} edges.")
+        else:
+            logger.info(f"DijkstraRouter initialized with graph containing {len(self.graph.nodes)} nodes and {len(self.graph.edges)} edges.")
+
+    @property
+    def graph(self) -> nx.MultiDiGraph:
+        """The NetworkX graph, materialized on first use (only the legacy search and helpers need it)."""
+        if callable(self._graph):
+            self._graph = self._graph()
+        return self._graph
+
+    @property
+    def geometry(self) -> EdgeGeometryStore:
+        """Flattened edge geometry for route densification, built from the graph if none was given."""
+        if callable(self._geometry):
+            self._geometry = self._geometry()
+        if self._geometry is None:
+            if self.compiled is None:
+                self.compiled = CompiledGraph.from_graph(self.graph)
+            self._geometry = EdgeGeometryStore.build(self.compiled, graph=self.graph)
+        return self._geometry
 
     def interpolate_point_on_edge(self, graph, edge, point):
         """
@@ -46,11 +78,12 @@ class DijkstraRouter:
         v_point = (graph.nodes[v]['y'], graph.nodes[v]['x'])
         
         # Calculate the interpolation
-        total_dist = geodesic(u_point, v_point).meters
+        total_dist, u_dist = haversine(
+            u_point[0], u_point[1], [v_point[0], point[0]], [v_point[1], point[1]]
+        )
         if total_dist == 0:
             return u_point
             
-        u_dist = geodesic(u_point, point).meters
         ratio = u_dist / total_dist
         
         # Interpolate the point
@@ -59,7 +92,14 @@ class DijkstraRouter:
         
         return (lat, lon)
 
-    def find_route(self, start_node: int, end_node: int) -> dict:
+    def find_route(self, start_node: int, end_node: int, use_compiled: bool = None,
+                   bidirectional: bool = False, queue: str = "heapq", visited: List[int] = None) -> dict:
+        if use_compiled is None:
+            use_compiled = self.compiled is not None
+        if use_compiled or bidirectional or queue != "heapq" or visited is not None:
+            return self.find_route_compiled(start_node, end_node, bidirectional=bidirectional, queue=queue,
+                                            visited=visited)
+
         start_time = time_module.perf_counter()
         logger.info(f"Finding route from node {start_node} to node {end_node} using Dijkstra's algorithm.")
         logger.info(f"Starting Dijkstra search from node {start_node} to node {end_node}.")
@@ -128,8 +168,7 @@ class DijkstraRouter:
         logger.info(f"Route found with distance {distance:.2f} km and time {time:.2f} minutes. Visited {visited_count} nodes.")
         elapsed = time_module.perf_counter() - start_time
 
-        densified_route = densify_route_path(self.graph, path)
-        route_coords = [[pt['lat'], pt['lng']] for pt in densified_route]
+        route_coords = self.geometry.densify_nodes(path).tolist()
 
         return {
             "algorithm": "Dijkstra",
@@ -140,6 +179,245 @@ class DijkstraRouter:
             "visited_nodes": list(visited)
         }
     
+    def find_route_compiled(self, start_node: int, end_node: int, bidirectional: bool = False,
+                            queue: str = "heapq", visited: List[int] = None) -> dict:
+        """
+        Dijkstra on the compiled CSR arrays; same result format as find_route.
+        With bidirectional, searches from both ends (see bidirectional_csr_seeded);
+        otherwise queue picks the priority queue (core/routing/priority_queues.py).
+        Settled nodes are appended to visited, if given, while the search runs.
+        """
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        compiled = self.compiled
+        algorithm = "Bidirectional Dijkstra" if bidirectional else "Dijkstra"
+
+        start_time = time_module.perf_counter()
+        source, target = compiled.node_index(start_node), compiled.node_index(end_node)
+        if bidirectional:
+            search = bidirectional_csr_seeded(compiled, [(source, 0.0)], {target: 0.0}, visited=visited)
+        elif queue != "heapq":
+            search = best_first_csr(compiled, [(source, 0.0)], {target: 0.0}, queue=queue, visited=visited)
+        else:
+            search = dijkstra_csr(compiled, source, target, visited=visited)
+
+        if not search["path"]:
+            logger.warning(f"No route found from node {start_node} to node {end_node}.")
+            return {
+                "algorithm": algorithm,
+                "time": 0,
+                "nodes": 0,
+                "distance": 0,
+                "route": []
+            }
+
+        distance, time = compiled.path_metrics(search["path"])
+        elapsed = time_module.perf_counter() - start_time
+        logger.info(f"Route found (compiled {algorithm}) with distance {distance:.2f} km and time {time:.2f} minutes. "
+                    f"Visited {search['visited_count']} nodes.")
+
+        route_coords = self.geometry.densify_path(search["path"]).tolist()
+
+        return {
+            "algorithm": algorithm,
+            "time": elapsed,
+            "nodes": search["visited_count"],
+            "distance": distance,
+            "route": route_coords,
+            "visited_nodes": compiled.to_node_ids(search["visited"])
+        }
+
+    def find_route_from_snaps(self, endpoints: EdgeRouteEndpoints, bidirectional: bool = False,
+                              queue: str = "heapq", visited: List[int] = None) -> dict:
+        """
+        Dijkstra between two points snapped onto edges, starting and ending
+        mid-edge with partial edge costs. Same result format as find_route.
+        """
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        compiled = self.compiled
+        algorithm = "Bidirectional Dijkstra" if bidirectional else "Dijkstra"
+
+        start_time = time_module.perf_counter()
+        if bidirectional:
+            search = bidirectional_csr_seeded(compiled, endpoints.sources, endpoints.targets, visited=visited)
+        elif queue != "heapq":
+            search = best_first_csr(compiled, endpoints.sources, endpoints.targets, queue=queue, visited=visited)
+        else:
+            search = dijkstra_csr_seeded(compiled, endpoints.sources, endpoints.targets, visited=visited)
+        resolved = endpoints.resolve(search)
+
+        if resolved is None:
+            logger.warning(f"No route found from edge {endpoints.source.edge} to edge {endpoints.dest.edge}.")
+            return {
+                "algorithm": algorithm,
+                "time": 0,
+                "nodes": 0,
+                "distance": 0,
+                "route": []
+            }
+
+        distance, time = resolved["length"] / 1000.0, resolved["cost"] / 60.0
+        elapsed = time_module.perf_counter() - start_time
+        logger.info(f"Route found (edge-snapped {algorithm}) with distance {distance:.2f} km and time {time:.2f} minutes. "
+                    f"Visited {search['visited_count']} nodes.")
+
+        return {
+            "algorithm": algorithm,
+            "time": elapsed,
+            "nodes": search["visited_count"],
+            "distance": distance,
+            "route": assemble_route_coords(self.geometry, resolved),
+            "visited_nodes": compiled.to_node_ids(search["visited"])
+        }
+
+    def find_alternatives(self, start_node: int, end_node: int, k: int = 3) -> dict:
+        """
+        Up to k distinct routes between two graph nodes, fastest first, from
+        one forward and one backward search tree (see alternative_routes).
+
+        Returns:
+            dict with 'algorithm', 'time', 'nodes' (settled count) and 'routes',
+            each with 'distance' (km), 'time_mins', 'route', 'stretch',
+            'overlap' and 'method'
+        """
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        compiled = self.compiled
+
+        start_time = time_module.perf_counter()
+        search = alternative_routes(compiled, [(compiled.node_index(start_node), 0.0)],
+                                    {compiled.node_index(end_node): 0.0}, k)
+        elapsed = time_module.perf_counter() - start_time
+
+        routes = []
+        for alternative in search["routes"]:
+            distance, _ = compiled.path_metrics(alternative["path"])
+            route_coords = self.geometry.densify_path(alternative["path"]).tolist()
+            routes.append(self._alternative_entry(alternative, distance, route_coords))
+        return self._alternatives_result(routes, search["visited_count"], elapsed)
+
+    def find_alternatives_from_snaps(self, endpoints: EdgeRouteEndpoints, k: int = 3) -> dict:
+        """Alternatives between two points snapped onto edges; same result format as find_alternatives."""
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        compiled = self.compiled
+
+        start_time = time_module.perf_counter()
+        search = alternative_routes(compiled, endpoints.sources, endpoints.targets, k)
+        elapsed = time_module.perf_counter() - start_time
+
+        routes = []
+        for rank, alternative in enumerate(search["routes"]):
+            # Only the fastest route may be replaced by the direct trip along a shared edge
+            resolved = endpoints.resolve(alternative, allow_direct=rank == 0)
+            routes.append(self._alternative_entry(dict(alternative, cost=resolved["cost"]), resolved["length"] / 1000.0,
+                                                  assemble_route_coords(self.geometry, resolved)))
+        return self._alternatives_result(routes, search["visited_count"], elapsed)
+
+    @staticmethod
+    def _alternative_entry(alternative: Dict[str, Any], distance: float, route: List[List[float]]) -> dict:
+        return {
+            "distance": distance,
+            "time_mins": alternative["cost"] / 60.0,
+            "route": route,
+            "stretch": alternative["stretch"],
+            "overlap": alternative["overlap"],
+            "method": alternative["method"],
+        }
+
+    @staticmethod
+    def _alternatives_result(routes: List[dict], visited_count: int, elapsed: float) -> dict:
+        logger.info(f"Found {len(routes)} alternative routes, settled {visited_count} nodes in {elapsed:.4f}s.")
+        return {
+            "algorithm": "Alternatives",
+            "time": elapsed,
+            "nodes": visited_count,
+            "routes": routes,
+        }
+
+    def find_reachable(self, start_nodes: List[int], band_minutes: List[float]) -> dict:
+        """
+        Isochrones: one multi-source Dijkstra from all start nodes, cut off at
+        the largest band. A node belongs to a band if its travel time from the
+        nearest start node is within the band.
+
+        Args:
+            start_nodes: Graph node ids (e.g. hospitals or depots)
+            band_minutes: Band limits in minutes, e.g. [8, 12, 15]
+
+        Returns:
+            dict with 'algorithm', 'time', 'nodes' (settled count) and 'bands';
+            each band has one hull per start node, over the area it reaches first
+        """
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        compiled = self.compiled
+        seeds = [(compiled.node_index(node), 0.0) for node in start_nodes]
+        return self._reachable(seeds, list(range(len(seeds))), len(seeds), band_minutes)
+
+    def find_reachable_from_snaps(self, edge_index: EdgeSpatialIndex, snaps: List[EdgeSnap],
+                                  band_minutes: List[float]) -> dict:
+        """Isochrones from points snapped onto edges, seeded with the partial edge costs."""
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        seeds, seed_sources = [], []
+        for source, snap in enumerate(snaps):
+            for node, (cost, _) in edge_index.departure_legs(snap).items():
+                seeds.append((node, cost))
+                seed_sources.append(source)
+        return self._reachable(seeds, seed_sources, len(snaps), band_minutes)
+
+    def _reachable(self, seeds: List[Tuple[int, float]], seed_sources: List[int], num_sources: int,
+                   band_minutes: List[float]) -> dict:
+        compiled = self.compiled
+        limits = sorted(set(float(m) * 60.0 for m in band_minutes))
+        start_time = time_module.perf_counter()
+        search = dijkstra_csr_bounded(compiled, seeds, limits[-1])
+        elapsed = time_module.perf_counter() - start_time
+
+        nodes = np.asarray(search["nodes"], dtype=np.int64)
+        costs = np.asarray(search["costs"], dtype=np.float64)
+        sources = np.asarray(seed_sources, dtype=np.int64)[np.asarray(search["origins"], dtype=np.int64)]
+        # Outgoing edges of every reached node, to place the band borders mid-edge
+        degrees = compiled.offsets[nodes + 1] - compiled.offsets[nodes]
+        edge_tails = np.repeat(np.arange(len(nodes)), degrees)
+        edge_positions = (np.repeat(compiled.offsets[nodes] - np.cumsum(degrees) + degrees, degrees)
+                          + np.arange(degrees.sum()))
+
+        bands = []
+        previous = 0
+        for limit in limits:
+            # Settled nodes come in cost order, so each band is a prefix
+            count = int(np.searchsorted(costs, limit, side="right"))
+            tails = edge_tails[edge_tails < count]
+            positions = edge_positions[edge_tails < count]
+            weights = compiled.weights[positions]
+            crossing = costs[tails] + weights > limit
+            tails, positions, weights = tails[crossing], positions[crossing], weights[crossing]
+            fraction = np.where(weights > 0, (limit - costs[tails]) / np.where(weights > 0, weights, 1.0), 0.0)
+            u, v = nodes[tails], compiled.targets[positions]
+
+            lat = np.concatenate([compiled.lat[nodes[:count]], compiled.lat[u] + fraction * (compiled.lat[v] - compiled.lat[u])])
+            lng = np.concatenate([compiled.lng[nodes[:count]], compiled.lng[u] + fraction * (compiled.lng[v] - compiled.lng[u])])
+            owner = np.concatenate([sources[:count], sources[tails]])
+            bands.append({
+                "minutes": limit / 60.0,
+                "node_count": count,
+                "nodes": compiled.to_node_ids(nodes[previous:count]),  # newly reachable in this band
+                "polygons": [convex_hull(lat[owner == source], lng[owner == source]) for source in range(num_sources)],
+            })
+            previous = count
+
+        logger.info(f"Isochrones from {num_sources} sources up to {limits[-1] / 60.0:.1f} minutes: "
+                    f"settled {len(nodes)} nodes in {elapsed:.4f}s.")
+        return {
+            "algorithm": "Bounded Dijkstra",
+            "time": elapsed,
+            "nodes": search["visited_count"],
+            "bands": bands,
+        }
+
     def _calculate_route_metrics(self, path: List[int]) -> Tuple[float, float]:
         """Calculate total distance (km) and time (minutes) for the route."""
         if not path or len(path) < 2:
@@ -181,13 +459,7 @@ class DijkstraRouter:
         
         # Calculate the path distance
         if node_count > 1:
-            distance_meters = sum(
-                ox.distance.great_circle(
-                    self.graph.nodes[path[i]]["y"], self.graph.nodes[path[i]]["x"],
-                    self.graph.nodes[path[i + 1]]["y"], self.graph.nodes[path[i + 1]]["x"]
-                )
-                for i in range(len(path) - 1)
-            )
+            distance_meters = polyline_length(self._get_path_coordinates(path))
             distance_km = distance_meters / 1000
         else:
             distance_km = 0
@@ -466,12 +738,7 @@ class DijkstraRouter:
         
         # Calculate the path distance
         if len(complete_path) > 1:
-            from geopy.distance import geodesic
-            distance_meters = sum(
-                geodesic(point1, point2).meters
-                for point1, point2 in zip(complete_path[:-1], complete_path[1:])
-            )
-            distance_km = distance_meters / 1000
+            distance_km = polyline_length(complete_path) / 1000
         else:
             distance_km = 0
         
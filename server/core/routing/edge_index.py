@@ -0,0 +1,324 @@
+"""
+Edge-level spatial index: snap coordinates onto the nearest road edge.
+
+Snapping to the nearest node often picks a node across a divider or on the
+opposite carriageway. Instead we find the nearest point on the edge
+geometry, and routes start and end mid-edge with partial edge costs.
+
+Edge geometry is split into short pieces whose midpoints go into a KD-tree;
+a query takes the nearest piece as an upper bound and then projects exactly
+onto every segment within that bound (plus half a piece length).
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import networkx as nx
+from scipy.spatial import cKDTree
+
+from core.routing.compiled import CompiledGraph
+from core.routing.geometry_store import EdgeGeometryStore
+from utils.geo_helpers import project_equirectangular, unproject_equirectangular
+
+logger = logging.getLogger(__name__)
+
+PIECE_LENGTH_M = 40.0  # Max length of an indexed piece; bounds the candidate radius
+
+
+class EdgeSnap:
+    """
+    A point projected onto a collapsed edge.
+
+    Attributes:
+        edge: Collapsed edge position in the compiled graph
+        u, v: Compiled indices of the edge's end nodes
+        segment: Index of the geometry segment the projection lies on
+        fraction: Position along the edge geometry, 0 at u and 1 at v
+        point: Projected (lat, lng)
+        distance_m: Distance from the query point to the projection
+    """
+
+    __slots__ = ("edge", "u", "v", "segment", "fraction", "point", "distance_m")
+
+    def __init__(self, edge: int, u: int, v: int, segment: int, fraction: float,
+                 point: Tuple[float, float], distance_m: float):
+        self.edge = edge
+        self.u = u
+        self.v = v
+        self.segment = segment
+        self.fraction = fraction
+        self.point = point
+        self.distance_m = distance_m
+
+    @property
+    def nearest_node(self) -> int:
+        """Compiled index of the closer end node."""
+        return self.u if self.fraction <= 0.5 else self.v
+
+    def __repr__(self) -> str:
+        return (f"EdgeSnap(edge={self.edge}, u={self.u}, v={self.v}, "
+                f"fraction={self.fraction:.3f}, distance_m={self.distance_m:.1f})")
+
+
+class EdgeSpatialIndex:
+    """KD-tree over pieces of every collapsed edge's geometry."""
+
+    def __init__(self, compiled: CompiledGraph, geometry: EdgeGeometryStore,
+                 piece_length_m: float = PIECE_LENGTH_M):
+        start = time.perf_counter()
+        self.compiled = compiled
+        self.geometry = geometry
+        self.twin = geometry.twin
+        self.ref_lat = float(compiled.lat.mean()) if compiled.num_nodes else 0.0
+        self._sources = compiled.sources()
+
+        # Two-way roads are two edges with mirrored geometry, stored once (see
+        # EdgeGeometryStore). Only the edge owning the points is indexed, so snaps
+        # are normalised onto it and both endpoints of a trip agree
+        coords = geometry.coords
+        xy = project_equirectangular(coords[:, 0], coords[:, 1], self.ref_lat)
+        owned = np.flatnonzero(~geometry.reversed)
+        counts = geometry.counts[owned]
+        seg_counts = np.maximum(counts - 1, 0)
+
+        # A segment starts at every stored point except the last one of each edge
+        is_last = np.zeros(len(xy), dtype=bool)
+        is_last[(geometry.starts[owned] + counts - 1)[counts > 0]] = True
+        seg_start = np.flatnonzero(~is_last)
+        self.seg_edge = np.repeat(owned, seg_counts)
+        self.seg_index = seg_start - geometry.starts[self.seg_edge]  # Segment number within its edge
+        self.seg_a = xy[seg_start]
+        self.seg_b = xy[seg_start + 1]
+        seg_vec = self.seg_b - self.seg_a
+        self.seg_len = np.hypot(seg_vec[:, 0], seg_vec[:, 1])
+
+        # Distance along the edge geometry before each segment, and total geometry length
+        cum_before = np.cumsum(self.seg_len) - self.seg_len
+        first_seg = np.cumsum(seg_counts) - seg_counts
+        self.seg_before = cum_before - cum_before[np.repeat(first_seg, seg_counts)]
+        self.edge_geom_len = np.bincount(self.seg_edge, weights=self.seg_len, minlength=compiled.num_edges)
+        self.edge_geom_len[geometry.reversed] = self.edge_geom_len[self.twin[geometry.reversed]]
+
+        # Split segments into pieces no longer than piece_length_m and index their midpoints
+        n_pieces = np.maximum(1, np.ceil(self.seg_len / piece_length_m)).astype(np.int64)
+        self.piece_seg = np.repeat(np.arange(len(seg_start)), n_pieces)
+        piece_no = np.arange(len(self.piece_seg)) - np.repeat(np.cumsum(n_pieces) - n_pieces, n_pieces)
+        t_mid = (piece_no + 0.5) / n_pieces[self.piece_seg]
+        midpoints = self.seg_a[self.piece_seg] + t_mid[:, None] * seg_vec[self.piece_seg]
+        self.half_piece = float((self.seg_len / n_pieces).max() / 2) if len(n_pieces) else 0.0
+        self.tree = cKDTree(midpoints)
+        logger.info(
+            f"Edge spatial index built over {len(seg_start)} segments ({len(self.piece_seg)} pieces) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, snapshot=None, graph: nx.MultiDiGraph = None) -> "EdgeSpatialIndex":
+        return cls(compiled, EdgeGeometryStore.build(compiled, snapshot=snapshot, graph=graph))
+
+    def edge_coords(self, edge: int) -> np.ndarray:
+        return self.geometry.edge_points(edge)
+
+    def snap(self, point: Tuple[float, float]) -> EdgeSnap:
+        """Project a (lat, lng) point onto the nearest edge."""
+        return self.snap_points(np.array([point]))[0]
+
+    def snap_points(self, points: np.ndarray) -> List[EdgeSnap]:
+        """
+        Snap an (M, 2) array of (lat, lng) points. The KD-tree lookups run
+        in bulk; only the exact projection onto the candidates is per point.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        queries = project_equirectangular(points[:, 0], points[:, 1], self.ref_lat)
+        _, nearest = self.tree.query(queries)
+        bounds = np.array([self._segment_distances(q, np.array([self.piece_seg[piece]]))[0][0]
+                           for q, piece in zip(queries, nearest)])
+        neighbourhoods = self.tree.query_ball_point(queries, bounds + self.half_piece + 1e-6)
+        return [self._snap_projected(q, pieces) for q, pieces in zip(queries, neighbourhoods)]
+
+    def _snap_projected(self, q: np.ndarray, pieces: List[int]) -> EdgeSnap:
+        """Exact projection of the projected point q onto the segments of the candidate pieces."""
+        candidates = np.unique(self.piece_seg[pieces])
+        distances, t, projected = self._segment_distances(q, candidates)
+        best = int(np.argmin(distances))
+        seg = int(candidates[best])
+
+        edge = int(self.seg_edge[seg])
+        geom_len = self.edge_geom_len[edge]
+        fraction = float((self.seg_before[seg] + t[best] * self.seg_len[seg]) / geom_len) if geom_len > 0 else 0.0
+        segment = int(self.seg_index[seg])
+
+        lat, lng = unproject_equirectangular(projected[best], self.ref_lat)[0]
+        return EdgeSnap(edge, int(self._sources[edge]), int(self.compiled.targets[edge]),
+                        segment, fraction, (float(lat), float(lng)), float(distances[best]))
+
+    def departure_legs(self, snap: EdgeSnap) -> Dict[int, Tuple[float, float]]:
+        """Nodes reachable from the snapped point along its own edge: node -> (cost, length)."""
+        weights, lengths = self.compiled.weights, self.compiled.lengths
+        e, r = snap.edge, self.twin[snap.edge]
+        legs = {snap.v: (float((1 - snap.fraction) * weights[e]), float((1 - snap.fraction) * lengths[e]))}
+        if r >= 0:
+            _add_cheaper(legs, snap.u, snap.fraction * weights[r], snap.fraction * lengths[r])
+        return legs
+
+    def arrival_legs(self, snap: EdgeSnap) -> Dict[int, Tuple[float, float]]:
+        """Nodes the snapped point can be reached from along its own edge: node -> (cost, length)."""
+        weights, lengths = self.compiled.weights, self.compiled.lengths
+        e, r = snap.edge, self.twin[snap.edge]
+        legs = {snap.u: (float(snap.fraction * weights[e]), float(snap.fraction * lengths[e]))}
+        if r >= 0:
+            _add_cheaper(legs, snap.v, (1 - snap.fraction) * weights[r], (1 - snap.fraction) * lengths[r])
+        return legs
+
+    def direct_leg(self, source: EdgeSnap, dest: EdgeSnap) -> Optional[Tuple[float, float]]:
+        """(cost, length) of driving straight from source to dest on a shared edge, if possible."""
+        if source.edge != dest.edge:
+            return None
+        weights, lengths = self.compiled.weights, self.compiled.lengths
+        e = source.edge
+        if dest.fraction >= source.fraction:
+            delta = dest.fraction - source.fraction
+            return float(delta * weights[e]), float(delta * lengths[e])
+        r = self.twin[e]
+        if r < 0:
+            return None
+        delta = source.fraction - dest.fraction
+        return float(delta * weights[r]), float(delta * lengths[r])
+
+    def _segment_distances(self, q: np.ndarray, segments: np.ndarray):
+        a, b = self.seg_a[segments], self.seg_b[segments]
+        ab = b - a
+        denom = np.einsum('ij,ij->i', ab, ab)
+        t = np.where(denom > 0, np.einsum('ij,ij->i', q - a, ab) / np.where(denom > 0, denom, 1), 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        projected = a + t[:, None] * ab
+        return np.hypot(*(projected - q).T), t, projected
+
+    def head_coords(self, snap: EdgeSnap) -> List[List[float]]:
+        """Geometry from the edge's start node u to the projected point."""
+        coords = self.edge_coords(snap.edge)[:snap.segment + 1].tolist()
+        coords.append(list(snap.point))
+        return coords
+
+    def tail_coords(self, snap: EdgeSnap) -> List[List[float]]:
+        """Geometry from the projected point to the edge's end node v."""
+        return [list(snap.point)] + self.edge_coords(snap.edge)[snap.segment + 1:].tolist()
+
+
+class EdgeRouteEndpoints:
+    """
+    Seeds for a search that starts and ends mid-edge, and the partial legs
+    (cost, length, geometry) that join the projected points to the node path.
+    """
+
+    def __init__(self, edge_index: EdgeSpatialIndex, source: EdgeSnap, dest: EdgeSnap):
+        compiled = edge_index.compiled
+        weights, lengths = compiled.weights, compiled.lengths
+        twin = edge_index.twin
+        self.compiled = compiled
+        self.source = source
+        self.dest = dest
+        self._source_legs: Dict[int, Tuple[float, float, List[List[float]]]] = {}
+        self._target_legs: Dict[int, Tuple[float, float, List[List[float]]]] = {}
+
+        e = source.edge
+        self._add_leg(self._source_legs, source.v, (1 - source.fraction) * weights[e],
+                      (1 - source.fraction) * lengths[e], edge_index.tail_coords(source))
+        r = twin[e]
+        if r >= 0:
+            self._add_leg(self._source_legs, source.u, source.fraction * weights[r],
+                          source.fraction * lengths[r], edge_index.head_coords(source)[::-1])
+
+        e = dest.edge
+        self._add_leg(self._target_legs, dest.u, dest.fraction * weights[e],
+                      dest.fraction * lengths[e], edge_index.head_coords(dest))
+        r = twin[e]
+        if r >= 0:
+            self._add_leg(self._target_legs, dest.v, (1 - dest.fraction) * weights[r],
+                          (1 - dest.fraction) * lengths[r], edge_index.tail_coords(dest)[::-1])
+
+        # Both points on the same road: the trip may not need the graph at all
+        self.direct: Optional[Tuple[float, float, List[List[float]]]] = None
+        if source.edge == dest.edge:
+            e = source.edge
+            coords = edge_index.edge_coords(e)
+            if dest.fraction >= source.fraction:
+                delta = dest.fraction - source.fraction
+                inner = coords[source.segment + 1:dest.segment + 1].tolist()
+                self.direct = (delta * weights[e], delta * lengths[e],
+                               [list(source.point)] + inner + [list(dest.point)])
+            else:
+                r = twin[e]
+                if r >= 0:
+                    delta = source.fraction - dest.fraction
+                    inner = coords[dest.segment + 1:source.segment + 1].tolist()[::-1]
+                    self.direct = (delta * weights[r], delta * lengths[r],
+                                   [list(source.point)] + inner + [list(dest.point)])
+
+    @staticmethod
+    def _add_leg(legs, node, cost, length, coords):
+        if node not in legs or cost < legs[node][0]:
+            legs[node] = (float(cost), float(length), coords)
+
+    @property
+    def sources(self) -> List[Tuple[int, float]]:
+        return [(node, leg[0]) for node, leg in self._source_legs.items()]
+
+    @property
+    def targets(self) -> Dict[int, float]:
+        return {node: leg[0] for node, leg in self._target_legs.items()}
+
+    def resolve(self, search: Dict[str, Any], allow_direct: bool = True,
+                direct_factor: float = 1.0) -> Optional[Dict[str, Any]]:
+        """
+        Combine a seeded search result with the partial legs. With allow_direct
+        false the graph path is used even if the direct trip along the shared
+        edge is faster. direct_factor scales the direct trip's free-flow cost,
+        for searches on other weights (e.g. a traffic profile at departure).
+
+        Returns:
+            dict with 'path' (compiled indices, possibly empty for a direct
+            trip), 'prefix' and 'suffix' coordinates, 'cost' (seconds) and
+            'length' (metres, legs included), or None if the destination is unreachable
+        """
+        found = bool(search.get("path"))
+        if allow_direct and self.direct is not None and (not found or self.direct[0] * direct_factor <= search["cost"]):
+            cost, length, coords = self.direct
+            return {"path": [], "prefix": coords, "suffix": [], "cost": cost * direct_factor, "length": length}
+        if not found:
+            return None
+
+        path = search["path"]
+        _, source_length, prefix = self._source_legs[path[0]]
+        _, target_length, suffix = self._target_legs[path[-1]]
+        path_length = float(self.compiled.lengths[self.compiled.path_edges(path)].sum()) if len(path) > 1 else 0.0
+        return {
+            "path": path,
+            "prefix": prefix,
+            "suffix": suffix,
+            "cost": search["cost"],
+            "length": source_length + path_length + target_length,
+        }
+
+
+def _add_cheaper(legs: Dict[int, Tuple[float, float]], node: int, cost: float, length: float) -> None:
+    if node not in legs or cost < legs[node][0]:
+        legs[node] = (float(cost), float(length))
+
+
+def assemble_route_coords(geometry: EdgeGeometryStore, resolved: Dict[str, Any]) -> List[List[float]]:
+    """Join the partial legs and the densified node path into one [lat, lng] list."""
+    coords: List[List[float]] = []
+
+    def extend(points):
+        for point in points:
+            if not coords or coords[-1] != point:
+                coords.append(point)
+
+    extend(resolved["prefix"])
+    path = resolved["path"]
+    if len(path) > 1:
+        extend(geometry.densify_path(path).tolist())
+    extend(resolved["suffix"])
+    return coords
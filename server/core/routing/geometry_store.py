@@ -0,0 +1,184 @@
+"""
+Flattened edge geometry of the compiled graph.
+
+The polyline of every collapsed edge lives in one contiguous (lat, lng)
+array, addressed by a start offset and a point count per edge. Two-way roads
+whose geometries mirror each other store their points once: the later edge
+of the pair shares its twin's range and carries a reversed flag.
+
+Densifying a route is then one gather over the path's edge positions,
+returning an (N, 2) array, instead of walking the NetworkX edge dicts and
+Shapely objects point by point (graph_builder.densify_route_path).
+"""
+import logging
+import time
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import networkx as nx
+
+from core.routing.compiled import CompiledGraph
+
+logger = logging.getLogger(__name__)
+
+
+def compiled_edge_polylines(compiled: CompiledGraph, snapshot=None,
+                            graph: nx.MultiDiGraph = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flattened (lat, lng) geometry of every collapsed edge of a compiled graph.
+
+    Args:
+        compiled: Compiled graph
+        snapshot: Snapshot the graph was compiled from (preferred, fully vectorised)
+        graph: NetworkX graph the compiled view was built from
+
+    Returns:
+        (geom_offsets, geom_coords): the points of edge e are
+        geom_coords[geom_offsets[e]:geom_offsets[e + 1]]
+    """
+    if snapshot is not None:
+        refs = compiled.edge_refs
+        starts = np.asarray(snapshot.geom_offsets)[refs]
+        counts = np.asarray(snapshot.geom_offsets)[refs + 1] - starts
+        geom_offsets = np.zeros(len(refs) + 1, dtype=np.int64)
+        np.cumsum(counts, out=geom_offsets[1:])
+        gather = np.repeat(starts - geom_offsets[:-1], counts) + np.arange(geom_offsets[-1])
+        return geom_offsets, np.asarray(snapshot.geom_coords)[gather]
+
+    if graph is None:
+        raise ValueError("Either a snapshot or the NetworkX graph is required")
+
+    node_ids = compiled.node_ids.tolist()
+    lat, lng = compiled.lat_list, compiled.lng_list
+    parts, counts = [], []
+    for u, v, k in zip(compiled.sources().tolist(), compiled.targets_list, compiled.edge_keys.tolist()):
+        data = graph[node_ids[u]][node_ids[v]][k]
+        if 'geometry' in data:
+            coords = np.asarray(data['geometry'].coords, dtype=np.float64)[:, ::-1]
+        else:
+            coords = np.array([[lat[u], lng[u]], [lat[v], lng[v]]], dtype=np.float64)
+        parts.append(coords)
+        counts.append(len(coords))
+    geom_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=geom_offsets[1:])
+    geom_coords = np.concatenate(parts) if parts else np.zeros((0, 2), dtype=np.float64)
+    return geom_offsets, geom_coords
+
+
+def find_mirrored_twins(compiled: CompiledGraph, geom_offsets: np.ndarray, geom_coords: np.ndarray) -> np.ndarray:
+    """twin[e] is the reverse edge of e when it has the mirrored geometry, else -1."""
+    twin = np.full(compiled.num_edges, -1, dtype=np.int64)
+    if compiled.num_edges == 0:
+        return twin
+    sources, targets = compiled.sources().astype(np.int64), compiled.targets.astype(np.int64)
+    keys = sources * compiled.num_nodes + targets
+    reverse_keys = targets * compiled.num_nodes + sources
+    order = np.argsort(keys)
+    found = np.minimum(np.searchsorted(keys[order], reverse_keys), len(order) - 1)
+    candidate = order[found]
+
+    counts = np.diff(geom_offsets)
+    pairs = np.flatnonzero((keys[candidate] == reverse_keys) & (counts == counts[candidate]))
+    if len(pairs) == 0:
+        return twin
+    mirrors = candidate[pairs]
+
+    # Compare every point of e with the reversed points of its candidate twin
+    pair_counts = counts[pairs]
+    pair_starts = np.zeros(len(pairs), dtype=np.int64)
+    np.cumsum(pair_counts[:-1], out=pair_starts[1:])
+    step = np.arange(pair_counts.sum()) - np.repeat(pair_starts, pair_counts)
+    forward = np.repeat(geom_offsets[pairs], pair_counts) + step
+    backward = np.repeat(geom_offsets[mirrors + 1] - 1, pair_counts) - step
+    same = np.all(np.isclose(geom_coords[forward], geom_coords[backward], rtol=0, atol=1e-9), axis=1)
+    mirrored = np.minimum.reduceat(same, pair_starts)
+    twin[pairs[mirrored]] = mirrors[mirrored]
+    return twin
+
+
+class EdgeGeometryStore:
+    """
+    Contiguous geometry of every collapsed edge.
+
+    Attributes:
+        coords: (P, 2) float64 (lat, lng) points; a mirrored pair of edges is stored once
+        starts: First point of each edge's range in coords
+        counts: Number of points of each edge
+        reversed: Whether the edge reads its range backwards (the range is its twin's)
+        twin: Reverse edge with the mirrored geometry, or -1
+    """
+
+    def __init__(self, compiled: CompiledGraph, geom_offsets: np.ndarray, geom_coords: np.ndarray):
+        start = time.perf_counter()
+        geom_offsets = np.asarray(geom_offsets, dtype=np.int64)
+        geom_coords = np.asarray(geom_coords, dtype=np.float64)
+        self.compiled = compiled
+        self.twin = find_mirrored_twins(compiled, geom_offsets, geom_coords)
+        self.counts = np.diff(geom_offsets)
+        self.reversed = (self.twin >= 0) & (self.twin < np.arange(len(self.counts)))
+
+        owned_counts = np.where(self.reversed, 0, self.counts)
+        self.starts = np.cumsum(owned_counts) - owned_counts
+        self.starts[self.reversed] = self.starts[self.twin[self.reversed]]
+        self.coords = np.ascontiguousarray(geom_coords[np.repeat(~self.reversed, self.counts)])
+        logger.info(
+            f"Edge geometry store built: {len(self.coords)} points for {len(self.counts)} edges "
+            f"({int(self.reversed.sum())} shared with their twin) in {time.perf_counter() - start:.2f}s"
+        )
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, snapshot=None, graph: nx.MultiDiGraph = None) -> "EdgeGeometryStore":
+        geom_offsets, geom_coords = compiled_edge_polylines(compiled, snapshot=snapshot, graph=graph)
+        return cls(compiled, geom_offsets, geom_coords)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.coords.nbytes + self.starts.nbytes + self.counts.nbytes + self.reversed.nbytes)
+
+    def edge_points(self, edge: int) -> np.ndarray:
+        """(lat, lng) points of one edge from u to v (a view, reversed for shared ranges)."""
+        start = self.starts[edge]
+        points = self.coords[start:start + self.counts[edge]]
+        return points[::-1] if self.reversed[edge] else points
+
+    def point_indices(self, edges: np.ndarray) -> np.ndarray:
+        """Positions in coords of all points of the given edges, each edge in travel direction."""
+        counts = self.counts[edges]
+        step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        first = np.repeat(self.starts[edges], counts)
+        last = first + np.repeat(counts - 1, counts)
+        return np.where(np.repeat(self.reversed[edges], counts), last - step, first + step)
+
+    def polylines(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-edge (geom_offsets, geom_coords) as returned by compiled_edge_polylines."""
+        geom_offsets = np.zeros(len(self.counts) + 1, dtype=np.int64)
+        np.cumsum(self.counts, out=geom_offsets[1:])
+        return geom_offsets, self.coords[self.point_indices(np.arange(len(self.counts)))]
+
+    def densify(self, edges: Sequence[int]) -> np.ndarray:
+        """
+        Road geometry along a chain of edges.
+
+        Args:
+            edges: Consecutive collapsed edge positions
+
+        Returns:
+            (N, 2) array of (lat, lng); the node shared by consecutive edges appears once
+        """
+        edges = np.asarray(edges, dtype=np.int64)
+        if len(edges) == 0:
+            return np.zeros((0, 2), dtype=np.float64)
+        indices = self.point_indices(edges)
+        joints = np.cumsum(self.counts[edges[:-1]])
+        return self.coords[np.delete(indices, joints)]
+
+    def densify_path(self, path: List[int]) -> np.ndarray:
+        """Road geometry along a path of compiled node indices, as an (N, 2) array of (lat, lng)."""
+        if len(path) < 2:
+            return np.zeros((0, 2), dtype=np.float64)
+        return self.densify(self.compiled.path_edges(path))
+
+    def densify_nodes(self, node_path: List[int]) -> np.ndarray:
+        """densify_path for a path of OSM node ids."""
+        index = self.compiled.index
+        return self.densify_path([index[node] for node in node_path])
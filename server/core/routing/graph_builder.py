@@ -240,6 +240,16 @@ def add_random_traffic_to_subgraph(subgraph: nx.MultiDiGraph, min_factor=0.7, ma
     return subgraph
 
 
+def random_traffic_weights(weights: np.ndarray, min_factor=0.7, max_factor=1.5, seed=None) -> np.ndarray:
+    """
+    Array counterpart of add_random_traffic_to_subgraph: scale every edge
+    travel time (e.g. CompiledGraph.weights) by a random traffic factor.
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights * rng.uniform(min_factor, max_factor, len(weights))
+
+
 def visualize_dijkstra_points(subgraph, visited_d, route, source, dest, outdir):
     """
     Plots only Dijkstra visited nodes (blue), source (orange star), and destination (purple star).
@@ -264,7 +274,7 @@ def visualize_dijkstra_points(subgraph, visited_d, route, source, dest, outdir):
     ax.set_title('Dijkstra Visited Nodes (blue)')
     fname = f"dijkstra_{subgraph.nodes[source]['y']:.5f}.{subgraph.nodes[source]['x']:.5f}.{subgraph.nodes[dest]['y']:.5f}.{subgraph.nodes[dest]['x']:.5f}.png"
     outpath = os.path.join(outdir, fname)
-    plt.savefig(outpath, dpi=200, bbox_inches='tight')
+    fig.savefig(outpath, dpi=200, bbox_inches='tight')
     plt.close(fig)
     return outpath
 
@@ -292,7 +302,7 @@ def visualize_astar_points(subgraph, visited_a, route, source, dest, outdir):
     ax.set_title('A* Visited Nodes (green), Route (red)')
     fname = f"astar_{subgraph.nodes[source]['y']:.5f}.{subgraph.nodes[source]['x']:.5f}.{subgraph.nodes[dest]['y']:.5f}.{subgraph.nodes[dest]['x']:.5f}.png"
     outpath = os.path.join(outdir, fname)
-    plt.savefig(outpath, dpi=200, bbox_inches='tight')
+    fig.savefig(outpath, dpi=200, bbox_inches='tight')
     plt.close(fig)
     return outpath
 
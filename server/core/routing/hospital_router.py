@@ -0,0 +1,73 @@
+import logging
+import time as time_module
+from typing import List
+
+from core.routing.compiled import CompiledGraph
+from core.routing.edge_index import EdgeSnap, EdgeSpatialIndex, assemble_route_coords
+from core.routing.geometry_store import EdgeGeometryStore
+from core.routing.hospital_trees import HospitalTrees
+
+logger = logging.getLogger(__name__)
+
+
+class HospitalRouter:
+    """
+    Fastest hospitals from any point, answered from the precomputed
+    shortest-path trees: a column lookup plus a walk along successors.
+    """
+
+    def __init__(self, geometry: EdgeGeometryStore, compiled: CompiledGraph, trees: HospitalTrees):
+        self.geometry = geometry
+        self.compiled = compiled
+        self.trees = trees
+        logger.info(f"HospitalRouter initialized with {trees.num_hospitals} hospitals.")
+
+    def find_nearest(self, start_node: int, k: int = 3) -> dict:
+        """The k fastest hospitals from a graph node, with their routes."""
+        compiled = self.compiled
+        start_time = time_module.perf_counter()
+        ranked = self.trees.nearest([(compiled.node_index(start_node), 0.0)], k)
+        lookup_time = time_module.perf_counter() - start_time
+
+        hospitals = []
+        for hospital, cost, seed in ranked:
+            path = self.trees.path(hospital, seed)
+            distance, _ = compiled.path_metrics(path)
+            hospitals.append(self._entry(hospital, cost, distance, self.geometry.densify_path(path).tolist()))
+        return self._result(hospitals, lookup_time, start_time)
+
+    def find_nearest_from_snap(self, edge_index: EdgeSpatialIndex, snap: EdgeSnap, k: int = 3) -> dict:
+        """The k fastest hospitals from a point snapped onto an edge, starting mid-edge."""
+        compiled = self.compiled
+        start_time = time_module.perf_counter()
+        legs = edge_index.departure_legs(snap)
+        ranked = self.trees.nearest([(node, cost) for node, (cost, _) in legs.items()], k)
+        lookup_time = time_module.perf_counter() - start_time
+
+        hospitals = []
+        for hospital, cost, seed in ranked:
+            path = self.trees.path(hospital, seed)
+            prefix = edge_index.tail_coords(snap) if seed == snap.v else edge_index.head_coords(snap)[::-1]
+            distance_m = legs[seed][1] + (float(compiled.lengths[compiled.path_edges(path)].sum()) if len(path) > 1 else 0.0)
+            route = assemble_route_coords(self.geometry, {"path": path, "prefix": prefix, "suffix": []})
+            hospitals.append(self._entry(hospital, cost, distance_m / 1000.0, route))
+        return self._result(hospitals, lookup_time, start_time)
+
+    def _entry(self, hospital: int, cost: float, distance: float, route: List[List[float]]) -> dict:
+        return {
+            "hospital": dict(self.trees.hospitals[hospital],
+                             node=int(self.compiled.node_ids[self.trees.hospital_nodes[hospital]])),
+            "eta_mins": cost / 60.0,
+            "distance": distance,
+            "route": route,
+        }
+
+    @staticmethod
+    def _result(hospitals: List[dict], lookup_time: float, start_time: float) -> dict:
+        logger.info(f"Nearest hospital lookup returned {len(hospitals)} hospitals in {lookup_time:.4f}s.")
+        return {
+            "algorithm": "Hospital trees",
+            "time": lookup_time,
+            "total_time": time_module.perf_counter() - start_time,
+            "hospitals": hospitals,
+        }
@@ -0,0 +1,229 @@
+"""
+Precomputed shortest-path trees towards every registered hospital.
+
+A reverse one-to-all Dijkstra from each hospital node gives, for every node
+v, the travel time from v to that hospital and the next node on the way
+there. With these tables "fastest hospitals from here" is a column lookup
+and the route is a walk along successors, with no online search.
+
+Hospitals are registered in a JSON file (Settings.HOSPITALS_FILE):
+
+    [{"id": "h1", "name": "Victoria Hospital", "lat": 12.9634, "lng": 77.5735}, ...]
+
+Each hospital is attached to its nearest graph node. The trees are written
+next to the graph snapshot and tied to the compiled graph and the registry:
+
+    hospital_nodes  int32   (H,)    compiled node index of each hospital
+    successor       int32   (H, N)  next node towards the hospital, -1 at the
+                                    hospital itself or if it is unreachable
+    cost            float32 (H, N)  travel time to the hospital in seconds, inf if unreachable
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from core.routing.compiled import CompiledGraph
+
+logger = logging.getLogger(__name__)
+
+TREE_FORMAT = "lab_el-hospital-trees"
+TREE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+TREE_ARRAYS = ("hospital_nodes", "successor", "cost")
+BUILD_BATCH = 16  # Hospitals per scipy call; bounds the float64 temporaries
+
+
+def load_hospitals(path: str) -> List[Dict[str, Any]]:
+    """
+    Read the hospital registry. Returns an empty list when the file is
+    missing; entries without coordinates are skipped.
+    """
+    if not os.path.isfile(path):
+        return []
+    with open(path) as f:
+        entries = json.load(f)
+    hospitals = []
+    for i, entry in enumerate(entries):
+        if "lat" not in entry or "lng" not in entry:
+            logger.warning(f"Skipping hospital entry {i} in {path}: missing lat/lng")
+            continue
+        hospitals.append({
+            "id": str(entry.get("id", i)),
+            "name": entry.get("name", f"Hospital {i}"),
+            "lat": float(entry["lat"]),
+            "lng": float(entry["lng"]),
+        })
+    return hospitals
+
+
+def registry_signature(hospitals: List[Dict[str, Any]], hospital_nodes: List[int]) -> str:
+    """Fingerprint of the registered hospitals and the nodes they are attached to."""
+    payload = json.dumps([[h["id"], node] for h, node in zip(hospitals, hospital_nodes)])
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class HospitalTrees:
+    """Successor and cost tables of the reverse shortest-path tree of every hospital."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], hospitals: List[Dict[str, Any]],
+                 manifest: Optional[Dict[str, Any]] = None):
+        self.manifest = manifest or {}
+        self.hospitals = hospitals
+        self.hospital_nodes = np.asarray(arrays["hospital_nodes"], dtype=np.int32)
+        self.successor = arrays["successor"]
+        self.cost = arrays["cost"]
+
+    @property
+    def num_hospitals(self) -> int:
+        return len(self.hospital_nodes)
+
+    def nbytes(self) -> int:
+        return int(self.successor.nbytes + self.cost.nbytes)
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, hospitals: List[Dict[str, Any]],
+              hospital_nodes: List[int]) -> "HospitalTrees":
+        """
+        Args:
+            compiled: Graph whose travel times the trees use
+            hospitals: Registry entries (see load_hospitals)
+            hospital_nodes: Compiled node index each hospital is attached to
+        """
+        start = time.perf_counter()
+        n = compiled.num_nodes
+        reverse = csr_matrix((compiled.weights, compiled.targets, compiled.offsets), shape=(n, n)).T.tocsr()
+        nodes = np.asarray(hospital_nodes, dtype=np.int32)
+        successor = np.full((len(nodes), n), -1, dtype=np.int32)
+        cost = np.full((len(nodes), n), np.inf, dtype=np.float32)
+        for first in range(0, len(nodes), BUILD_BATCH):
+            batch = nodes[first:first + BUILD_BATCH]
+            # In the reverse graph the predecessor of v on the tree from the
+            # hospital is the next node on v's forward path to the hospital
+            dist, predecessors = dijkstra(reverse, indices=batch, return_predecessors=True)
+            cost[first:first + len(batch)] = dist
+            successor[first:first + len(batch)] = np.where(predecessors >= 0, predecessors, -1)
+        logger.info(f"Built shortest-path trees for {len(nodes)} hospitals in {time.perf_counter() - start:.2f}s")
+        return cls({"hospital_nodes": nodes, "successor": successor, "cost": cost}, hospitals,
+                   {"registry_signature": registry_signature(hospitals, nodes.tolist())})
+
+    def nearest(self, sources: List[Tuple[int, float]], k: int = 3) -> List[Tuple[int, float, int]]:
+        """
+        The k fastest hospitals from seeded sources (node, cost already spent).
+
+        Returns:
+            (hospital position, total cost in seconds, seed node) for each, fastest first
+        """
+        best = np.full(self.num_hospitals, np.inf)
+        best_seed = np.full(self.num_hospitals, -1, dtype=np.int64)
+        for node, seed_cost in sources:
+            total = self.cost[:, node].astype(np.float64) + seed_cost
+            better = total < best
+            best[better] = total[better]
+            best_seed[better] = node
+        order = np.argsort(best, kind="stable")[:k]
+        return [(int(h), float(best[h]), int(best_seed[h])) for h in order if np.isfinite(best[h])]
+
+    def path(self, hospital: int, node: int) -> List[int]:
+        """Compiled node path from node to the hospital, following the stored successors."""
+        successor = self.successor[hospital]
+        target = int(self.hospital_nodes[hospital])
+        path = [node]
+        while path[-1] != target:
+            nxt = int(successor[path[-1]])
+            if nxt < 0 or len(path) > len(successor):
+                return []
+            path.append(nxt)
+        return path
+
+    def save(self, out_dir: str, compiled: CompiledGraph) -> str:
+        """Write the trees atomically, tagged with the graph and registry signatures."""
+        manifest = {
+            "format": TREE_FORMAT,
+            "version": TREE_VERSION,
+            "created_at": time.time(),
+            "num_hospitals": self.num_hospitals,
+            "num_nodes": int(self.cost.shape[1]),
+            "graph_signature": compiled.signature(),
+            "registry_signature": self.manifest.get("registry_signature"),
+        }
+        tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in TREE_ARRAYS:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+        self.manifest = manifest
+        logger.info(f"Hospital trees written to {out_dir}")
+        return out_dir
+
+    @classmethod
+    def load(cls, tree_dir: str, compiled: CompiledGraph, hospitals: List[Dict[str, Any]],
+             hospital_nodes: List[int]) -> Optional["HospitalTrees"]:
+        """Memory-map the trees, or return None if missing, or built for another graph or registry."""
+        manifest_path = os.path.join(tree_dir, MANIFEST_NAME)
+        if not os.path.isfile(manifest_path):
+            return None
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable hospital tree manifest {manifest_path}: {e}")
+            return None
+        if manifest.get("format") != TREE_FORMAT or manifest.get("version") != TREE_VERSION:
+            logger.info(f"Ignoring hospital trees {tree_dir}: format/version mismatch")
+            return None
+        if manifest.get("graph_signature") != compiled.signature():
+            logger.info(f"Ignoring hospital trees {tree_dir}: built for a different graph")
+            return None
+        if manifest.get("registry_signature") != registry_signature(hospitals, hospital_nodes):
+            logger.info(f"Ignoring hospital trees {tree_dir}: hospital registry changed")
+            return None
+        arrays = {name: np.load(os.path.join(tree_dir, f"{name}.npy"), mmap_mode='r') for name in TREE_ARRAYS}
+        return cls(arrays, hospitals, manifest)
+
+
+def load_or_build_trees(tree_dir: str, compiled: CompiledGraph, hospitals: List[Dict[str, Any]],
+                        hospital_nodes: List[int]) -> HospitalTrees:
+    """Load the trees for compiled and the registry, computing and saving them when missing or stale."""
+    trees = HospitalTrees.load(tree_dir, compiled, hospitals, hospital_nodes)
+    if trees is not None:
+        return trees
+    trees = HospitalTrees.build(compiled, hospitals, hospital_nodes)
+    try:
+        trees.save(tree_dir, compiled)
+    except OSError as e:
+        logger.warning(f"Could not write hospital trees to {tree_dir}: {e}")
+    return trees
+
+
+if __name__ == "__main__":
+    from core.config import get_settings
+    from core.graph_manager import GraphManager
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Precompute shortest-path trees towards every registered hospital")
+    parser.add_argument("--source", default=settings.GRAPHML_FILE, help="GraphML file (its snapshot is used if fresh)")
+    parser.add_argument("--hospitals", default=settings.HOSPITALS_FILE, help="Hospital registry (JSON)")
+    parser.add_argument("--out", default=settings.HOSPITAL_TREES_FILE, help="Tree output directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    manager = GraphManager(graph_file=args.source)
+    manager.hospitals_file = args.hospitals
+    manager.hospital_tree_dir = args.out
+    manager.load()
+    trees = manager.get_hospital_trees()
+    if trees is None:
+        parser.error(f"No hospitals registered in {args.hospitals}")
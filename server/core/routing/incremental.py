@@ -0,0 +1,238 @@
+"""
+Incremental shortest paths for live trips (D* Lite).
+
+D* Lite searches backward from the goal and keeps, for every node it has
+touched, g (the goal distance it settled on) and rhs (the one-step lookahead
+min over successors of c(u, s) + g(s)). A node is consistent when both agree.
+When edge weights change, only the tails of the changed edges are re-evaluated
+and the search repairs the inconsistencies that can still affect the
+vehicle's current position, instead of starting over. Moving the start along
+the route is handled with the key modifier km, so the queue never has to be
+rebuilt.
+
+The heuristic is the straight-line distance at HEURISTIC_SPEEDUP times the
+graph's top free-flow speed, so it stays admissible under traffic snapshots
+that make roads faster. If an update still breaks that bound the search is
+replanned from scratch.
+"""
+import math
+import heapq
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from core.routing.compiled import CompiledGraph
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+METERS_PER_DEGREE = 111_320.0
+HEURISTIC_SPEEDUP = 2.0  # Heuristic assumes traffic can make any road up to 2x faster than free flow
+
+
+def edge_top_speed(compiled: CompiledGraph, weights: List[float], edges: np.ndarray = None) -> float:
+    """Highest length / travel time (m/s) over edges (all edges by default) under weights."""
+    weights = np.asarray(weights, dtype=np.float64)
+    lengths = compiled.lengths
+    if edges is not None:
+        weights, lengths = weights[edges], lengths[edges]
+    valid = weights > 0
+    return float((lengths[valid] / weights[valid]).max()) if valid.any() else 0.0
+
+
+class DStarLite:
+    """
+    Search state of one trip on the compiled graph.
+
+    Args:
+        compiled: Graph topology (its weights are not used)
+        weights: Travel time of every compiled edge, as a list (shared
+            between trips using the same snapshot; never modified here)
+        start, goal: Compiled node indices
+        top_speed: Highest edge speed (m/s) under weights; defaults to the
+            free-flow top speed of the compiled graph
+    """
+
+    def __init__(self, compiled: CompiledGraph, weights: List[float], start: int, goal: int,
+                 top_speed: float = None):
+        self.compiled = compiled
+        self.reverse = compiled.reverse_view()
+        self.reverse_refs: List[int] = self.reverse.edge_refs.tolist()
+        self.weights = weights
+        self.start = start
+        self.goal = goal
+        self.inv_speed = 1.0 / ((top_speed or compiled.max_speed_mps) * HEURISTIC_SPEEDUP)
+        self.lng_scale = METERS_PER_DEGREE * math.cos(math.radians(compiled.lat_list[goal]))
+        self.expanded = 0  # Nodes expanded by the last compute_shortest_path
+        self._initialize()
+
+    def _initialize(self) -> None:
+        self.g: Dict[int, float] = {}
+        self.rhs: Dict[int, float] = {self.goal: 0.0}
+        self.km = 0.0
+        self.queue: List[Tuple[float, float, int]] = []
+        self.open: Dict[int, Tuple[float, float]] = {}
+        self._push(self.goal, self._key(self.goal))
+
+    def heuristic(self, a: int, b: int) -> float:
+        """Lower bound on the travel time between two nodes (seconds)."""
+        lat, lng = self.compiled.lat_list, self.compiled.lng_list
+        dy = (lat[a] - lat[b]) * METERS_PER_DEGREE
+        dx = (lng[a] - lng[b]) * self.lng_scale
+        return math.sqrt(dy * dy + dx * dx) * self.inv_speed
+
+    def _key(self, node: int) -> Tuple[float, float]:
+        best = min(self.g.get(node, INF), self.rhs.get(node, INF))
+        return (best + self.heuristic(self.start, node) + self.km, best)
+
+    def _push(self, node: int, key: Tuple[float, float]) -> None:
+        self.open[node] = key
+        heapq.heappush(self.queue, (key[0], key[1], node))
+
+    def _top_key(self) -> Tuple[float, float]:
+        queue, open_keys = self.queue, self.open
+        while queue:
+            k1, k2, node = queue[0]
+            if open_keys.get(node) == (k1, k2):
+                return k1, k2
+            heapq.heappop(queue)  # Stale entry: node was re-keyed or closed
+        return INF, INF
+
+    def _lookahead(self, node: int) -> float:
+        """min over successors s of c(node, s) + g(s)."""
+        offsets, targets, weights, g = self.compiled.offsets_list, self.compiled.targets_list, self.weights, self.g
+        best = INF
+        for e in range(offsets[node], offsets[node + 1]):
+            cost = weights[e] + g.get(targets[e], INF)
+            if cost < best:
+                best = cost
+        return best
+
+    def _update_vertex(self, node: int) -> None:
+        if node != self.goal:
+            self.rhs[node] = self._lookahead(node)
+        self.open.pop(node, None)
+        if self.g.get(node, INF) != self.rhs.get(node, INF):
+            self._push(node, self._key(node))
+
+    def compute_shortest_path(self) -> int:
+        """Make the start consistent. Returns the number of node expansions."""
+        g, rhs, start = self.g, self.rhs, self.start
+        r_offsets, r_targets, r_refs = self.reverse.offsets_list, self.reverse.targets_list, self.reverse_refs
+        weights = self.weights
+        expanded = 0
+        while True:
+            top = self._top_key()
+            if top == (INF, INF):
+                break
+            start_key = self._key(start)
+            if top >= start_key and rhs.get(start, INF) == g.get(start, INF):
+                break
+            _, _, u = heapq.heappop(self.queue)
+            del self.open[u]
+            expanded += 1
+            new_key = self._key(u)
+            if top < new_key:
+                self._push(u, new_key)
+                continue
+            g_u, rhs_u = g.get(u, INF), rhs.get(u, INF)
+            if g_u > rhs_u:
+                # Overconsistent: settle u and relax its predecessors
+                g[u] = rhs_u
+                for e in range(r_offsets[u], r_offsets[u + 1]):
+                    p = r_targets[e]
+                    cost = weights[r_refs[e]] + rhs_u
+                    if p != self.goal and cost < rhs.get(p, INF):
+                        rhs[p] = cost
+                        self.open.pop(p, None)
+                        if g.get(p, INF) != cost:
+                            self._push(p, self._key(p))
+            else:
+                # Underconsistent: u got more expensive, re-evaluate it and its predecessors
+                g[u] = INF
+                self._update_vertex(u)
+                for e in range(r_offsets[u], r_offsets[u + 1]):
+                    p = r_targets[e]
+                    if rhs.get(p, INF) == weights[r_refs[e]] + g_u:
+                        self._update_vertex(p)
+        self.expanded = expanded
+        return expanded
+
+    def move_to(self, node: int) -> None:
+        """The vehicle is now at node (usually the next node of the route)."""
+        if node == self.start:
+            return
+        self.km += self.heuristic(self.start, node)
+        self.start = node
+
+    def update_weights(self, weights: List[float], changed: np.ndarray = None) -> int:
+        """
+        Switch to a new weight list and re-evaluate the tails of the edges that changed.
+
+        Args:
+            weights: Travel time of every compiled edge
+            changed: Positions of the edges that differ from the current weights
+                (computed here if not given)
+
+        Returns:
+            The number of changed edges that touched the search state
+        """
+        old = self.weights
+        if changed is None:
+            changed = np.flatnonzero(np.asarray(weights) != np.asarray(old))
+        self.weights = weights
+        if len(changed) == 0:
+            return 0
+
+        compiled = self.compiled
+        if edge_top_speed(compiled, weights, changed) * self.inv_speed > 1.0 + 1e-9:
+            logger.info("Traffic update exceeds the heuristic speed bound: replanning from scratch")
+            self.inv_speed = 1.0 / (edge_top_speed(compiled, weights) * HEURISTIC_SPEEDUP)
+            self._initialize()
+            return len(changed)
+
+        # Only edges into nodes the search has reached can change any rhs
+        touched = np.fromiter(self.g.keys(), dtype=np.int64, count=len(self.g))
+        heads = compiled.targets[changed]
+        relevant = changed[np.isin(heads, touched)]
+        tails = np.searchsorted(compiled.offsets, relevant, side="right") - 1
+        g, rhs = self.g, self.rhs
+        targets = compiled.targets_list
+        for e, u in zip(relevant.tolist(), tails.tolist()):
+            if u == self.goal:
+                continue
+            v_cost = g.get(targets[e], INF)
+            new_cost, old_cost = weights[e] + v_cost, old[e] + v_cost
+            if new_cost < rhs.get(u, INF):
+                rhs[u] = new_cost
+                self.open.pop(u, None)
+                if g.get(u, INF) != new_cost:
+                    self._push(u, self._key(u))
+            elif rhs.get(u, INF) == old_cost:
+                self._update_vertex(u)
+        return len(relevant)
+
+    def path(self) -> List[int]:
+        """Current shortest path from the start to the goal, or [] if unreachable."""
+        offsets, targets, weights, g = self.compiled.offsets_list, self.compiled.targets_list, self.weights, self.g
+        node = self.start
+        if g.get(node, INF) == INF:
+            return []
+        path = [node]
+        while node != self.goal:
+            best, best_next = INF, -1
+            for e in range(offsets[node], offsets[node + 1]):
+                cost = weights[e] + g.get(targets[e], INF)
+                if cost < best:
+                    best, best_next = cost, targets[e]
+            if best_next < 0 or len(path) > self.compiled.num_nodes:
+                return []
+            node = best_next
+            path.append(node)
+        return path
+
+    @property
+    def cost(self) -> float:
+        """Travel time from the start to the goal (seconds)."""
+        return self.g.get(self.start, INF)
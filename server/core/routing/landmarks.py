@@ -0,0 +1,320 @@
+"""
+ALT (A*, landmarks, triangle inequality) lower bounds.
+
+For a landmark L the triangle inequality gives, for any nodes v and t,
+
+    d(v, t) >= d(v, L) - d(t, L)     and     d(v, t) >= d(L, t) - d(L, v)
+
+so travel-time tables to and from a few well spread landmarks give an A*
+heuristic that is admissible and consistent on the road network itself,
+unlike the straight-line estimate at a fixed speed.
+
+Landmarks are chosen with the "farthest" or "avoid" strategy (Goldberg and
+Werneck). The tables are written next to the graph snapshot and tied to the
+compiled graph they were computed for:
+
+    landmarks   int32   (K,)    compiled node index of each landmark
+    forward     float32 (K, N)  d(L, v) in seconds, inf if unreachable
+    backward    float32 (K, N)  d(v, L)
+"""
+import os
+import json
+import time
+import random
+import shutil
+import logging
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from core.routing.compiled import CompiledGraph
+
+logger = logging.getLogger(__name__)
+
+LANDMARK_FORMAT = "lab_el-landmarks"
+LANDMARK_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+LANDMARK_ARRAYS = ("landmarks", "forward", "backward")
+
+DEFAULT_LANDMARKS = 16
+ACTIVE_LANDMARKS = 4  # Landmarks consulted per query, picked for the source/target pair
+INF = float('inf')
+
+
+class LandmarkTables:
+    """Landmark nodes with their forward and backward travel-time tables."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], manifest: Optional[Dict[str, Any]] = None):
+        self.manifest = manifest or {}
+        self.landmarks = np.asarray(arrays["landmarks"], dtype=np.int32)
+        self.forward = arrays["forward"]
+        self.backward = arrays["backward"]
+        # float32 rounding may push a bound slightly above the true distance;
+        # subtracting a few ulps of the largest entry keeps the bound admissible
+        finite = self.forward[np.isfinite(self.forward)]
+        self.slack = float(finite.max()) * 4 * float(np.finfo(np.float32).eps) if finite.size else 0.0
+        self._forward_views = [memoryview(np.ascontiguousarray(row)) for row in self.forward]
+        self._backward_views = [memoryview(np.ascontiguousarray(row)) for row in self.backward]
+
+    @property
+    def num_landmarks(self) -> int:
+        return len(self.landmarks)
+
+    def nbytes(self) -> int:
+        return int(self.forward.nbytes + self.backward.nbytes)
+
+    def lower_bound(self, v: int, t: int) -> float:
+        """Travel-time lower bound from v to t over all landmarks."""
+        bounds = np.concatenate([
+            self.backward[:, v].astype(np.float64) - self.backward[:, t],
+            self.forward[:, t].astype(np.float64) - self.forward[:, v],
+        ])
+        bounds = bounds[~np.isnan(bounds)]
+        return max(0.0, float(bounds.max()) - self.slack) if bounds.size else 0.0
+
+    def active_landmarks(self, source: int, targets: List[int], count: int = ACTIVE_LANDMARKS) -> List[int]:
+        """The landmarks giving the best source -> target bound, usable for every target."""
+        t = targets[0]
+        with np.errstate(invalid="ignore"):
+            scores = np.maximum(
+                self.backward[:, source].astype(np.float64) - self.backward[:, t],
+                self.forward[:, t].astype(np.float64) - self.forward[:, source],
+            )
+        usable = np.ones(self.num_landmarks, dtype=bool)
+        for target in targets:
+            usable &= np.isfinite(self.forward[:, target]) & np.isfinite(self.backward[:, target])
+        scores = np.where(usable & ~np.isnan(scores), scores, -INF)
+        order = np.argsort(-scores)[:count]
+        return [int(i) for i in order if scores[i] > -INF]
+
+    def heuristic(self, sources: List[Tuple[int, float]], targets: Dict[int, float],
+                  count: int = ACTIVE_LANDMARKS) -> Callable[[int], float]:
+        """
+        ALT heuristic for a seeded search: the smallest lower bound over the
+        target seeds (plus their remaining cost), using the active landmarks.
+        """
+        target_nodes = list(targets)
+        active = self.active_landmarks(sources[0][0], target_nodes, count)
+        slack = self.slack
+        if not active:
+            return lambda node: 0.0
+
+        # (forward row, backward row, d(L, t), d(t, L)) per active landmark and target
+        terms = []
+        for t in target_nodes:
+            rows = [(self._forward_views[l], self._backward_views[l],
+                     float(self.forward[l, t]), float(self.backward[l, t])) for l in active]
+            terms.append((targets[t] - slack, rows))
+
+        if len(terms) == 1:
+            offset, rows = terms[0]
+
+            def heuristic(node: int) -> float:
+                bound = 0.0
+                for forward, backward, from_landmark, to_landmark in rows:
+                    b = backward[node] - to_landmark
+                    if b > bound:
+                        bound = b
+                    b = from_landmark - forward[node]
+                    if b > bound:
+                        bound = b
+                return bound + offset if bound + offset > 0.0 else 0.0
+            return heuristic
+
+        def heuristic(node: int) -> float:
+            best = INF
+            for offset, rows in terms:
+                bound = 0.0
+                for forward, backward, from_landmark, to_landmark in rows:
+                    b = backward[node] - to_landmark
+                    if b > bound:
+                        bound = b
+                    b = from_landmark - forward[node]
+                    if b > bound:
+                        bound = b
+                if bound + offset < best:
+                    best = bound + offset
+            return best if best > 0.0 else 0.0
+        return heuristic
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, count: int = DEFAULT_LANDMARKS,
+              strategy: str = "avoid", seed: int = 0) -> "LandmarkTables":
+        """
+        Select landmarks and compute their travel-time tables.
+
+        Args:
+            compiled: Graph to preprocess
+            count: Number of landmarks
+            strategy: "farthest" (each landmark as far as possible from the
+                previous ones) or "avoid" (landmarks placed where the current
+                bounds are weakest)
+            seed: Seed for the random start/root nodes
+        """
+        if strategy not in ("farthest", "avoid"):
+            raise ValueError(f"Unknown landmark strategy: {strategy}")
+        start = time.perf_counter()
+        n = compiled.num_nodes
+        rng = random.Random(seed)
+        forward_graph = csr_matrix((compiled.weights, compiled.targets, compiled.offsets), shape=(n, n))
+        backward_graph = forward_graph.T.tocsr()
+
+        # First landmark: the node farthest from a random start (round trip)
+        origin = rng.randrange(n)
+        round_trip = dijkstra(forward_graph, indices=origin) + dijkstra(backward_graph, indices=origin)
+        landmarks = [int(np.argmax(np.where(np.isfinite(round_trip), round_trip, -1)))]
+        forward = [dijkstra(forward_graph, indices=landmarks[0])]
+        backward = [dijkstra(backward_graph, indices=landmarks[0])]
+
+        while len(landmarks) < min(count, n):
+            if strategy == "farthest":
+                candidate = cls._farthest(forward, backward, landmarks)
+            else:
+                candidate = cls._avoid(forward_graph, forward, backward, landmarks, rng)
+            if candidate is None or candidate in landmarks:
+                break
+            landmarks.append(candidate)
+            forward.append(dijkstra(forward_graph, indices=candidate))
+            backward.append(dijkstra(backward_graph, indices=candidate))
+
+        tables = cls({
+            "landmarks": np.array(landmarks, dtype=np.int32),
+            "forward": np.vstack(forward).astype(np.float32),
+            "backward": np.vstack(backward).astype(np.float32),
+        }, {"strategy": strategy, "requested_landmarks": count})
+        logger.info(
+            f"Selected {tables.num_landmarks} landmarks ({strategy}) in {time.perf_counter() - start:.2f}s "
+            f"({tables.nbytes() / 1e6:.1f} MB of tables)"
+        )
+        return tables
+
+    @staticmethod
+    def _farthest(forward: List[np.ndarray], backward: List[np.ndarray], landmarks: List[int]) -> Optional[int]:
+        """Node whose round trip to the nearest existing landmark is longest."""
+        nearest = np.min(np.vstack(forward) + np.vstack(backward), axis=0)
+        nearest[landmarks] = -1
+        nearest[~np.isfinite(nearest)] = -1
+        candidate = int(np.argmax(nearest))
+        return candidate if nearest[candidate] > 0 else None
+
+    @staticmethod
+    def _avoid(forward_graph: csr_matrix, forward: List[np.ndarray], backward: List[np.ndarray],
+               landmarks: List[int], rng: random.Random) -> Optional[int]:
+        """
+        "Avoid" selection: grow a shortest path tree from a random root, weight
+        each node by how much the current landmarks underestimate its distance,
+        and descend into the heaviest subtree that holds no landmark.
+        """
+        reachable = np.flatnonzero(np.isfinite(forward[0]) & np.isfinite(backward[0]))
+        root = int(reachable[rng.randrange(len(reachable))])
+        dist, pred = dijkstra(forward_graph, indices=root, return_predecessors=True)
+
+        forward_table, backward_table = np.vstack(forward), np.vstack(backward)
+        with np.errstate(invalid="ignore"):
+            bounds = np.maximum(backward_table[:, [root]] - backward_table, forward_table - forward_table[:, [root]])
+        bounds = np.where(np.isfinite(bounds), bounds, 0.0).max(axis=0)
+        weight = np.where(np.isfinite(dist), dist - bounds, 0.0)
+
+        # Children lists of the tree, then a preorder so subtrees can be summed bottom-up
+        tree_nodes = np.flatnonzero(pred >= 0)
+        parents = pred[tree_nodes]
+        order = np.argsort(parents, kind="stable")
+        children = tree_nodes[order].tolist()
+        child_offsets = np.zeros(len(pred) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(parents, minlength=len(pred)), out=child_offsets[1:])
+        child_offsets = child_offsets.tolist()
+
+        preorder, stack = [], [root]
+        while stack:
+            node = stack.pop()
+            preorder.append(node)
+            stack.extend(children[child_offsets[node]:child_offsets[node + 1]])
+
+        size = weight.tolist()
+        has_landmark = [False] * len(size)
+        for landmark in landmarks:
+            has_landmark[landmark] = True
+        pred_list = pred.tolist()
+        for node in reversed(preorder):
+            if has_landmark[node]:
+                size[node] = 0.0
+            parent = pred_list[node]
+            if parent >= 0:
+                size[parent] += size[node]
+                has_landmark[parent] = has_landmark[parent] or has_landmark[node]
+        for node in preorder:
+            if has_landmark[node]:
+                size[node] = 0.0
+
+        node = max(preorder, key=size.__getitem__)
+        if size[node] <= 0:
+            return None
+        while True:
+            kids = children[child_offsets[node]:child_offsets[node + 1]]
+            if not kids:
+                return node
+            node = max(kids, key=size.__getitem__)
+
+    def save(self, out_dir: str, compiled: CompiledGraph) -> str:
+        """Write the tables atomically, tagged with the signature of compiled."""
+        manifest = {
+            "format": LANDMARK_FORMAT,
+            "version": LANDMARK_VERSION,
+            "created_at": time.time(),
+            "strategy": self.manifest.get("strategy"),
+            "requested_landmarks": self.manifest.get("requested_landmarks"),
+            "num_landmarks": self.num_landmarks,
+            "num_nodes": int(self.forward.shape[1]),
+            "graph_signature": compiled.signature(),
+        }
+        tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in LANDMARK_ARRAYS:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+        self.manifest = manifest
+        logger.info(f"Landmark tables written to {out_dir}")
+        return out_dir
+
+    @classmethod
+    def load(cls, landmark_dir: str, compiled: CompiledGraph) -> Optional["LandmarkTables"]:
+        """Memory-map landmark tables, or return None if missing or built for another graph."""
+        manifest_path = os.path.join(landmark_dir, MANIFEST_NAME)
+        if not os.path.isfile(manifest_path):
+            return None
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable landmark manifest {manifest_path}: {e}")
+            return None
+        if manifest.get("format") != LANDMARK_FORMAT or manifest.get("version") != LANDMARK_VERSION:
+            logger.info(f"Ignoring landmark tables {landmark_dir}: format/version mismatch")
+            return None
+        if manifest.get("graph_signature") != compiled.signature():
+            logger.info(f"Ignoring landmark tables {landmark_dir}: built for a different graph")
+            return None
+        arrays = {name: np.load(os.path.join(landmark_dir, f"{name}.npy"), mmap_mode='r')
+                  for name in LANDMARK_ARRAYS}
+        return cls(arrays, manifest)
+
+
+def load_or_build_landmarks(landmark_dir: str, compiled: CompiledGraph, count: int = DEFAULT_LANDMARKS,
+                            strategy: str = "avoid") -> LandmarkTables:
+    """Load the landmark tables for compiled, computing and saving them when missing or stale."""
+    tables = LandmarkTables.load(landmark_dir, compiled)
+    if (tables is not None and tables.manifest.get("requested_landmarks") == count
+            and tables.manifest.get("strategy") == strategy):
+        return tables
+    tables = LandmarkTables.build(compiled, count=count, strategy=strategy)
+    try:
+        tables.save(landmark_dir, compiled)
+    except OSError as e:
+        logger.warning(f"Could not write landmark tables to {landmark_dir}: {e}")
+    return tables
@@ -0,0 +1,178 @@
+"""
+Priority queues for the compiled search kernels (see csr_search.best_first_csr).
+
+All queues hold (cost, node) entries and share one interface: push(cost,
+node), pop() -> (cost, node) and len(). They differ in how much work a push
+costs and how many entries pile up:
+
+    heapq        binary heap of tuples with lazy deletion: every improvement
+                 pushes a duplicate entry (the baseline)
+    addressable  binary heap with a position map and decrease-key: at most
+                 one entry per node
+    radix        radix heap over integer deciseconds of cost: O(1) pushes,
+                 and each entry moves between buckets at most ~log2(C) times
+
+The radix heap is monotone and only orders entries to RESOLUTION seconds, so
+entries popped back to back may be out of order by less than that.
+best_first_csr handles this exactly by re-expanding a node if its cost
+still improves and by stopping only once the popped cost exceeds the best
+target cost by the queue's resolution.
+
+Being monotone, the radix heap also needs pushed keys that never drop below
+the last popped key: Dijkstra costs, or A* with a consistent potential (ALT
+landmarks, straight-line distance at the graph's top speed). An inconsistent
+heuristic makes f-values drop, and the clamped keys pop out of order.
+"""
+import heapq
+from typing import Dict, List, Tuple
+
+SCALE = 10  # Radix heap keys are integer deciseconds
+RADIX_BUCKETS = 65  # Bucket i holds keys whose highest bit differing from the last key is bit i - 1
+
+
+class HeapQueue:
+    """heapq with lazy deletion (duplicates are skipped by the search when popped stale)."""
+
+    name = "heapq"
+    resolution = 0.0
+    monotone = False
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int]] = []
+        self.pushes = 0
+        self.peak = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, cost: float, node: int) -> None:
+        heapq.heappush(self._heap, (cost, node))
+        self.pushes += 1
+        if len(self._heap) > self.peak:
+            self.peak = len(self._heap)
+
+    def pop(self) -> Tuple[float, int]:
+        return heapq.heappop(self._heap)
+
+
+class AddressableHeap:
+    """Binary min-heap with a node -> position map, so a push for a queued node is a decrease-key."""
+
+    name = "addressable"
+    resolution = 0.0
+    monotone = False
+
+    def __init__(self):
+        self._costs: List[float] = []
+        self._nodes: List[int] = []
+        self._position: Dict[int, int] = {}
+        self.pushes = 0
+        self.peak = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def push(self, cost: float, node: int) -> None:
+        self.pushes += 1
+        i = self._position.get(node)
+        if i is None:
+            i = len(self._nodes)
+            self._costs.append(cost)
+            self._nodes.append(node)
+            self._position[node] = i
+            if i + 1 > self.peak:
+                self.peak = i + 1
+        elif cost < self._costs[i]:
+            self._costs[i] = cost
+        else:
+            return
+        self._sift_up(i)
+
+    def pop(self) -> Tuple[float, int]:
+        costs, nodes, position = self._costs, self._nodes, self._position
+        cost, node = costs[0], nodes[0]
+        del position[node]
+        last_cost, last_node = costs.pop(), nodes.pop()
+        if nodes:
+            costs[0], nodes[0] = last_cost, last_node
+            position[last_node] = 0
+            self._sift_down(0)
+        return cost, node
+
+    def _sift_up(self, i: int) -> None:
+        costs, nodes, position = self._costs, self._nodes, self._position
+        cost, node = costs[i], nodes[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if costs[parent] <= cost:
+                break
+            costs[i], nodes[i] = costs[parent], nodes[parent]
+            position[nodes[i]] = i
+            i = parent
+        costs[i], nodes[i] = cost, node
+        position[node] = i
+
+    def _sift_down(self, i: int) -> None:
+        costs, nodes, position = self._costs, self._nodes, self._position
+        size = len(nodes)
+        cost, node = costs[i], nodes[i]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and costs[child + 1] < costs[child]:
+                child += 1
+            if costs[child] >= cost:
+                break
+            costs[i], nodes[i] = costs[child], nodes[child]
+            position[nodes[i]] = i
+            i = child
+        costs[i], nodes[i] = cost, node
+        position[node] = i
+
+
+class RadixHeap:
+    """Monotone radix heap keyed by integer deciseconds."""
+
+    name = "radix"
+    resolution = 1.0 / SCALE
+    monotone = True  # Keys must not drop below the last popped key by more than the resolution
+
+    def __init__(self):
+        self._buckets: List[List[Tuple[int, float, int]]] = [[] for _ in range(RADIX_BUCKETS)]
+        self._last = 0
+        self._size = 0
+        self.pushes = 0
+        self.peak = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, cost: float, node: int) -> None:
+        key = int(cost * SCALE)
+        if key < self._last:
+            key = self._last  # Rounding within the resolution; larger drops would break the order
+        self._buckets[(key ^ self._last).bit_length()].append((key, cost, node))
+        self._size += 1
+        self.pushes += 1
+        if self._size > self.peak:
+            self.peak = self._size
+
+    def pop(self) -> Tuple[float, int]:
+        buckets = self._buckets
+        if not buckets[0]:
+            i = 1
+            while not buckets[i]:
+                i += 1
+            items = buckets[i]
+            buckets[i] = []
+            last = min(items)[0]
+            self._last = last
+            for item in items:
+                buckets[(item[0] ^ last).bit_length()].append(item)
+        _, cost, node = buckets[0].pop()
+        self._size -= 1
+        return cost, node
+
+
+QUEUES = {queue.name: queue for queue in (HeapQueue, AddressableHeap, RadixHeap)}
@@ -0,0 +1,92 @@
+"""
+Reusable per-thread search state for the compiled search kernels.
+
+Instead of allocating distance/parent arrays over the whole graph for every
+query, each worker thread keeps one SearchState per compiled graph. Entries
+are only valid when their stamp equals the current generation, so starting a
+new query is a counter increment and per-query work scales with the number of
+nodes the search actually touches.
+"""
+import threading
+from typing import List
+
+INF = float('inf')
+
+
+class SearchState:
+    """
+    Distance, parent and settled arrays with generation stamps.
+
+    Kernels read ``dist[v]`` only if ``stamp[v] == generation`` (otherwise the
+    distance is infinite) and treat ``settled[v] == generation`` as settled.
+    """
+
+    __slots__ = ("num_nodes", "dist", "parent", "stamp", "settled", "generation")
+
+    def __init__(self, num_nodes: int):
+        self.num_nodes = num_nodes
+        self.dist: List[float] = [INF] * num_nodes
+        self.parent: List[int] = [-1] * num_nodes
+        self.stamp: List[int] = [0] * num_nodes
+        self.settled: List[int] = [0] * num_nodes
+        self.generation = 0
+
+    def reset(self) -> int:
+        """Invalidate every entry in O(1) and return the new generation."""
+        self.generation += 1
+        return self.generation
+
+    def distance(self, node: int) -> float:
+        """Tentative distance of node in the current generation."""
+        return self.dist[node] if self.stamp[node] == self.generation else INF
+
+    def is_settled(self, node: int) -> bool:
+        return self.settled[node] == self.generation
+
+    def path_to(self, source: int, target: int) -> List[int]:
+        """Follow parent pointers of the current generation from target back to source."""
+        if self.stamp[target] != self.generation:
+            return []
+        parent = self.parent
+        path = [target]
+        node = target
+        while node != source:
+            node = parent[node]
+            if node < 0:
+                return []
+            path.append(node)
+        path.reverse()
+        return path
+
+    def path_from_root(self, target: int) -> List[int]:
+        """Follow parent pointers from target back to whichever seed it was reached from."""
+        if self.stamp[target] != self.generation:
+            return []
+        parent = self.parent
+        path = [target]
+        node = parent[target]
+        while node >= 0:
+            path.append(node)
+            node = parent[node]
+        path.reverse()
+        return path
+
+
+class SearchStatePool:
+    """
+    Hands out one SearchState per thread (and per slot, for searches that need
+    several, e.g. the two directions of a bidirectional search).
+    """
+
+    def __init__(self, num_nodes: int):
+        self.num_nodes = num_nodes
+        self._local = threading.local()
+
+    def acquire(self, slot: int = 0) -> SearchState:
+        states = getattr(self._local, "states", None)
+        if states is None:
+            states = self._local.states = {}
+        state = states.get(slot)
+        if state is None:
+            state = states[slot] = SearchState(self.num_nodes)
+        return state
@@ -0,0 +1,308 @@
+"""
+Versioned binary snapshot of the road graph.
+
+A snapshot is a directory of plain NumPy ``.npy`` files plus a
+``manifest.json``. Every array can be opened with ``np.load(mmap_mode='r')``,
+so opening a snapshot costs milliseconds regardless of the graph size,
+instead of the tens of seconds spent parsing the GraphML XML.
+
+Layout (E = number of directed edges, parallel edges kept):
+    node_ids      int64   (N,)    OSM node ids
+    lat, lng      float64 (N,)    node coordinates
+    offsets       int64   (N+1,)  CSR row pointers into the edge arrays
+    targets       int32   (E,)    target node index of each edge
+    keys          int32   (E,)    MultiDiGraph edge key
+    length        float32 (E,)    metres
+    travel_time   float32 (E,)    seconds
+    highway       uint8   (E,)    index into manifest["highway_classes"]
+    geom_offsets  int64   (E+1,)  row pointers into geom_coords
+    geom_coords   float64 (P, 2)  flattened (lat, lng) edge geometry
+
+Build one with:
+    python -m core.routing.snapshot --source data/simplified_bengaluru.graphml
+"""
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+import networkx as nx
+
+from core.routing.compiled import DEFAULT_TRAVEL_TIME
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "lab_el-graph-snapshot"
+SNAPSHOT_VERSION = 2  # 2: missing travel_time falls back to DEFAULT_TRAVEL_TIME, as in CompiledGraph.from_graph
+MANIFEST_NAME = "manifest.json"
+
+NODE_ARRAYS = ("node_ids", "lat", "lng", "offsets")
+EDGE_ARRAYS = ("targets", "keys", "length", "travel_time", "highway", "geom_offsets", "geom_coords")
+
+
+def _highway_class(value: Any) -> str:
+    """Normalise an OSMnx highway attribute (str or list) to a single class."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return str(value) if value else "unclassified"
+
+
+def _source_signature(source_file: Optional[str]) -> Dict[str, Any]:
+    if not source_file or not os.path.exists(source_file):
+        return {"source_file": source_file, "source_size": None, "source_mtime": None}
+    stat = os.stat(source_file)
+    return {
+        "source_file": os.path.abspath(source_file),
+        "source_size": stat.st_size,
+        "source_mtime": int(stat.st_mtime),
+    }
+
+
+class GraphSnapshot:
+    """Read-only view over the arrays of a snapshot directory."""
+
+    def __init__(self, path: str, manifest: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.path = path
+        self.manifest = manifest
+        self.highway_classes: List[str] = manifest["highway_classes"]
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def sources(self) -> np.ndarray:
+        """Source node index of every edge (expanded from the CSR offsets)."""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.offsets))
+
+    def nbytes(self) -> int:
+        """Size of all arrays in bytes (mapped, not necessarily resident)."""
+        return sum(getattr(self, name).nbytes for name in NODE_ARRAYS + EDGE_ARRAYS)
+
+
+def build_snapshot(G: nx.MultiDiGraph, out_dir: str, source_file: Optional[str] = None) -> str:
+    """
+    Write a binary snapshot of an OSMnx graph.
+
+    Args:
+        G: Road graph with 'x'/'y' node attributes and 'length'/'travel_time' edges
+        out_dir: Snapshot directory to (re)create
+        source_file: GraphML/OSM file the graph came from, used for freshness checks
+
+    Returns:
+        The snapshot directory path
+    """
+    start = time.perf_counter()
+    node_ids = np.fromiter(G.nodes(), dtype=np.int64, count=len(G))
+    index = {node: i for i, node in enumerate(G.nodes())}
+    lat = np.array([data.get('y', data.get('lat', 0.0)) for _, data in G.nodes(data=True)], dtype=np.float64)
+    lng = np.array([data.get('x', data.get('lon', 0.0)) for _, data in G.nodes(data=True)], dtype=np.float64)
+
+    highway_classes: List[str] = []
+    highway_codes: Dict[str, int] = {}
+    sources, targets, keys, lengths, travel_times, highways = [], [], [], [], [], []
+    geom_counts, geom_parts = [], []
+
+    for u, v, k, data in G.edges(keys=True, data=True):
+        ui, vi = index[u], index[v]
+        sources.append(ui)
+        targets.append(vi)
+        keys.append(k)
+        length = float(data.get('length', 0.0))
+        lengths.append(length)
+        travel_times.append(float(data.get('travel_time', DEFAULT_TRAVEL_TIME)))  # Same fallback as CompiledGraph.from_graph
+
+        highway = _highway_class(data.get('highway'))
+        if highway not in highway_codes:
+            highway_codes[highway] = len(highway_classes)
+            highway_classes.append(highway)
+        highways.append(highway_codes[highway])
+
+        # Edges without geometry are straight lines between their end nodes
+        if 'geometry' in data:
+            coords = np.asarray(data['geometry'].coords, dtype=np.float64)[:, ::-1]
+        else:
+            coords = np.array([[lat[ui], lng[ui]], [lat[vi], lng[vi]]], dtype=np.float64)
+        geom_counts.append(len(coords))
+        geom_parts.append(coords)
+
+    if len(highway_classes) > 255:
+        raise ValueError(f"Too many highway classes for a uint8 code: {len(highway_classes)}")
+
+    # Sort edges by source node to get CSR order (stable keeps parallel edges in key order)
+    sources = np.asarray(sources, dtype=np.int64)
+    order = np.argsort(sources, kind='stable')
+    offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(node_ids)), out=offsets[1:])
+
+    geom_counts = np.asarray(geom_counts, dtype=np.int64)[order]
+    geom_offsets = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(geom_counts, out=geom_offsets[1:])
+    geom_coords = (np.concatenate([geom_parts[i] for i in order]) if len(order)
+                   else np.zeros((0, 2), dtype=np.float64))
+
+    arrays = {
+        "node_ids": node_ids,
+        "lat": lat,
+        "lng": lng,
+        "offsets": offsets,
+        "targets": np.asarray(targets, dtype=np.int32)[order],
+        "keys": np.asarray(keys, dtype=np.int32)[order],
+        "length": np.asarray(lengths, dtype=np.float32)[order],
+        "travel_time": np.asarray(travel_times, dtype=np.float32)[order],
+        "highway": np.asarray(highways, dtype=np.uint8)[order],
+        "geom_offsets": geom_offsets,
+        "geom_coords": geom_coords,
+    }
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "num_nodes": int(len(node_ids)),
+        "num_edges": int(len(order)),
+        "num_geometry_points": int(len(geom_coords)),
+        "highway_classes": highway_classes,
+        "crs": G.graph.get("crs", "epsg:4326"),
+        **_source_signature(source_file),
+    }
+
+    # Write into a temporary directory and swap it in, so readers never see a partial snapshot
+    tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+
+    logger.info(
+        f"Snapshot written to {out_dir} in {time.perf_counter() - start:.2f}s "
+        f"({manifest['num_nodes']} nodes, {manifest['num_edges']} edges)"
+    )
+    return out_dir
+
+
+def read_manifest(snapshot_dir: str) -> Optional[Dict[str, Any]]:
+    """Return the manifest of a snapshot, or None if there is no valid one."""
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        return None
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable snapshot manifest {manifest_path}: {e}")
+        return None
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version") != SNAPSHOT_VERSION:
+        logger.info(f"Ignoring snapshot {snapshot_dir}: format/version {manifest.get('format')}/{manifest.get('version')}")
+        return None
+    return manifest
+
+
+def is_snapshot_fresh(snapshot_dir: str, source_file: Optional[str] = None) -> bool:
+    """
+    Check that a compatible snapshot exists and was built from the current source file.
+    A snapshot whose source file is absent (e.g. shipped without the GraphML) is accepted.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        return False
+    if not source_file or not os.path.exists(source_file):
+        return True
+    signature = _source_signature(source_file)
+    return (manifest.get("source_size") == signature["source_size"]
+            and manifest.get("source_mtime") == signature["source_mtime"])
+
+
+def load_snapshot(snapshot_dir: str, mmap: bool = True) -> GraphSnapshot:
+    """
+    Open a snapshot directory.
+
+    Args:
+        snapshot_dir: Directory written by build_snapshot
+        mmap: Memory-map the arrays (default) instead of reading them into RAM
+
+    Returns:
+        GraphSnapshot over the arrays
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        raise ValueError(f"No compatible graph snapshot in {snapshot_dir}")
+    mmap_mode = 'r' if mmap else None
+    arrays = {
+        name: np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in NODE_ARRAYS + EDGE_ARRAYS
+    }
+    return GraphSnapshot(snapshot_dir, manifest, arrays)
+
+
+def snapshot_to_graph(snapshot: GraphSnapshot) -> nx.MultiDiGraph:
+    """
+    Materialise an OSMnx-compatible MultiDiGraph from a snapshot.
+    Much cheaper than GraphML parsing: no XML and no per-value type conversion.
+    Edge geometry is not copied onto the edges: it stays in the snapshot
+    arrays and is served by core/routing/geometry_store.py.
+    """
+    G = nx.MultiDiGraph(crs=snapshot.manifest.get("crs", "epsg:4326"))
+    node_ids = snapshot.node_ids.tolist()
+    G.add_nodes_from(
+        (node, {'y': y, 'x': x})
+        for node, y, x in zip(node_ids, snapshot.lat.tolist(), snapshot.lng.tolist())
+    )
+
+    classes = snapshot.highway_classes
+    sources = snapshot.sources().tolist()
+    G.add_edges_from(
+        (node_ids[u], node_ids[v], k, {
+            'length': length,
+            'travel_time': travel_time,
+            'highway': classes[highway],
+        })
+        for u, v, k, length, travel_time, highway in zip(
+            sources,
+            snapshot.targets.tolist(),
+            snapshot.keys.tolist(),
+            snapshot.length.tolist(),
+            snapshot.travel_time.tolist(),
+            snapshot.highway.tolist(),
+        )
+    )
+    return G
+
+
+def build_snapshot_from_file(source_file: str, out_dir: str) -> str:
+    """Build a snapshot from a GraphML file or a raw .osm extract."""
+    if source_file.endswith(".osm"):
+        import osmnx as ox
+        G = ox.graph_from_xml(source_file, simplify=True, retain_all=False)
+        G = ox.add_edge_speeds(G)
+        G = ox.add_edge_travel_times(G)
+    else:
+        from core.routing.graph_builder import load_graph_from_file
+        G = load_graph_from_file(source_file)
+    return build_snapshot(G, out_dir, source_file=source_file)
+
+
+if __name__ == "__main__":
+    from core.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build a binary road graph snapshot")
+    parser.add_argument("--source", default=settings.GRAPHML_FILE, help="GraphML or .osm input file")
+    parser.add_argument("--out", default=settings.GRAPH_FILE, help="Snapshot output directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    build_snapshot_from_file(args.source, args.out)
@@ -0,0 +1,306 @@
+"""
+Time-dependent travel times from the Bengaluru traffic dataset.
+
+data/Banglore_traffic_Dataset.csv has one row per monitored road and day
+with its Travel Time Index (TTI = actual / free-flow travel time). The
+dataset has no time of day, so the profiles are weekly: one breakpoint per
+weekday at noon, interpolated linearly and wrapping from Sunday to Monday.
+The travel time of edge e when entered at time t is
+
+    travel_time[e] * factor(profile[e], t)
+
+Profiles are keyed by area and road class. Every edge is assigned to the
+nearest monitored area (or to the city-wide profile when it is more than
+AREA_RADIUS_M from every area centroid). The monitored roads are arterials,
+so other road classes take CONGESTION_SHARE of the arterial congestion:
+
+    factor(area, class, day) = 1 + share[class] * (mean TTI(area, day) - 1)
+
+All slopes are far below 1 s/s, so the travel-time functions are FIFO and a
+label-setting (A*/Dijkstra) search by arrival time is exact.
+
+The tables are written next to the graph snapshot and tied to the compiled
+graph and the dataset:
+
+    factors       float32 (P, 7)  factor of each profile, Monday..Sunday
+    edge_profile  int16   (E,)    profile of every compiled edge
+"""
+import os
+import csv
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import networkx as nx
+
+from core.routing.compiled import CompiledGraph
+from core.routing.snapshot import _highway_class
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FORMAT = "lab_el-traffic-profiles"
+PROFILE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+PROFILE_ARRAYS = ("factors", "edge_profile")
+
+DAY_SECONDS = 86_400.0
+WEEK_SECONDS = 7 * DAY_SECONDS
+METERS_PER_DEGREE = 111_320.0
+CITY = "Bengaluru"  # City-wide profile for edges away from every monitored area
+CITY_TIMEZONE = ZoneInfo("Asia/Kolkata")
+AREA_RADIUS_M = 4_000.0
+
+# Approximate centres of the areas in the dataset
+AREA_CENTROIDS = {
+    "Indiranagar": (12.9719, 77.6412),
+    "Whitefield": (12.9698, 77.7500),
+    "Koramangala": (12.9352, 77.6245),
+    "M.G. Road": (12.9756, 77.6066),
+    "Jayanagar": (12.9250, 77.5838),
+    "Hebbal": (13.0358, 77.5970),
+    "Yeshwanthpur": (13.0280, 77.5409),
+    "Electronic City": (12.8452, 77.6602),
+}
+
+ROAD_CLASSES = ("arterial", "collector", "local")
+ARTERIAL_HIGHWAYS = {"motorway", "motorway_link", "trunk", "trunk_link", "primary", "primary_link"}
+COLLECTOR_HIGHWAYS = {"secondary", "secondary_link", "tertiary", "tertiary_link"}
+CONGESTION_SHARE = {"arterial": 1.0, "collector": 0.6, "local": 0.3}
+
+
+def road_class(highway: str) -> str:
+    """Group an OSM highway class into arterial, collector or local."""
+    if highway in ARTERIAL_HIGHWAYS:
+        return "arterial"
+    if highway in COLLECTOR_HIGHWAYS:
+        return "collector"
+    return "local"
+
+
+def week_seconds(when: datetime) -> float:
+    """Seconds since Monday 00:00, local time (naive datetimes are taken as local already)."""
+    if when.tzinfo is not None:
+        when = when.astimezone(CITY_TIMEZONE)
+    return (when.weekday() * DAY_SECONDS + when.hour * 3600.0 + when.minute * 60.0
+            + when.second + when.microsecond / 1e6)
+
+
+def dataset_signature(path: str) -> Optional[str]:
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_weekday_tti(path: str) -> Dict[str, np.ndarray]:
+    """
+    Mean Travel Time Index per area and weekday (Monday first), plus the
+    city-wide mean under CITY. Weekdays without rows get the area's mean.
+    """
+    sums: Dict[str, np.ndarray] = {}
+    counts: Dict[str, np.ndarray] = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                day = datetime.strptime(row["Date"], "%Y-%m-%d").weekday()
+                tti = float(row["Travel Time Index"])
+            except (KeyError, ValueError):
+                continue
+            for area in (row.get("Area Name", "").strip(), CITY):
+                if not area:
+                    continue
+                sums.setdefault(area, np.zeros(7))[day] += tti
+                counts.setdefault(area, np.zeros(7))[day] += 1
+    means = {}
+    for area, total in sums.items():
+        count = counts[area]
+        overall = total.sum() / count.sum()
+        means[area] = np.where(count > 0, total / np.maximum(count, 1), overall)
+    return means
+
+
+def compiled_edge_highways(compiled: CompiledGraph, snapshot=None, graph: nx.MultiDiGraph = None) -> List[str]:
+    """Highway class of every collapsed edge (from the snapshot when there is one)."""
+    if snapshot is not None:
+        classes = snapshot.highway_classes
+        return [classes[code] for code in np.asarray(snapshot.highway)[compiled.edge_refs].tolist()]
+    if graph is None:
+        raise ValueError("Either a snapshot or the NetworkX graph is required")
+    node_ids = compiled.node_ids.tolist()
+    return [_highway_class(graph[node_ids[u]][node_ids[v]][k].get('highway'))
+            for u, v, k in zip(compiled.sources().tolist(), compiled.targets_list, compiled.edge_keys.tolist())]
+
+
+class TrafficProfiles:
+    """Weekly travel-time factor profiles and the profile of every compiled edge."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], manifest: Optional[Dict[str, Any]] = None):
+        self.manifest = manifest or {}
+        self.factors = np.asarray(arrays["factors"], dtype=np.float32)
+        self.edge_profile = np.asarray(arrays["edge_profile"], dtype=np.int16)
+        self.profile_keys: List[Tuple[str, str]] = [tuple(key) for key in self.manifest.get("profiles", [])]
+        # Rows padded with Monday again so interpolation never wraps; plain lists for the search loops
+        self._padded = np.hstack([self.factors, self.factors[:, :1]]).astype(np.float64)
+        self.rows: List[List[float]] = self._padded.tolist()
+        self.edge_profile_list: List[int] = self.edge_profile.tolist()
+        self.min_factor = float(self.factors.min()) if self.factors.size else 1.0
+
+    @property
+    def num_profiles(self) -> int:
+        return len(self.factors)
+
+    def nbytes(self) -> int:
+        return int(self.factors.nbytes + self.edge_profile.nbytes)
+
+    @staticmethod
+    def position(t: float) -> Tuple[int, float]:
+        """(weekday breakpoint, fraction towards the next one) at t seconds since Monday 00:00."""
+        x = ((t - DAY_SECONDS / 2) % WEEK_SECONDS) / DAY_SECONDS
+        day = int(x)
+        return day, x - day
+
+    def factors_at(self, t: float) -> np.ndarray:
+        """Factor of every profile at t seconds since Monday 00:00."""
+        day, fraction = self.position(t)
+        return self._padded[:, day] * (1.0 - fraction) + self._padded[:, day + 1] * fraction
+
+    def weights_at(self, free_flow: np.ndarray, t: float) -> np.ndarray:
+        """Travel time of every compiled edge entered at t (a static snapshot of the profiles)."""
+        return np.asarray(free_flow, dtype=np.float64) * self.factors_at(t)[self.edge_profile]
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, highways: List[str], dataset_path: str) -> "TrafficProfiles":
+        """
+        Args:
+            compiled: Graph whose edges get a profile
+            highways: OSM highway class of every compiled edge (see compiled_edge_highways)
+            dataset_path: The traffic dataset CSV
+        """
+        start = time.perf_counter()
+        tti = load_weekday_tti(dataset_path)
+        if CITY not in tti:
+            raise ValueError(f"No usable rows in {dataset_path}")
+        areas = [area for area in AREA_CENTROIDS if area in tti] + [CITY]
+
+        keys, factors = [], []
+        for area in areas:
+            for cls_name in ROAD_CLASSES:
+                keys.append((area, cls_name))
+                factors.append(1.0 + CONGESTION_SHARE[cls_name] * (tti[area] - 1.0))
+
+        # Area of every edge: the centroid nearest to the midpoint of its end nodes
+        sources = compiled.sources()
+        mid_lat = (compiled.lat[sources] + compiled.lat[compiled.targets]) / 2
+        mid_lng = (compiled.lng[sources] + compiled.lng[compiled.targets]) / 2
+        centroids = np.array([AREA_CENTROIDS[area] for area in areas[:-1]]).reshape(-1, 2)
+        lng_scale = METERS_PER_DEGREE * np.cos(np.radians(mid_lat))
+        dy = (mid_lat[:, None] - centroids[None, :, 0]) * METERS_PER_DEGREE
+        dx = (mid_lng[:, None] - centroids[None, :, 1]) * lng_scale[:, None]
+        distance = np.sqrt(dy * dy + dx * dx)
+        area_index = np.argmin(distance, axis=1) if len(centroids) else np.zeros(len(sources), dtype=np.int64)
+        if len(centroids):
+            area_index[distance[np.arange(len(sources)), area_index] > AREA_RADIUS_M] = len(areas) - 1
+
+        class_codes = {name: i for i, name in enumerate(ROAD_CLASSES)}
+        class_index = np.fromiter((class_codes[road_class(h)] for h in highways), dtype=np.int64, count=len(highways))
+        edge_profile = (area_index * len(ROAD_CLASSES) + class_index).astype(np.int16)
+
+        logger.info(f"Built {len(keys)} traffic profiles for {compiled.num_edges} edges "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return cls({"factors": np.array(factors, dtype=np.float32), "edge_profile": edge_profile},
+                   {"profiles": [list(key) for key in keys], "dataset_signature": dataset_signature(dataset_path)})
+
+    def save(self, out_dir: str, compiled: CompiledGraph) -> str:
+        """Write the profiles atomically, tagged with the graph and dataset signatures."""
+        manifest = {
+            "format": PROFILE_FORMAT,
+            "version": PROFILE_VERSION,
+            "created_at": time.time(),
+            "num_profiles": self.num_profiles,
+            "num_edges": int(len(self.edge_profile)),
+            "graph_signature": compiled.signature(),
+            "dataset_signature": self.manifest.get("dataset_signature"),
+            "profiles": self.manifest.get("profiles"),
+        }
+        tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in PROFILE_ARRAYS:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+        self.manifest = manifest
+        logger.info(f"Traffic profiles written to {out_dir}")
+        return out_dir
+
+    @classmethod
+    def load(cls, profile_dir: str, compiled: CompiledGraph, dataset_path: str) -> Optional["TrafficProfiles"]:
+        """Load the profiles, or return None if missing, or built for another graph or dataset."""
+        manifest_path = os.path.join(profile_dir, MANIFEST_NAME)
+        if not os.path.isfile(manifest_path):
+            return None
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable traffic profile manifest {manifest_path}: {e}")
+            return None
+        if manifest.get("format") != PROFILE_FORMAT or manifest.get("version") != PROFILE_VERSION:
+            logger.info(f"Ignoring traffic profiles {profile_dir}: format/version mismatch")
+            return None
+        if manifest.get("graph_signature") != compiled.signature():
+            logger.info(f"Ignoring traffic profiles {profile_dir}: built for a different graph")
+            return None
+        if manifest.get("dataset_signature") != dataset_signature(dataset_path):
+            logger.info(f"Ignoring traffic profiles {profile_dir}: traffic dataset changed")
+            return None
+        arrays = {name: np.load(os.path.join(profile_dir, f"{name}.npy")) for name in PROFILE_ARRAYS}
+        return cls(arrays, manifest)
+
+
+def load_or_build_profiles(profile_dir: str, compiled: CompiledGraph, highways, dataset_path: str) -> TrafficProfiles:
+    """
+    Load the profiles for compiled and the dataset, building and saving them
+    when missing or stale. highways is a callable returning the highway class
+    of every compiled edge, only called when the profiles have to be built.
+    """
+    profiles = TrafficProfiles.load(profile_dir, compiled, dataset_path)
+    if profiles is not None:
+        return profiles
+    profiles = TrafficProfiles.build(compiled, highways(), dataset_path)
+    try:
+        profiles.save(profile_dir, compiled)
+    except OSError as e:
+        logger.warning(f"Could not write traffic profiles to {profile_dir}: {e}")
+    return profiles
+
+
+if __name__ == "__main__":
+    from core.config import get_settings
+    from core.graph_manager import GraphManager
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build weekly travel-time profiles from the traffic dataset")
+    parser.add_argument("--source", default=settings.GRAPHML_FILE, help="GraphML file (its snapshot is used if fresh)")
+    parser.add_argument("--dataset", default=settings.TRAFFIC_DATASET_FILE, help="Traffic dataset (CSV)")
+    parser.add_argument("--out", default=settings.TRAFFIC_PROFILES_FILE, help="Profile output directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    manager = GraphManager(graph_file=args.source)
+    manager.traffic_dataset_file = args.dataset
+    manager.traffic_profile_dir = args.out
+    manager.load()
+    manager.get_traffic_profiles()
@@ -0,0 +1,212 @@
+import uuid
+import logging
+import threading
+import time as time_module
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from core.routing.compiled import CompiledGraph
+from core.routing.geometry_store import EdgeGeometryStore
+from core.routing.incremental import DStarLite, edge_top_speed
+
+logger = logging.getLogger(__name__)
+
+
+class _Metric:
+    """Travel times of one (traffic epoch, road closures) combination, shared by every trip on it."""
+
+    __slots__ = ("epoch", "closure_version", "weights", "weights_list", "top_speed")
+
+    def __init__(self, compiled: CompiledGraph, epoch: int, closure_version: int, weights: np.ndarray):
+        self.epoch = epoch
+        self.closure_version = closure_version
+        self.weights = weights
+        self.weights_list: List[float] = weights.tolist()
+        self.top_speed = max(compiled.max_speed_mps, edge_top_speed(compiled, weights))
+
+
+class _Trip:
+    __slots__ = ("trip_id", "search", "metric", "path", "lock", "last_used")
+
+    def __init__(self, trip_id: str, search: DStarLite, metric: _Metric):
+        self.trip_id = trip_id
+        self.search = search
+        self.metric = metric
+        self.path: List[int] = []
+        self.lock = threading.Lock()
+        self.last_used = time_module.time()
+
+
+class TripRouter:
+    """
+    Live trips rerouted incrementally (D* Lite, core/routing/incremental.py).
+
+    Each active trip keeps its own search state. When the traffic epoch or
+    the set of closed roads changes, the next request for the trip only
+    repairs the part of the search the changed edges affect; moving the
+    vehicle along its route needs no new search at all.
+    """
+
+    def __init__(self, geometry: EdgeGeometryStore, compiled: CompiledGraph,
+                 traffic: Callable[[], Tuple[int, np.ndarray]], max_trips: int = 1000, idle_ttl: float = 3600.0):
+        """
+        Args:
+            geometry: Flattened edge geometry, for the route coordinates
+            compiled: Compiled view the searches run on
+            traffic: Returns the current (traffic epoch, edge travel times)
+            max_trips: Active trips kept; the least recently used one is dropped beyond that
+            idle_ttl: Seconds after which a trip nobody asked about is dropped
+        """
+        self.geometry = geometry
+        self.compiled = compiled
+        self.traffic = traffic
+        self.max_trips = max_trips
+        self.idle_ttl = idle_ttl
+        self._trips: "OrderedDict[str, _Trip]" = OrderedDict()
+        self._closed: Set[int] = set()
+        self._closure_version = 0
+        self._metric: Optional[_Metric] = None
+        self._lock = threading.Lock()
+        logger.info(f"TripRouter initialized (max {max_trips} active trips).")
+
+    @property
+    def active_trips(self) -> int:
+        return len(self._trips)
+
+    def _current_metric(self) -> _Metric:
+        epoch, weights = self.traffic()
+        with self._lock:
+            metric = self._metric
+            if metric is None or metric.epoch != epoch or metric.closure_version != self._closure_version:
+                weights = np.array(weights, dtype=np.float64)
+                if self._closed:
+                    weights[list(self._closed)] = np.inf
+                metric = _Metric(self.compiled, epoch, self._closure_version, weights)
+                self._metric = metric
+            return metric
+
+    def _get(self, trip_id: str) -> _Trip:
+        with self._lock:
+            trip = self._trips.get(trip_id)
+            if trip is None:
+                raise HTTPException(status_code=404, detail=f"Unknown or expired trip {trip_id}")
+            self._trips.move_to_end(trip_id)
+            trip.last_used = time_module.time()
+            return trip
+
+    def _evict(self) -> None:
+        """Drop idle trips and, beyond max_trips, the least recently used ones. Caller holds the lock."""
+        cutoff = time_module.time() - self.idle_ttl
+        while self._trips:
+            oldest = next(iter(self._trips.values()))
+            if oldest.last_used >= cutoff and len(self._trips) <= self.max_trips:
+                break
+            del self._trips[oldest.trip_id]
+            logger.info(f"Dropped trip {oldest.trip_id}")
+
+    def start_trip(self, start_node: int, end_node: int) -> dict:
+        """Plan a trip between two graph nodes and keep its search state for later repairs."""
+        compiled = self.compiled
+        metric = self._current_metric()
+        start_time = time_module.perf_counter()
+        search = DStarLite(compiled, metric.weights_list, compiled.node_index(start_node),
+                           compiled.node_index(end_node), top_speed=metric.top_speed)
+        search.compute_shortest_path()
+        core_algorithm_time = time_module.perf_counter() - start_time
+
+        path = search.path()
+        if not path:
+            logger.warning(f"No route found from node {start_node} to node {end_node}.")
+            raise HTTPException(status_code=404, detail="No path found between the source and destination")
+
+        trip = _Trip(uuid.uuid4().hex, search, metric)
+        trip.path = path
+        with self._lock:
+            self._trips[trip.trip_id] = trip
+            self._evict()
+        logger.info(f"Trip {trip.trip_id} planned: expanded {search.expanded} nodes in {core_algorithm_time:.4f}s.")
+        return self._result(trip, core_algorithm_time, start_time, repaired_edges=0, rerouted=False)
+
+    def update_trip(self, trip_id: str, node: Optional[int] = None) -> dict:
+        """
+        Bring a trip up to date: move the vehicle to node (if given) and repair
+        the route for any traffic update or road closure since the last call.
+        """
+        trip = self._get(trip_id)
+        metric = self._current_metric()
+        with trip.lock:
+            start_time = time_module.perf_counter()
+            search = trip.search
+            if node is not None:
+                search.move_to(self.compiled.node_index(node))
+            repaired = 0
+            if metric is not trip.metric:
+                changed = np.flatnonzero(metric.weights != trip.metric.weights)
+                repaired = search.update_weights(metric.weights_list, changed)
+                trip.metric = metric
+            search.compute_shortest_path()
+            core_algorithm_time = time_module.perf_counter() - start_time
+
+            path = search.path()
+            # Moving along the same route is not a reroute
+            rerouted = path != trip.path[trip.path.index(path[0]):] if path and path[0] in trip.path else bool(path)
+            trip.path = path
+            logger.info(f"Trip {trip_id} updated: {repaired} changed edges touched the search, expanded "
+                        f"{search.expanded} nodes in {core_algorithm_time:.4f}s{' (rerouted)' if rerouted else ''}.")
+            return self._result(trip, core_algorithm_time, start_time, repaired, rerouted)
+
+    def end_trip(self, trip_id: str) -> None:
+        with self._lock:
+            if self._trips.pop(trip_id, None) is None:
+                raise HTTPException(status_code=404, detail=f"Unknown or expired trip {trip_id}")
+
+    def close_roads(self, edges: List[int], reopen: bool = False) -> int:
+        """
+        Close (or reopen) compiled edges, together with their opposite
+        direction. Active trips pick the change up on their next update.
+
+        Returns:
+            The number of closed edges afterwards
+        """
+        compiled = self.compiled
+        both_ways = set()
+        sources = np.searchsorted(compiled.offsets, np.asarray(edges, dtype=np.int64), side="right") - 1
+        for e, u in zip(edges, sources.tolist()):
+            both_ways.add(int(e))
+            twin = compiled.edge_position(compiled.targets_list[e], u)
+            if twin >= 0:
+                both_ways.add(twin)
+        with self._lock:
+            if reopen:
+                self._closed -= both_ways
+            else:
+                self._closed |= both_ways
+            self._closure_version += 1
+            return len(self._closed)
+
+    def _result(self, trip: _Trip, core_algorithm_time: float, start_time: float,
+                repaired_edges: int, rerouted: bool) -> dict:
+        compiled = self.compiled
+        path = trip.path
+        if len(path) > 1:
+            positions = compiled.path_edges(path)
+            distance = float(compiled.lengths[positions].sum()) / 1000.0
+            route = self.geometry.densify_path(path).tolist()
+        else:
+            distance, route = 0.0, []
+        return {
+            "trip_id": trip.trip_id,
+            "algorithm": "D* Lite",
+            "traffic_epoch": trip.metric.epoch,
+            "time": core_algorithm_time,
+            "total_time": time_module.perf_counter() - start_time,
+            "nodes": trip.search.expanded,
+            "distance": distance,
+            "time_mins": trip.search.cost / 60.0 if path else None,
+            "route": route,
+            "repaired_edges": repaired_edges,
+            "rerouted": rerouted,
+        }
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingPool:
+    """
+    Bounded worker pool for routing work, so searches, subgraph copies and
+    image rendering never run on the event loop (and never hold up the IoT
+    endpoints that pre-empt signals).
+
+    Requests are admitted up to max_workers running plus queue_depth waiting;
+    beyond that they are turned away with 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int = 4, queue_depth: int = 16):
+        """
+        Args:
+            max_workers: Worker threads running routing work
+            queue_depth: Requests allowed to wait for a worker
+        """
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="routing")
+        self._admitted = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+        logger.info(f"RoutingPool initialized ({max_workers} workers, queue depth {queue_depth}).")
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_depth
+
+    @contextmanager
+    def admit(self):
+        """Hold one request slot for the duration of the block, or raise 503 if all are taken."""
+        with self._lock:
+            if self._admitted >= self.capacity:
+                self._rejected += 1
+                logger.warning(f"Routing pool full ({self._admitted} requests admitted): rejecting request")
+                raise HTTPException(status_code=503, detail="Routing service is busy, please retry shortly",
+                                    headers={"Retry-After": "1"})
+            self._admitted += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._admitted -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on a worker thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a computation for a key is in
+    flight, further callers with the same key await its result (or its
+    exception) instead of starting their own. Used from the event loop only.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0  # Callers served by another caller's computation
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() for key, sharing the computation with concurrent callers of the same key."""
+        call = self._calls.get(key)
+        if call is None:
+            # A task of its own, so the computation survives the first caller being cancelled
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logger.info(f"Joined an identical computation in flight ({len(self._calls)} in flight)")
+        return await asyncio.shield(call)
+
+    def _forget(self, key: str, call: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+_routing_pool: Optional[RoutingPool] = None
+
+
+def get_routing_pool() -> RoutingPool:
+    """
+    Get or create the process-wide routing worker pool.
+
+    Returns:
+        RoutingPool: The shared pool, sized from the ROUTING_* settings
+    """
+    global _routing_pool
+
+    if _routing_pool is None:
+        settings = get_settings()
+        _routing_pool = RoutingPool(settings.ROUTING_WORKERS, settings.ROUTING_QUEUE_DEPTH)
+
+    return _routing_pool
+
+
+def shutdown_routing_pool() -> None:
+    """Stop the routing pool (application shutdown)."""
+    global _routing_pool
+
+    if _routing_pool is not None:
+        _routing_pool.shutdown()
+        _routing_pool = None
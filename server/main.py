@@ -7,6 +7,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from core.routing.graph_builder import build_simplified_graph
+from core.graph_manager import get_graph_manager
+from core.worker_pool import shutdown_routing_pool
+from core.render_jobs import shutdown_render_jobs
 from api.routes import router as api_router
 from iot.routes import router as iot_router
 import logging
@@ -72,6 +75,16 @@ async def lifespan(app: FastAPI):
             logger.info("Downloaded bengaluru.osm successfully.")
         else:
             logger.info("Graph file already exists. Skipping download.")
+
+        # Load the road graph once (from the binary snapshot when it is fresh);
+        # every route request shares this instance
+        graph_manager = get_graph_manager()
+        graph_manager.graph_file = graph_file_path
+        if graph_manager.is_available:
+            graph_manager.load()
+            logger.info(f"Road graph ready: {graph_manager.stats()}")
+        else:
+            logger.warning(f"{graph_file_path} is missing; route requests will fail until it is available.")
         
         logger.info("Startup complete")
         yield {"status": "ready"}
@@ -82,6 +95,8 @@ async def lifespan(app: FastAPI):
     
     finally:
         # Shutdown logic
+        shutdown_routing_pool()
+        shutdown_render_jobs()
         logger.info("Shutting down application")
 
 # Create FastAPI instance
@@ -0,0 +1,112 @@
+"""
+Shared fixtures: a small synthetic road graph and NetworkX reference
+shortest paths to check the compiled search kernels against.
+"""
+import math
+import os
+import random
+import sys
+from typing import List, Tuple
+
+import networkx as nx
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.routing.compiled import CompiledGraph  # noqa: E402
+
+GRID_SIZE = 20  # 400 nodes
+NUM_PAIRS = 60
+METERS_PER_DEGREE = 111320
+
+
+def make_road_graph(n: int = GRID_SIZE, seed: int = 7) -> nx.MultiDiGraph:
+    """
+    Jittered n x n grid with OSMnx-style attributes: mostly two-way roads,
+    some one-way streets, a few missing links and some parallel edges, at
+    speeds from 20 to 60 km/h.
+    """
+    rng = random.Random(seed)
+    G = nx.MultiDiGraph(crs="epsg:4326")
+    node_id = lambda i, j: 1000 + i * n + j
+    for i in range(n):
+        for j in range(n):
+            G.add_node(node_id(i, j), y=12.95 + i * 0.0015 + rng.uniform(-2e-4, 2e-4),
+                       x=77.58 + j * 0.0015 + rng.uniform(-2e-4, 2e-4))
+
+    def add(u: int, v: int) -> None:
+        a, b = G.nodes[u], G.nodes[v]
+        straight = math.hypot((a['y'] - b['y']) * METERS_PER_DEGREE,
+                              (a['x'] - b['x']) * METERS_PER_DEGREE * math.cos(math.radians(a['y'])))
+        length = straight * rng.uniform(1.0, 1.3)
+        speed_kph = rng.choice((20, 30, 40, 60))
+        G.add_edge(u, v, length=length, travel_time=length / (speed_kph / 3.6) * rng.uniform(0.8, 1.3),
+                   highway="primary" if speed_kph >= 40 else "residential")
+
+    for i in range(n):
+        for j in range(n):
+            for di, dj in ((0, 1), (1, 0)):
+                if i + di < n and j + dj < n and rng.random() > 0.05:
+                    u, v = node_id(i, j), node_id(i + di, j + dj)
+                    add(u, v)
+                    if rng.random() > 0.1:
+                        add(v, u)
+                    if rng.random() < 0.05:
+                        add(u, v)  # Parallel edge
+    return G
+
+
+def reference_graph(compiled: CompiledGraph, weights=None) -> nx.DiGraph:
+    """NetworkX DiGraph over compiled indices with the given (default: compiled) edge weights."""
+    weights = compiled.weights if weights is None else np.asarray(weights)
+    D = nx.DiGraph()
+    D.add_nodes_from(range(compiled.num_nodes))
+    D.add_weighted_edges_from(zip(compiled.sources().tolist(), compiled.targets.tolist(), weights.tolist()))
+    return D
+
+
+def reference_cost(D: nx.DiGraph, source: int, target: int) -> float:
+    try:
+        return nx.dijkstra_path_length(D, source, target)
+    except nx.NetworkXNoPath:
+        return math.inf
+
+
+def path_cost(compiled: CompiledGraph, path: List[int], weights=None) -> float:
+    """Travel time along a path of compiled indices."""
+    weights = compiled.weights if weights is None else np.asarray(weights)
+    return float(weights[compiled.path_edges(path)].sum()) if len(path) > 1 else 0.0
+
+
+def assert_optimal(compiled: CompiledGraph, D: nx.DiGraph, source: int, target: int, cost: float,
+                   path: List[int], weights=None, tolerance: float = 1e-6) -> None:
+    """cost equals the reference shortest path cost, and path is a source-target path of that cost."""
+    expected = reference_cost(D, source, target)
+    if math.isinf(expected):
+        assert math.isinf(cost) and not path
+        return
+    assert cost == pytest.approx(expected, abs=tolerance)
+    assert path[0] == source and path[-1] == target
+    assert path_cost(compiled, path, weights) == pytest.approx(expected, abs=tolerance)
+
+
+@pytest.fixture(scope="session")
+def road_graph() -> nx.MultiDiGraph:
+    return make_road_graph()
+
+
+@pytest.fixture(scope="session")
+def compiled(road_graph) -> CompiledGraph:
+    return CompiledGraph.from_graph(road_graph)
+
+
+@pytest.fixture(scope="session")
+def reference(compiled) -> nx.DiGraph:
+    return reference_graph(compiled)
+
+
+@pytest.fixture(scope="session")
+def pairs(compiled) -> List[Tuple[int, int]]:
+    rng = random.Random(11)
+    return [(rng.randrange(compiled.num_nodes), rng.randrange(compiled.num_nodes)) for _ in range(NUM_PAIRS)]
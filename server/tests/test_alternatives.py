@@ -0,0 +1,23 @@
+import pytest
+
+from conftest import assert_optimal, path_cost
+from core.routing.alternatives import MAX_OVERLAP, MAX_STRETCH, alternative_routes
+
+
+def test_alternatives(compiled, reference, pairs):
+    found = 0
+    for s, t in pairs:
+        routes = alternative_routes(compiled, [(s, 0.0)], {t: 0.0}, k=3)["routes"]
+        if not routes:
+            assert_optimal(compiled, reference, s, t, float('inf'), [])
+            continue
+        optimum = routes[0]["cost"]
+        assert_optimal(compiled, reference, s, t, optimum, routes[0]["path"])
+        for route in routes[1:]:
+            found += 1
+            path = route["path"]
+            assert path[0] == s and path[-1] == t and len(set(path)) == len(path)
+            assert route["cost"] == pytest.approx(path_cost(compiled, path))
+            assert route["cost"] <= (1 + MAX_STRETCH) * optimum + 1e-6
+            assert route["overlap"] <= MAX_OVERLAP
+    assert found > 0
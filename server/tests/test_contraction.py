@@ -0,0 +1,15 @@
+import pytest
+
+from conftest import assert_optimal
+from core.routing.contraction import ContractionHierarchy
+
+
+@pytest.fixture(scope="module")
+def hierarchy(compiled):
+    return ContractionHierarchy.build(compiled)
+
+
+def test_query(compiled, hierarchy, reference, pairs):
+    for s, t in pairs:
+        result = hierarchy.query([(s, 0.0)], {t: 0.0})
+        assert_optimal(compiled, reference, s, t, result["cost"], result["path"], tolerance=1e-3)
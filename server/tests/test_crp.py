@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from conftest import assert_optimal, reference_graph
+from core.routing.crp import CRPEngine
+
+
+@pytest.fixture(scope="module")
+def engine(compiled):
+    engine = CRPEngine(compiled, cell_sizes=(16, 64))
+    engine.customize()
+    return engine
+
+
+def test_query(compiled, engine, reference, pairs):
+    for s, t in pairs:
+        result = engine.query([(s, 0.0)], {t: 0.0})
+        assert_optimal(compiled, reference, s, t, result["cost"], result["path"])
+
+
+def test_query_after_customize(compiled, engine, pairs):
+    weights = compiled.weights * np.random.default_rng(5).uniform(0.7, 2.5, compiled.num_edges)
+    try:
+        engine.customize(weights, epoch=1)
+        assert engine.epoch == 1
+        reference = reference_graph(compiled, weights)
+        for s, t in pairs:
+            result = engine.query([(s, 0.0)], {t: 0.0})
+            assert_optimal(compiled, reference, s, t, result["cost"], result["path"], weights=weights)
+    finally:
+        engine.customize()
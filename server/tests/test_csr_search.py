@@ -0,0 +1,40 @@
+import pytest
+
+from conftest import assert_optimal
+from core.routing.csr_search import (
+    best_first_csr, bidirectional_csr_seeded, dijkstra_csr, dijkstra_csr_seeded, queue_heuristic,
+)
+
+
+def test_dijkstra(compiled, reference, pairs):
+    for s, t in pairs:
+        result = dijkstra_csr(compiled, s, t)
+        assert_optimal(compiled, reference, s, t, result["cost"], result["path"])
+
+
+def test_dijkstra_seeded_picks_best_target(compiled, reference, pairs):
+    for (s, t), (_, t2) in zip(pairs, pairs[1:]):
+        result = dijkstra_csr_seeded(compiled, [(s, 0.0)], {t: 0.0, t2: 0.0})
+        best = min(dijkstra_csr(compiled, s, t)["cost"], dijkstra_csr(compiled, s, t2)["cost"])
+        assert result["cost"] == pytest.approx(best)
+
+
+@pytest.mark.parametrize("use_heuristic", [False, True])
+def test_bidirectional(compiled, reference, pairs, use_heuristic):
+    for s, t in pairs:
+        result = bidirectional_csr_seeded(compiled, [(s, 0.0)], {t: 0.0}, use_heuristic=use_heuristic)
+        assert_optimal(compiled, reference, s, t, result["cost"], result["path"])
+
+
+@pytest.mark.parametrize("queue", ["heapq", "addressable", "radix"])
+@pytest.mark.parametrize("astar", [False, True])
+def test_best_first_queues(compiled, reference, pairs, queue, astar):
+    for s, t in pairs:
+        heuristic = queue_heuristic(compiled, (compiled.lat_list[t], compiled.lng_list[t]), queue) if astar else None
+        result = best_first_csr(compiled, [(s, 0.0)], {t: 0.0}, queue=queue, heuristic=heuristic)
+        if queue == "radix" or not astar:
+            assert_optimal(compiled, reference, s, t, result["cost"], result["path"])
+        else:
+            # The heaps keep AmbulanceRouter's average-speed heuristic, which
+            # may overestimate: the route is valid but not always optimal
+            assert result["cost"] >= dijkstra_csr(compiled, s, t)["cost"] - 1e-6
@@ -0,0 +1,59 @@
+import numpy as np
+
+from conftest import assert_optimal, reference_graph
+from core.routing.incremental import DStarLite
+
+
+def check(compiled, planner, weights):
+    reference = reference_graph(compiled, weights)
+    path = planner.path()
+    assert_optimal(compiled, reference, planner.start, planner.goal, planner.cost, path, weights=weights)
+
+
+def test_replans_after_weight_changes(compiled, pairs):
+    rng = np.random.default_rng(9)
+    for s, t in pairs[:20]:
+        weights = compiled.weights.copy()
+        planner = DStarLite(compiled, weights.tolist(), s, t)
+        planner.compute_shortest_path()
+        check(compiled, planner, weights)
+        path = planner.path()
+
+        for step in range(3):
+            # Slow down edges on and around the current route, speed up a few elsewhere
+            changed = rng.choice(compiled.num_edges, size=40, replace=False)
+            weights[changed] *= rng.uniform(0.6, 3.0, len(changed))
+            on_route = compiled.path_edges(path)
+            weights[on_route] *= 1.5
+            planner.update_weights(weights.tolist())
+            planner.compute_shortest_path()
+            check(compiled, planner, weights)
+            path = planner.path()
+            if len(path) > 2:
+                planner.move_to(path[1])
+                path = path[1:]
+
+
+def test_closed_road(compiled, pairs):
+    for s, t in pairs[:20]:
+        weights = compiled.weights.copy()
+        planner = DStarLite(compiled, weights.tolist(), s, t)
+        planner.compute_shortest_path()
+        path = planner.path()
+        if len(path) < 2:
+            continue
+        weights[compiled.path_edges(path)[len(path) // 2 - 1]] = np.inf
+        planner.update_weights(weights.tolist())
+        planner.compute_shortest_path()
+        check(compiled, planner, weights)
+
+
+def test_speedup_beyond_heuristic_bound(compiled, pairs):
+    s, t = pairs[0]
+    weights = compiled.weights.copy()
+    planner = DStarLite(compiled, weights.tolist(), s, t)
+    planner.compute_shortest_path()
+    weights[::7] /= 4.0
+    planner.update_weights(weights.tolist())
+    planner.compute_shortest_path()
+    check(compiled, planner, weights)
@@ -0,0 +1,31 @@
+import networkx as nx
+import pytest
+
+from conftest import assert_optimal
+from core.routing.csr_search import astar_csr_seeded, best_first_csr
+from core.routing.landmarks import LandmarkTables
+
+
+@pytest.fixture(scope="module")
+def landmarks(compiled):
+    return LandmarkTables.build(compiled, count=8)
+
+
+def test_lower_bounds(landmarks, reference, pairs):
+    for s, t in pairs[:15]:
+        heuristic = landmarks.heuristic([(s, 0.0)], {t: 0.0})
+        remaining = nx.single_source_dijkstra_path_length(reference.reverse(copy=False), t)
+        for node, cost in remaining.items():
+            assert heuristic(node) <= cost + 1e-6
+
+
+@pytest.mark.parametrize("queue", [None, "addressable", "radix"])
+def test_alt(compiled, landmarks, reference, pairs, queue):
+    for s, t in pairs:
+        sources, targets = [(s, 0.0)], {t: 0.0}
+        heuristic = landmarks.heuristic(sources, targets)
+        if queue is None:
+            result = astar_csr_seeded(compiled, sources, targets, heuristic=heuristic)
+        else:
+            result = best_first_csr(compiled, sources, targets, queue=queue, heuristic=heuristic)
+        assert_optimal(compiled, reference, s, t, result["cost"], result["path"])
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from core.routing.priority_queues import QUEUES
+
+
+@pytest.mark.parametrize("name", sorted(QUEUES))
+def test_pops_in_order(name):
+    rng = random.Random(3)
+    queue = QUEUES[name]()
+    last = 0.0
+    popped = []
+    # Monotone workload, as in Dijkstra: pushes never fall below the last popped cost
+    for node in range(2000):
+        queue.push(last + rng.uniform(0, 50), node)
+        if rng.random() < 0.4:
+            cost, _ = queue.pop()
+            popped.append(cost)
+            last = cost
+    while len(queue):
+        popped.append(queue.pop()[0])
+    assert len(popped) == 2000
+    for previous, cost in zip(popped, popped[1:]):
+        assert cost >= previous - queue.resolution
+
+
+def test_addressable_heap_decrease_key():
+    queue = QUEUES["addressable"]()
+    queue.push(10.0, 1)
+    queue.push(5.0, 2)
+    queue.push(3.0, 1)
+    assert len(queue) == 2
+    assert queue.pop() == (3.0, 1)
+    assert queue.pop() == (5.0, 2)
@@ -1,19 +1,157 @@
 import osmnx as ox
 import networkx as nx
 import numpy as np
-from typing import Tuple, Any
+from scipy.spatial import cKDTree, ConvexHull, QhullError
+from typing import List, Tuple, Any, Sequence
 
-def snap_to_nearest_node(graph: nx.Graph, point: Tuple[float, float]) -> Any:
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """
+    Vectorised great-circle distance in metres.
+
+    All arguments may be scalars or NumPy arrays (broadcast together).
+    """
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def equirectangular_distance(lat1, lng1, lat2, lng2):
+    """
+    Vectorised equirectangular approximation of the distance in metres.
+    Cheaper than haversine and accurate to well under a percent at city scale.
+    """
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lng1, lat2, lng2))
+    x = (lng2 - lng1) * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return EARTH_RADIUS_M * np.hypot(x, y)
+
+
+def polyline_length(coords, method: str = "haversine") -> float:
+    """
+    Length in metres of a (lat, lng) polyline, e.g. a densified route.
+
+    Args:
+        coords: (N, 2) array-like of (latitude, longitude)
+        method: "haversine" or "equirectangular"
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if len(coords) < 2:
+        return 0.0
+    distance = haversine if method == "haversine" else equirectangular_distance
+    return float(distance(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1]).sum())
+
+
+def project_equirectangular(lat: np.ndarray, lng: np.ndarray, ref_lat: float) -> np.ndarray:
+    """Project lat/lng arrays to local planar (x, y) metres around ref_lat."""
+    x = np.radians(lng) * np.cos(np.radians(ref_lat)) * EARTH_RADIUS_M
+    y = np.radians(lat) * EARTH_RADIUS_M
+    return np.column_stack((x, y))
+
+
+def unproject_equirectangular(xy: np.ndarray, ref_lat: float) -> np.ndarray:
+    """Inverse of project_equirectangular; returns an (M, 2) array of (lat, lng)."""
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    lat = np.degrees(xy[:, 1] / EARTH_RADIUS_M)
+    lng = np.degrees(xy[:, 0] / (EARTH_RADIUS_M * np.cos(np.radians(ref_lat))))
+    return np.column_stack((lat, lng))
+
+
+def convex_hull(lat: np.ndarray, lng: np.ndarray) -> List[List[float]]:
+    """
+    Convex hull of (lat, lng) points as a closed [[lat, lng], ...] ring in
+    counter-clockwise order. Fewer than three distinct or collinear points
+    have no area; their distinct points are returned unclosed.
+    """
+    points = np.unique(np.column_stack((np.asarray(lat, dtype=np.float64),
+                                        np.asarray(lng, dtype=np.float64))), axis=0)
+    if len(points) < 3:
+        return points.tolist()
+    xy = project_equirectangular(points[:, 0], points[:, 1], float(points[:, 0].mean()))
+    try:
+        vertices = ConvexHull(xy).vertices
+    except QhullError:
+        return points.tolist()
+    ring = points[vertices].tolist()
+    return ring + ring[:1]
+
+
+class NodeSpatialIndex:
+    """
+    KD-tree over graph node coordinates, built once per graph.
+
+    Coordinates are projected with an equirectangular projection centred on
+    the graph's mean latitude, so tree distances are metres and accurate to
+    well under a percent across a city-sized area.
+    """
+
+    def __init__(self, node_ids: Sequence[Any], lat: np.ndarray, lng: np.ndarray):
+        self.node_ids = np.asarray(node_ids)
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        self.ref_lat = float(lat.mean()) if len(lat) else 0.0
+        self.tree = cKDTree(self.project(lat, lng))
+
+    @classmethod
+    def from_graph(cls, graph: nx.Graph) -> "NodeSpatialIndex":
+        node_ids, lat, lng = [], [], []
+        for node, data in graph.nodes(data=True):
+            node_ids.append(node)
+            lat.append(data.get('y', data.get('lat', 0)))
+            lng.append(data.get('x', data.get('lon', 0)))
+        return cls(node_ids, np.array(lat), np.array(lng))
+
+    @classmethod
+    def from_compiled(cls, compiled) -> "NodeSpatialIndex":
+        """Index a CompiledGraph; positions in the tree are compiled node indices."""
+        return cls(compiled.node_ids, compiled.lat, compiled.lng)
+
+    def project(self, lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+        """Project lat/lng arrays to local planar (x, y) metres."""
+        return project_equirectangular(lat, lng, self.ref_lat)
+
+    def nearest_positions(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorised nearest-node query.
+
+        Args:
+            points: (M, 2) array of (latitude, longitude)
+
+        Returns:
+            (positions, distances_m): index into node_ids and distance in metres for each point
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        distances, positions = self.tree.query(self.project(points[:, 0], points[:, 1]))
+        return positions, distances
+
+    def snap_points(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Batch-snap (latitude, longitude) points; returns (node_ids, distances_m)."""
+        positions, distances = self.nearest_positions(points)
+        return self.node_ids[positions], distances
+
+    def nearest(self, point: Tuple[float, float]) -> Any:
+        """Node id nearest to a single (latitude, longitude) point."""
+        positions, _ = self.nearest_positions(np.array([point]))
+        return self.node_ids[positions[0]].item()
+
+
+def snap_to_nearest_node(graph: nx.Graph, point: Tuple[float, float], index: NodeSpatialIndex = None) -> Any:
     """
     Find the nearest node in the graph to the given point.
     
     Args:
         graph: A NetworkX graph
         point: A tuple of (latitude, longitude)
+        index: Optional prebuilt NodeSpatialIndex of the graph (avoids the linear scan)
         
     Returns:
         The ID of the nearest node
     """
+    if index is not None:
+        return index.nearest(point)
+
     lat, lng = point
     
     # Calculate distance to all nodes
@@ -0,0 +1,112 @@
+"""
+Compact route encodings: Google encoded polylines and Douglas-Peucker
+simplification per map zoom level.
+
+A densified cross-city route is thousands of [lat, lng] pairs, hundreds of
+KB as JSON; as an encoded polyline it is a few characters per point, and a
+variant simplified to the pixel size of the zoom level the client is
+showing drops most of the points on straight stretches.
+"""
+import math
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+
+from utils.geo_helpers import project_equirectangular
+
+POLYLINE_PRECISIONS = (5, 6)  # Decimal digits kept: 5 is Google's format (~1 m), 6 is OSRM/Valhalla's (~0.1 m)
+METERS_PER_PIXEL_Z0 = 156543.03392  # Web Mercator ground resolution at the equator, zoom 0, 256 px tiles
+PIXEL_TOLERANCE = 1.0  # Simplification tolerance in screen pixels at the target zoom
+MAX_CHUNKS = 13  # 5-bit chunks of a 64-bit value
+
+
+def encode_polyline(coords: Sequence[Sequence[float]], precision: int = 5) -> str:
+    """
+    Encode (lat, lng) points with the encoded polyline algorithm.
+
+    Args:
+        coords: (N, 2) array-like of (latitude, longitude)
+        precision: Decimal digits kept, 5 or 6
+
+    Returns:
+        The encoded string ("" for no points)
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if len(coords) == 0:
+        return ""
+    scaled = np.round(coords * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = (deltas << 1) ^ (deltas >> 63)  # Zigzag: sign in the lowest bit
+
+    # Split every value into 5-bit chunks, least significant first; all but
+    # the last chunk of a value carry the 0x20 continuation bit
+    shifts = 5 * np.arange(MAX_CHUNKS, dtype=np.int64)
+    chunks = (values[:, None] >> shifts) & 0x1F
+    n_chunks = 1 + ((values[:, None] >> shifts[1:]) > 0).sum(axis=1)
+    used = np.arange(MAX_CHUNKS) < n_chunks[:, None]
+    more = np.arange(MAX_CHUNKS) < (n_chunks - 1)[:, None]
+    chars = (chunks | np.where(more, 0x20, 0)) + 63
+    return chars[used].astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> np.ndarray:
+    """Inverse of encode_polyline; returns an (N, 2) array of (lat, lng)."""
+    if not encoded:
+        return np.zeros((0, 2), dtype=np.float64)
+    chunks = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    last = (chunks & 0x20) == 0
+    value_of = np.concatenate(([0], np.cumsum(last)[:-1]))
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    position = np.arange(len(chunks)) - starts[value_of]
+    values = np.zeros(len(starts), dtype=np.int64)
+    np.add.at(values, value_of, (chunks & 0x1F) << (5 * position))
+    deltas = (values >> 1) ^ -(values & 1)
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** precision
+
+
+def simplify_polyline(coords: Sequence[Sequence[float]], tolerance_m: float) -> np.ndarray:
+    """
+    Douglas-Peucker simplification.
+
+    Args:
+        coords: (N, 2) array-like of (latitude, longitude)
+        tolerance_m: Largest distance in metres a dropped point may lie from the simplified line
+
+    Returns:
+        (M, 2) array of the kept points; the first and last point are always kept
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if len(coords) < 3 or tolerance_m <= 0:
+        return coords
+    xy = project_equirectangular(coords[:, 0], coords[:, 1], float(coords[:, 0].mean()))
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[0] = keep[-1] = True
+    ranges = [(0, len(coords) - 1)]
+    while ranges:
+        first, last = ranges.pop()
+        if last - first < 2:
+            continue
+        a, ab = xy[first], xy[last] - xy[first]
+        inner = xy[first + 1:last] - a
+        denom = float(ab @ ab)
+        t = np.clip(inner @ ab / denom, 0.0, 1.0) if denom > 0 else np.zeros(len(inner))
+        distances = np.hypot(*(inner - t[:, None] * ab).T)
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            split = first + 1 + farthest
+            keep[split] = True
+            ranges.append((first, split))
+            ranges.append((split, last))
+    return coords[keep]
+
+
+def zoom_tolerance_m(zoom: int, lat: float) -> float:
+    """Ground size in metres of PIXEL_TOLERANCE screen pixels at a Web Mercator zoom level and latitude."""
+    return PIXEL_TOLERANCE * METERS_PER_PIXEL_Z0 * math.cos(math.radians(lat)) / 2 ** zoom
+
+
+def simplify_for_zooms(coords: Sequence[Sequence[float]], zooms: Iterable[int]) -> Dict[int, np.ndarray]:
+    """Douglas-Peucker variants of a route, one per zoom level: {zoom: (M, 2) array}."""
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    lat = float(coords[:, 0].mean()) if len(coords) else 0.0
+    return {zoom: simplify_polyline(coords, zoom_tolerance_m(zoom, lat)) for zoom in zooms}